@@ -1,14 +1,27 @@
 # api.py (HF Space / Docker에서 사용할 버전)
-import io
-from typing import Any, Dict
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
+import torch
 from fastapi import FastAPI, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from PIL import Image
+from fastapi.responses import JSONResponse, Response
 
+import metrics
+from batcher import MicroBatcher
+from cascade import get_cascade, predict_batch_cascade
 from model_loader_HF import get_model_bundle
-from predictor import predict_image  # ✅ predictor 방식 사용
+from prediction_cache import PredictionCache
+from predictor import predict_batch, preprocess_bytes_timed  # ✅ predictor 방식 사용
+from tta import TTA_MAX_VIEWS, preprocess_bytes_tta_timed, tta_views
+from warmup import Warmup
+from worker_pool import PoolSaturated, WorkerPool
+
+# /predict_batch 한 요청에 받을 최대 파일 수 (배치 대기열 크기보다 작게)
+PREDICT_BATCH_MAX_FILES = int(os.getenv("PREDICT_BATCH_MAX_FILES", "16"))
 
 app = FastAPI(title="HaneulGyeol Cloud Classifier API", version="1.0.0")
 
@@ -20,6 +33,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ✅ 요청 수/상태/지연/진행 중 요청 (/metrics)
+app.add_middleware(
+    metrics.MetricsMiddleware,
+    endpoints=["/", "/health", "/ready", "/metrics", "/predict", "/predict_batch"],
+)
+
 def infer_arch(model) -> str:
     # 완벽하진 않지만 메타 표시용으로 충분
     if hasattr(model, "fc"):
@@ -29,14 +48,150 @@ def infer_arch(model) -> str:
         return "convnext_tiny"
     return "unknown"
 
+def build_meta(b) -> Dict[str, Any]:
+    # ✅ predictor가 요구하는 meta 구성
+    return {
+        "device": b.device,
+        "classes": b.class_names,
+        "img_size": b.img_size,       # 체크포인트에 저장된 학습 기준 사이즈
+        "arch": b.arch if b.arch != "unknown" else infer_arch(b.model),
+        "run_name": "hf-space",
+    }
+
+def input_sizes(b):
+    # cascade면 (빠른 모델, 무거운 모델) 입력을 한 번의 디코딩으로 같이 만듦
+    cascade = get_cascade()
+    return cascade.img_sizes if cascade is not None else build_meta(b)["img_size"]
+
+def serving_model_id(b) -> str:
+    cascade = get_cascade()
+    return cascade.model_id if cascade is not None else b.model_id
+
+def request_views(tta: Optional[int]) -> int:
+    # cascade는 1단계 모델의 (단일 view) 확신도로 escalation을 정하므로 TTA 미적용
+    # (명시적 tta>1 요청은 tta_rejected()가 400으로 막음, TTA_VIEWS 기본값은 무시 → /health에 실제 값)
+    return 1 if get_cascade() is not None else tta_views(tta)
+
+def tta_rejected(tta: Optional[int]) -> Optional[JSONResponse]:
+    # 클라이언트가 요청한 TTA를 조용히 끄지 않도록 cascade 모드에서는 400
+    if tta is not None and tta > 1 and get_cascade() is not None:
+        return JSONResponse(
+            status_code=400,
+            content={"success": False, "error": "tta > 1 is not supported while the cascade is enabled."},
+        )
+    return None
+
+def cache_key(data: bytes, n: int) -> str:
+    # TTA 결과는 view 수별로 따로 캐시 (n=1은 기존 키 그대로)
+    return prediction_cache.key(data, "tta", n) if n > 1 else prediction_cache.key(data)
+
+def decode_fn(n: int):
+    # (함수, 추가 인자) — n>1이면 한 번 디코딩해서 n개 view를 (n,3,H,W)로
+    return (preprocess_bytes_tta_timed, (n,)) if n > 1 else (preprocess_bytes_timed, ())
+
+def _item_rows(item) -> int:
+    # 배처의 BATCH_MAX_SIZE는 forward 배치 행 수 기준 (TTA 요청은 view 수만큼 차지)
+    return item.size(0) if torch.is_tensor(item) else 1
+
+def _run_batch(items):
+    # 마이크로 배처가 모은 (n,3,H,W) 텐서들(n = TTA view 수, 보통 1)을 한 번의 forward로 처리
+    b = get_model_bundle()
+    cascade = get_cascade()
+    timings: Dict[str, float] = {}
+    if cascade is not None:
+        # ✅ 빠른 모델 → 확신 낮은 이미지만 무거운 모델 (CASCADE_*)
+        out = predict_batch_cascade(cascade, build_meta(b), items, topk=3, timings=timings)
+        for r in out:
+            metrics.CASCADE_ANSWERS.inc(stage=r["meta"]["cascade_stage"])
+    else:
+        views = [x.size(0) for x in items]
+        x = torch.cat(items, dim=0)
+        out = predict_batch(model=b.model, meta=build_meta(b), x=x, topk=3, timings=timings,
+                            views=views if max(views) > 1 else None)
+
+    metrics.BATCH_SIZE.observe(sum(_item_rows(x) for x in items))
+    for stage, sec in timings.items():
+        metrics.STAGE_SECONDS.observe(sec, stage=stage)
+    return out
+
+async def read_upload(f: UploadFile) -> bytes:
+    t0 = time.perf_counter()
+    data = await f.read()
+    metrics.STAGE_SECONDS.observe(time.perf_counter() - t0, stage="read")
+    return data
+
+def record_decode(out):
+    """preprocess_bytes_timed 결과 → 디코딩/전처리 시간 기록 후 입력 텐서만 반환 (실패는 그대로)."""
+    if isinstance(out, BaseException):
+        metrics.IMAGE_ERRORS.inc(stage="decode")
+        return out
+    x, decode_s, transform_s = out
+    metrics.STAGE_SECONDS.observe(decode_s, stage="decode")
+    metrics.STAGE_SECONDS.observe(transform_s, stage="transform")
+    return x
+
+async def cache_get(key: str):
+    # 메모리 LRU는 바로, PRED_CACHE_DIR 디스크 조회는 워커 스레드에서 (이벤트 루프를 막지 않음)
+    result = await prediction_cache.aget(key)
+    metrics.CACHE_LOOKUPS.inc(result="miss" if result is None else "hit")
+    return result
+
+# ✅ 디코딩/전처리는 decode_pool(thread|process), forward는 전용 스레드 1개에서
+#    → 이벤트 루프가 막히지 않아 /health 등이 추론 중에도 바로 응답
+decode_pool = WorkerPool(name="decode")
+infer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hg-infer")
+batcher = MicroBatcher(_run_batch, executor=infer_executor, size_fn=_item_rows)
+
+# ✅ 같은 이미지 재요청은 디코딩/추론 없이 응답 (PRED_CACHE_SIZE / PRED_CACHE_TTL / PRED_CACHE_DIR)
+prediction_cache = PredictionCache()
+
+# ✅ 기동 후 합성 배치로 커널/메모리 워밍업 (WARMUP / WARMUP_BATCH_SIZES / WARMUP_IMG_SIZES / WARMUP_ITERS)
+warmup = Warmup()
+
+def busy_response(e: Exception) -> JSONResponse:
+    # ✅ 포화 상태면 기다리지 않고 바로 503 (클라이언트가 재시도)
+    return JSONResponse(
+        status_code=503,
+        content={"success": False, "error": f"Server is busy, please retry. ({e})"},
+        headers={"Retry-After": "1"},
+    )
+
 @app.on_event("startup")
 def _startup_load_model():
-    _ = get_model_bundle()
+    b = get_model_bundle()
+    prediction_cache.bind(serving_model_id(b))
+
+    # ✅ 모든 메트릭 시리즈에 모델 식별 라벨
+    meta = build_meta(b)
+    metrics.REGISTRY.set_const_labels(arch=meta["arch"], run_name=meta["run_name"], device=meta["device"])
+    metrics.MODEL_INFO.set(1, model_id=serving_model_id(b), backend=b.backend)
+    metrics.BATCHER_QUEUE.set_function(lambda: batcher.stats()["queued"])
+    metrics.DECODE_INFLIGHT.set_function(lambda: decode_pool.stats()["inflight"])
+
+@app.on_event("startup")
+async def _startup_batcher():
+    decode_pool.start()
+    batcher.start()
+
+@app.on_event("startup")
+async def _startup_warmup():
+    # ✅ 기동을 막지 않도록 백그라운드로, 실제 forward와 같은 infer 스레드에서 실행
+    #    (그동안 들어온 요청은 같은 스레드 뒤에 줄을 섬 → /ready로 트래픽 투입 시점 판단)
+    b = get_model_bundle()
+    cascade = get_cascade()
+    extra = [(cascade.fast.model, build_meta(cascade.fast))] if cascade is not None else []
+    asyncio.get_running_loop().run_in_executor(infer_executor, warmup.run, b.model, build_meta(b), extra)
+
+@app.on_event("shutdown")
+async def _shutdown_batcher():
+    await batcher.stop()
+    decode_pool.shutdown()
+    infer_executor.shutdown(wait=False)
 
 @app.get("/")
 def root() -> Dict[str, Any]:
     # HF가 / 를 자주 찍어봄(로그에 뜨는 GET /)
-    return {"ok": True, "service": "HaneulGyeol API", "endpoints": ["/health", "/predict"]}
+    return {"ok": True, "service": "HaneulGyeol API", "endpoints": ["/health", "/ready", "/metrics", "/predict", "/predict_batch"]}
 
 @app.get("/health")
 def health() -> Dict[str, Any]:
@@ -46,38 +201,135 @@ def health() -> Dict[str, Any]:
         "device": b.device,
         "num_classes": len(b.class_names),
         "classes": b.class_names,
+        "model_id": b.model_id,
+        "backend": b.backend,
+        "precision": b.precision,
+        "channels_last": b.channels_last,
+        "batcher": batcher.stats(),
+        "decode_pool": decode_pool.stats(),
+        "cache": prediction_cache.stats(),
+        "warmup": warmup.stats(),
+        "cascade": get_cascade().stats() if get_cascade() is not None else None,
+        "tta": {"default_views": request_views(None), "max_views": request_views(TTA_MAX_VIEWS)},
     }
 
+@app.get("/metrics")
+def metrics_endpoint():
+    # ✅ Prometheus text format (단계별 지연 히스토그램, 요청/에러 카운터, 진행 중 게이지, 배치 크기 분포)
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/ready")
+def ready():
+    # ✅ readiness probe: 워밍업이 끝나야 200 (진행 중이면 503)
+    #    워밍업 실패는 ready로 봄 (/predict는 정상 동작) → warmup="failed" + warmup_error로 알림
+    content = {"ready": warmup.ready, "warmup": warmup.state, "warmup_s": round(warmup.total_s, 3)}
+    if warmup.error:
+        content["warmup_error"] = warmup.error
+    if not warmup.ready:
+        return JSONResponse(status_code=503, content=content, headers={"Retry-After": "1"})
+    return content
+
 @app.post("/predict")
-async def predict(file: UploadFile = File(...)):
+async def predict(file: UploadFile = File(...), tta: Optional[int] = None):
+    # tta: view 수 (tta.py, 없으면 TTA_VIEWS) — 한 번의 배치 forward로 logits 평균
+    rejected = tta_rejected(tta)
+    if rejected is not None:
+        return rejected
+
+    stage = "read"  # 실패한 단계 (hg_image_errors_total)
     try:
         b = get_model_bundle()
 
-        data = await file.read()
-        img = Image.open(io.BytesIO(data)).convert("RGB")
-
-        # ✅ predictor가 요구하는 meta 구성
-        meta = {
-            "device": b.device,
-            "classes": b.class_names,
-            "img_size": 320,              # 학습 기준 사이즈로(필요하면 env로 뺄 수 있음)
-            "arch": infer_arch(b.model),
-            "run_name": "hf-space",
-        }
-
-        result = predict_image(
-            model=b.model,
-            meta=meta,
-            img=img,
-            topk=3,
-        )
+        data = await read_upload(file)
+
+        # 모델이 바뀌었으면 캐시가 스스로 비워짐
+        prediction_cache.bind(serving_model_id(b))
+        n = request_views(tta)
+        key = cache_key(data, n)
+        result = await cache_get(key)
+
+        if result is None:
+            stage = "decode"
+            fn, extra = decode_fn(n)
+            x = record_decode(await decode_pool.run(fn, data, input_sizes(b), *extra))
+
+            # ✅ 동시 요청과 묶어서 한 번에 추론 (BATCH_MAX_SIZE / BATCH_MAX_WAIT_MS)
+            stage = "infer"
+            result = await batcher.submit(x)
+            await prediction_cache.aput(key, result)
 
         # ✅ AISection이 기대하는 응답 구조
         return {"success": True, "result": result}
 
+    except PoolSaturated as e:
+        return busy_response(e)
+
     except Exception as e:
+        metrics.IMAGE_ERRORS.inc(stage=stage)
         # ✅ AISection이 기대하는 error 구조
         return JSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)},
         )
+
+@app.post("/predict_batch")
+async def predict_batch_endpoint(files: List[UploadFile] = File(...), tta: Optional[int] = None):
+    """
+    여러 이미지를 한 번에 분류.
+    - 디코딩은 decode_pool에서 병렬로, 추론은 배처를 통해 실제 텐서 배치로 처리
+    - tta: 이미지마다 같은 view 수 적용 (/predict와 동일, cascade 모드에서 tta>1은 400)
+    - 결과는 입력 순서대로, 이미지별로 {success, result | error}
+    """
+    if len(files) > PREDICT_BATCH_MAX_FILES:
+        return JSONResponse(
+            status_code=400,
+            content={"success": False, "error": f"Too many files (max {PREDICT_BATCH_MAX_FILES})."},
+        )
+    rejected = tta_rejected(tta)
+    if rejected is not None:
+        return rejected
+
+    try:
+        b = get_model_bundle()
+        datas = [await read_upload(f) for f in files]
+
+        prediction_cache.bind(serving_model_id(b))
+        n = request_views(tta)
+        keys = [cache_key(d, n) for d in datas]
+        outs = list(await asyncio.gather(*(cache_get(k) for k in keys)))
+
+        # 캐시에 없는 이미지만 디코딩 → 성공한 것만 배처로 보냄
+        todo = [i for i, out in enumerate(outs) if out is None]
+        fn, extra = decode_fn(n)
+        decoded = await decode_pool.map(fn, [datas[i] for i in todo], input_sizes(b), *extra)
+        for i, out in zip(todo, decoded):
+            outs[i] = record_decode(out)
+
+        ok_idx = [i for i in todo if not isinstance(outs[i], BaseException)]
+        predicted = await batcher.submit_many([outs[i] for i in ok_idx])
+        puts = []
+        for i, out in zip(ok_idx, predicted):
+            outs[i] = out
+            if isinstance(out, BaseException):
+                metrics.IMAGE_ERRORS.inc(stage="infer")
+            else:
+                puts.append(prediction_cache.aput(keys[i], out))
+        await asyncio.gather(*puts)
+
+        results = []
+        for f, out in zip(files, outs):
+            if isinstance(out, BaseException):
+                results.append({"filename": f.filename, "success": False, "error": str(out)})
+            else:
+                results.append({"filename": f.filename, "success": True, "result": out})
+
+        return {"success": True, "results": results}
+
+    except PoolSaturated as e:
+        return busy_response(e)
+
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)},
+        )
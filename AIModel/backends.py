@@ -0,0 +1,76 @@
+# AIModel/backends.py
+"""
+ModelBundle 뒤에서 돌아가는 추론 백엔드.
+
+INFER_BACKEND 환경변수로 선택:
+  - "torch"       : PyTorch (eager, 또는 export_compiled.py의 TorchScript 산출물이 있으면 그것)
+  - "onnxruntime" : export_onnx.py로 만든 <stem>.onnx를 ONNX Runtime CPU로 실행
+                    (선택 의존성: pip install onnx onnxruntime)
+
+어느 백엔드든 bundle.model(x: Tensor[N,3,H,W]) -> Tensor[N,C] (logits) 로 똑같이 호출된다.
+"""
+import json
+import os
+from typing import Optional
+
+import torch
+
+INFER_BACKEND = os.getenv("INFER_BACKEND", "torch").lower()
+ORT_THREADS = int(os.getenv("ORT_THREADS", "0"))  # 0 = onnxruntime 기본값
+
+BACKENDS = ("torch", "onnxruntime")
+
+# export_onnx.py가 모델 metadata_props에 넣는 키 (classes는 JSON 문자열)
+ONNX_META_KEYS = ("classes", "arch", "img_size", "run_name", "ckpt_sha256")
+
+
+class OnnxRuntimeModel:
+    """nn.Module처럼 호출할 수 있는 ONNX Runtime 세션 래퍼 (CPU)."""
+
+    def __init__(self, onnx_path: str, threads: int = ORT_THREADS):
+        import onnxruntime as ort
+
+        so = ort.SessionOptions()
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            so.intra_op_num_threads = threads
+
+        self.path = onnx_path
+        self.session = ort.InferenceSession(onnx_path, so, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    @property
+    def meta(self) -> dict:
+        raw = self.session.get_modelmeta().custom_metadata_map
+        meta = {k: raw[k] for k in ONNX_META_KEYS if k in raw}
+        if "classes" in meta:
+            meta["classes"] = json.loads(meta["classes"])
+        if "img_size" in meta:
+            meta["img_size"] = int(meta["img_size"])
+        return meta
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        x = x.detach().to("cpu", torch.float32).contiguous()
+        out = self.session.run(None, {self.input_name: x.numpy()})[0]
+        return torch.from_numpy(out)
+
+    # predictor / api 코드가 nn.Module에 하던 호출과 호환
+    def eval(self):
+        return self
+
+    def to(self, *args, **kwargs):
+        return self
+
+
+def onnx_artifact_path(ckpt_path: str) -> str:
+    """export_onnx.py 기본 출력 경로: 체크포인트 옆의 <stem>.onnx"""
+    from pathlib import Path
+
+    return str(Path(ckpt_path).with_suffix(".onnx"))
+
+
+def check_backend(name: Optional[str]) -> str:
+    name = (name or "torch").lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unsupported INFER_BACKEND: {name} (choose from {BACKENDS})")
+    return name
@@ -0,0 +1,225 @@
+# AIModel/batcher.py
+"""
+동시에 들어온 /predict 요청을 모아서 한 번의 forward로 처리하는 asyncio 마이크로 배처.
+
+- 최대 BATCH_MAX_SIZE개가 모이거나 BATCH_MAX_WAIT_MS가 지나면 배치를 실행
+  (size_fn을 주면 item 수 대신 item별 행 수 합(예: TTA view 수)으로 BATCH_MAX_SIZE를 셈)
+- 각 요청은 자기 결과(top-k dict)만 돌려받음
+- 배치 채움률(fill) 통계를 stats()로 제공 → /health에 노출
+- executor를 주면 batch_fn(forward)을 그 실행기에서 돌려 이벤트 루프를 막지 않음
+- 대기열이 max_queue를 넘으면 기다리지 않고 PoolSaturated를 던짐 (API에서 503)
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Optional
+
+from worker_pool import INFER_QUEUE_SIZE, PoolSaturated
+
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
+
+
+class BatchStats:
+    """배치 크기 분포와 평균 채움률, 대기 시간을 누적."""
+
+    def __init__(self, max_batch_size: int):
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.items = 0
+        self.wait_ms_sum = 0.0
+        self.run_ms_sum = 0.0
+        self.size_hist = [0] * (max_batch_size + 1)
+        self.last_size = 0
+
+    def record(self, size: int, wait_ms: float, run_ms: float):
+        self.batches += 1
+        self.items += size
+        self.wait_ms_sum += wait_ms
+        self.run_ms_sum += run_ms
+        self.size_hist[min(size, self.max_batch_size)] += 1
+        self.last_size = size
+
+    def snapshot(self) -> dict:
+        n = max(1, self.batches)
+        return {
+            "max_batch_size": self.max_batch_size,
+            "batches": self.batches,
+            "items": self.items,
+            "last_batch_size": self.last_size,
+            "avg_batch_size": round(self.items / n, 3),
+            "avg_fill": round(self.items / (n * self.max_batch_size), 3),
+            "avg_wait_ms": round(self.wait_ms_sum / n, 3),
+            "avg_run_ms": round(self.run_ms_sum / n, 3),
+            # {배치크기: 횟수} (0회는 생략)
+            "size_hist": {str(i): c for i, c in enumerate(self.size_hist) if c},
+        }
+
+
+class MicroBatcher:
+    """
+    batch_fn(items: list) -> list 를 감싸는 비동기 배처.
+    batch_fn은 입력과 같은 길이/순서의 결과 리스트를 반환해야 한다.
+    size_fn(item) -> int 는 item이 forward 배치에서 차지하는 행 수 (기본 1).
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = BATCH_MAX_SIZE,
+        max_wait_ms: float = BATCH_MAX_WAIT_MS,
+        executor: Optional[Executor] = None,
+        max_queue: int = INFER_QUEUE_SIZE,
+        size_fn: Optional[Callable[[Any], int]] = None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.batch_fn = batch_fn
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.executor = executor
+        self.max_queue = max(0, int(max_queue))  # 0이면 무제한
+        self.size_fn = size_fn
+        self._rejected = 0
+        self._stats = BatchStats(self.max_batch_size)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._carry = None  # 행 수가 넘쳐 다음 배치 맨 앞으로 미룬 요청
+
+    # --------------------------------------------------
+    # lifecycle
+    # --------------------------------------------------
+    def start(self):
+        """실행 중인 이벤트 루프 안에서 호출 (FastAPI startup 등)."""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._carry is not None and not self._carry[1].done():
+            self._carry[1].cancel()
+        self._carry = None
+
+    # --------------------------------------------------
+    # public API
+    # --------------------------------------------------
+    async def submit(self, item: Any) -> Any:
+        if self._queue is None:
+            raise RuntimeError("MicroBatcher is not started.")
+        fut = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((item, fut, time.perf_counter()))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            raise PoolSaturated(f"batch queue is full ({self.max_queue})") from None
+        return await fut
+
+    async def submit_many(self, items: List[Any]) -> List[Any]:
+        """
+        여러 item을 한꺼번에 대기열에 넣고 입력 순서대로 결과를 반환.
+        대기열에 전부 들어갈 자리가 없으면 하나도 넣지 않고 PoolSaturated.
+        (item별 실패는 예외 객체로 해당 위치에 담김)
+        """
+        if self._queue is None:
+            raise RuntimeError("MicroBatcher is not started.")
+        if self.max_queue and self._queue.qsize() + len(items) > self.max_queue:
+            self._rejected += 1
+            raise PoolSaturated(f"batch queue is full ({self.max_queue})")
+
+        loop = asyncio.get_running_loop()
+        now = time.perf_counter()
+        futs = []
+        for item in items:
+            fut = loop.create_future()
+            self._queue.put_nowait((item, fut, now))
+            futs.append(fut)
+        return await asyncio.gather(*futs, return_exceptions=True)
+
+    def stats(self) -> dict:
+        snap = self._stats.snapshot()
+        snap["max_wait_ms"] = self.max_wait * 1000.0
+        snap["queued"] = (self._queue.qsize() if self._queue is not None else 0) + (self._carry is not None)
+        snap["rejected"] = self._rejected
+        return snap
+
+    # --------------------------------------------------
+    # internals
+    # --------------------------------------------------
+    def _rows(self, item: Any) -> int:
+        return 1 if self.size_fn is None else max(1, int(self.size_fn(item)))
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        if self._carry is not None:
+            first, self._carry = self._carry, None
+        else:
+            first = await self._queue.get()
+        # 첫 요청은 행 수가 max_batch_size보다 커도 혼자 실행
+        batch = [first]
+        rows = self._rows(first[0])
+        deadline = loop.time() + self.max_wait
+
+        while rows < self.max_batch_size:
+            # 이미 대기 중인 요청은 기다리지 않고 바로 가져옴
+            if not self._queue.empty():
+                nxt = self._queue.get_nowait()
+            else:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    nxt = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            n = self._rows(nxt[0])
+            if rows + n > self.max_batch_size:
+                self._carry = nxt  # 순서 유지: 다음 배치의 첫 요청
+                break
+            batch.append(nxt)
+            rows += n
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+
+            # 클라이언트가 끊겨 취소된 요청은 제외
+            batch = [b for b in batch if not b[1].done()]
+            if not batch:
+                continue
+
+            items = [b[0] for b in batch]
+            t0 = time.perf_counter()
+            wait_ms = (t0 - min(b[2] for b in batch)) * 1000.0
+
+            try:
+                if self.executor is not None:
+                    loop = asyncio.get_running_loop()
+                    results = await loop.run_in_executor(self.executor, self.batch_fn, items)
+                else:
+                    results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"batch_fn returned {len(results)} results for {len(items)} items"
+                    )
+            except Exception as e:
+                for _, fut, _ in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            finally:
+                self._stats.record(sum(self._rows(i) for i in items), wait_ms, (time.perf_counter() - t0) * 1000.0)
+
+            for (_, fut, _), res in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(res)
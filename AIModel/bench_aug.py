@@ -0,0 +1,103 @@
+# AIModel/bench_aug.py
+"""
+학습 augmentation 처리량 비교: CPU(DataLoader 워커) vs 배치 텐서 연산(gpu_aug.GpuAugment).
+
+  cpu : train_gpu.py의 기존 transform (워커에서 샘플마다)
+  gpu : 워커는 base_transform(uint8 고정 크기)만 → 디바이스로 옮긴 뒤 GpuAugment
+        (CUDA가 없으면 같은 배치 연산을 CPU에서 실행 — 처리량 비교용)
+
+aug 모드(light/medium)별로 samples/s와, 분포가 같은지 확인용으로
+출력 텐서의 채널별 평균/표준편차를 함께 출력한다.
+
+사용:
+  python bench_aug.py --batches 20 --workers 4
+  python bench_aug.py --cache_dir splits/ccsn_cache --aug medium
+"""
+import argparse
+import time
+from pathlib import Path
+
+import torch
+from torch.utils.data import DataLoader
+
+from gpu_aug import AUG_MODES, GpuAugment, base_transform
+from preprocess import SkyCrop
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+
+def make_dataset(args, transform):
+    if args.cache_dir:
+        from dataset_cache import open_split
+        return open_split(args.cache_dir, "train", transform=transform)
+    from torchvision import datasets
+    return datasets.ImageFolder(Path(args.data_dir) / "train", transform=transform)
+
+
+def run(args, aug: str, mode: str, device: str) -> dict:
+    from train_gpu import train_transform
+
+    if mode == "cpu":
+        ds, gpu = make_dataset(args, train_transform(aug, args.img, SkyCrop(args.sky_crop))), None
+    else:
+        ds, gpu = make_dataset(args, base_transform(args.img, args.sky_crop)), GpuAugment(aug, args.img)
+
+    loader = DataLoader(ds, batch_size=args.batch, shuffle=True, drop_last=True,
+                        num_workers=args.workers, pin_memory=device.startswith("cuda"),
+                        persistent_workers=args.workers > 0)
+
+    n, s1, s2 = 0, torch.zeros(3, dtype=torch.float64), torch.zeros(3, dtype=torch.float64)
+    it = iter(loader)
+    next(it)  # 워커 기동 시간 제외
+    t0 = time.perf_counter()
+    for _ in range(args.batches):
+        try:
+            x, _ = next(it)
+        except StopIteration:
+            it = iter(loader)
+            x, _ = next(it)
+        x = x.to(device, non_blocking=True)
+        if gpu is not None:
+            x = gpu(x)
+        if device.startswith("cuda"):
+            torch.cuda.synchronize()
+        n += x.size(0)
+        s1 += x.double().mean(dim=(0, 2, 3)).cpu() * x.size(0)
+        s2 += x.double().pow(2).mean(dim=(0, 2, 3)).cpu() * x.size(0)
+    el = time.perf_counter() - t0
+
+    mean = s1 / n
+    std = (s2 / n - mean ** 2).clamp_min(0).sqrt()
+    return {"sps": n / el, "shape": tuple(x.shape[1:]), "mean": mean.tolist(), "std": std.tolist()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data_dir", type=str, default=str(PROJECT_DIR / "splits" / "ccsn_split"))
+    parser.add_argument("--cache_dir", type=str, default="")
+    parser.add_argument("--aug", nargs="+", default=list(AUG_MODES), choices=AUG_MODES)
+    parser.add_argument("--img", type=int, default=320)
+    parser.add_argument("--sky_crop", type=float, default=0.25)
+    parser.add_argument("--batch", type=int, default=96)
+    parser.add_argument("--batches", type=int, default=10, help="timed batches per run")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--device", type=str, default="cuda" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args()
+
+    print(f"📦 img={args.img} batch={args.batch} workers={args.workers} device={args.device} "
+          f"data={args.cache_dir or args.data_dir}")
+    keys = ["aug", "mode", "samples/s", "speedup", "shape", "mean(RGB)", "std(RGB)"]
+    print(" | ".join(f"{k:>12}" for k in keys))
+    for aug in args.aug:
+        base = None
+        for mode in ("cpu", "gpu"):
+            r = run(args, aug, mode, args.device)
+            base = base or r["sps"]
+            fmt = lambda v: "/".join(f"{a:.3f}" for a in v)  # noqa: E731
+            row = [aug, mode, f"{r['sps']:.1f}", f"{r['sps'] / base:.2f}x",
+                   "x".join(map(str, r["shape"])), fmt(r["mean"]), fmt(r["std"])]
+            print(" | ".join(f"{v:>12}" for v in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# AIModel/bench_backends.py
+"""
+추론 백엔드 비교: PyTorch eager / TorchScript(있으면) / ONNX Runtime(있으면).
+
+배치 크기별(기본 1, 8, 32) p50/p99 지연 시간과 처리량(images/s)을 출력하고
+outputs/backend_report_<stem>.csv 로 저장한다.
+산출물은 export_compiled.py / export_onnx.py로 미리 만들어 둔다.
+
+사용:
+  python bench_backends.py --ckpt outputs/cloud_model_best.pt --batch_sizes 1 8 32
+"""
+import argparse
+import csv
+from pathlib import Path
+
+import torch
+
+from backends import onnx_artifact_path
+from bench_utils import measure_latency
+from model_loader_HF import compiled_artifact_path, load_model_bundle
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+
+def load_backends(ckpt_path: str) -> list:
+    """[(이름, bundle)] — 산출물이 없거나 로드에 실패한 백엔드는 건너뜀."""
+    out = [("eager", load_model_bundle(ckpt_path, device="cpu"))]
+
+    ts = compiled_artifact_path(ckpt_path)
+    if Path(ts).exists():
+        b = load_model_bundle(ckpt_path, device="cpu", compiled_path=ts)
+        if b.backend == "torchscript":
+            out.append(("torchscript", b))
+    else:
+        print(f"[HaneulGyeol] skip torchscript (not found: {ts})")
+
+    onnx_path = onnx_artifact_path(ckpt_path)
+    if Path(onnx_path).exists():
+        b = load_model_bundle(ckpt_path, device="cpu", onnx_path=onnx_path)
+        if b.backend == "onnxruntime":
+            out.append(("onnxruntime", b))
+    else:
+        print(f"[HaneulGyeol] skip onnxruntime (not found: {onnx_path})")
+
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ckpt", type=str, default=str(PROJECT_DIR / "outputs" / "cloud_model_best.pt"))
+    parser.add_argument("--batch_sizes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--iters", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=0, help="torch threads (0 = default)")
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+
+    rows = []
+    for name, b in load_backends(args.ckpt):
+        for bs in args.batch_sizes:
+            x = torch.randn(bs, 3, b.img_size, b.img_size)
+            # 큰 배치는 반복 횟수를 줄여서 전체 시간을 비슷하게 유지
+            lat = measure_latency(b.model, x, iters=max(5, args.iters * 8 // max(bs, 8)))
+            rows.append({
+                "backend": name,
+                "arch": b.arch,
+                "batch": bs,
+                "p50_ms": round(lat["p50_ms"], 2),
+                "p99_ms": round(lat["p99_ms"], 2),
+                "img_per_s": round(bs * 1000.0 / lat["mean_ms"], 1),
+            })
+
+    keys = list(rows[0].keys())
+    print("\n" + " | ".join(f"{k:>12}" for k in keys))
+    for r in rows:
+        print(" | ".join(f"{str(r[k]):>12}" for k in keys))
+
+    out_path = PROJECT_DIR / "outputs" / f"backend_report_{Path(args.ckpt).stem}.csv"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=keys)
+        w.writeheader()
+        w.writerows(rows)
+    print(f"\n📌 saved report -> {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# AIModel/bench_decode.py
+"""
+업로드 디코딩 벤치마크: 전체 디코딩 vs JPEG draft(축소) 디코딩.
+
+  full  : Image.open(...).convert("RGB") → 전처리   (기존 api.py 방식)
+  draft : FusedPreprocess.decode(draft=True) → 전처리 (필요한 해상도까지만 디코딩)
+
+이미지 그룹(test_image = 대용량 휴대폰 사진, CCSN_v2 = 400px 데이터셋)별로
+1장당 시간, 디코딩된 픽셀 버퍼 크기, 그리고 모드별 별도 프로세스에서 측정한 peak RSS를 출력한다.
+
+사용:
+  python bench_decode.py --img 320 --n 200
+"""
+import argparse
+import io
+import multiprocessing as mp
+import random
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image
+
+PROJECT_DIR = Path(__file__).resolve().parent
+GROUPS = {
+    "test_image": PROJECT_DIR / "test_image",
+    "CCSN_v2": PROJECT_DIR / "CCSN_v2",
+}
+ALLOWED_EXT = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+
+def collect(n: int, seed: int = 42) -> dict:
+    out = {}
+    for name, d in GROUPS.items():
+        paths = [p for p in sorted(d.rglob("*")) if p.suffix.lower() in ALLOWED_EXT] if d.exists() else []
+        random.Random(seed).shuffle(paths)
+        if paths:
+            out[name] = [p.read_bytes() for p in paths[:n]]
+    return out
+
+
+def run_mode(mode: str, datas: list, img_size: int, repeat: int) -> dict:
+    from preprocess import get_preprocessor
+
+    pre = get_preprocessor(img_size)
+    times, pixels = [], []
+    for _ in range(repeat):
+        for data in datas:
+            t0 = time.perf_counter()
+            if mode == "full":
+                img = Image.open(io.BytesIO(data)).convert("RGB")
+            else:
+                img = pre.decode(data, draft=True)
+                img.load()
+            t1 = time.perf_counter()
+            pre(img)
+            t2 = time.perf_counter()
+            times.append(((t1 - t0) * 1000.0, (t2 - t0) * 1000.0))
+            pixels.append(img.size[0] * img.size[1])
+    return {
+        "decode_ms": statistics.fmean(t[0] for t in times),
+        "total_ms": statistics.fmean(t[1] for t in times),
+        "buffer_mb": statistics.fmean(pixels) * 3 / 1e6,
+    }
+
+
+def peak_rss_mb() -> float:
+    # Linux: VmHWM은 exec 이후 프로세스 기준 (ru_maxrss는 부모의 peak를 물려받음)
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # macOS: byte 단위, 그 외: KB 단위
+    scale = 1 / (1024 * 1024) if sys.platform == "darwin" else 1 / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _child(mode, datas, draft_size, q):
+    # 모드별로 깨끗한 프로세스에서 "디코딩만" 실행해 peak RSS를 비교
+    # (torch import가 peak를 덮어버리지 않도록 여기서는 PIL만 사용)
+    base = peak_rss_mb()
+    res = {}
+    for data in datas:
+        img = Image.open(io.BytesIO(data))
+        if mode == "draft" and img.format == "JPEG" and \
+                min(img.size[0] // draft_size[0], img.size[1] // draft_size[1]) >= 2:
+            img.draft("RGB", draft_size)
+        img = img.convert("RGB")
+        del img
+    res["peak_rss_delta_mb"] = peak_rss_mb() - base
+    q.put(res)
+
+
+def run_isolated(mode: str, datas: list, draft_size: tuple) -> dict:
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_child, args=(mode, datas, draft_size, q))
+    p.start()
+    res = q.get()
+    p.join()
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--img", type=int, default=320)
+    parser.add_argument("--n", type=int, default=200, help="max images per group")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from preprocess import get_preprocessor
+
+    groups = collect(args.n)
+    pre = get_preprocessor(args.img)
+    print(f"📦 img_size={args.img} | draft request={pre.draft_size()} | "
+          + ", ".join(f"{k}={len(v)}" for k, v in groups.items()))
+
+    print(f"\n{'group':<11} {'mode':<6} {'decode(ms)':>11} {'total(ms)':>10} {'buffer(MB)':>11} {'peakRSS(MB)':>12}")
+    for name, datas in groups.items():
+        base = None
+        for mode in ("full", "draft"):
+            r = run_mode(mode, datas, args.img, args.repeat)
+            r.update(run_isolated(mode, datas, pre.draft_size()))
+            base = base or r["total_ms"]
+            print(f"{name:<11} {mode:<6} {r['decode_ms']:>11.2f} {r['total_ms']:>10.2f} "
+                  f"{r['buffer_mb']:>11.2f} {r['peak_rss_delta_mb']:>12.1f}"
+                  + (f"   ({base / r['total_ms']:.2f}x)" if mode == "draft" else ""))
+
+        # draft가 결과를 얼마나 바꾸는지 (정규화 단위)
+        diffs = []
+        for data in datas[:50]:
+            a = pre(Image.open(io.BytesIO(data)).convert("RGB"))
+            b = pre.from_bytes(data, draft=True)
+            diffs.append((a - b).abs().mean().item())
+        print(f"{'':<11} mean |full - draft| = {statistics.fmean(diffs):.4f} (normalized units)")
+
+
+if __name__ == "__main__":
+    main()
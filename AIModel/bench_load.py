@@ -0,0 +1,357 @@
+# AIModel/bench_load.py
+"""
+서빙 부하 테스트: api.py를 동시성 단계별로 두드려서 처리량 / 지연 / 에러율을 측정.
+
+  --mode inproc  : 같은 프로세스에서 ASGI 앱을 직접 호출 (네트워크/uvicorn 오버헤드 제외)
+  --mode uvicorn : 로컬 uvicorn 서버를 띄우고 HTTP/1.1 keep-alive로 요청
+
+- 이미지: CCSN_v2(400px 데이터셋)와 test_image(대용량 휴대폰 사진)에서 --mix 비율로 섞어 뽑음
+- 체크포인트: --ckpt 로컬 파일 (LOCAL_MODEL_PATH로 전달 → HF 다운로드 없이 완전 오프라인)
+- 예측 캐시는 기본으로 끔 (같은 이미지 반복 → 캐시 히트만 재게 되므로). --cache로 켤 수 있음
+- 결과: outputs/load_report_<stem>_<mode>.json (키 정렬 → 커밋 간 diff 가능)
+        --baseline <이전 리포트>를 주면 단계별 변화율도 출력
+
+사용:
+  python bench_load.py --ckpt outputs/cloud_model_best.pt --concurrency 1 4 16 32 --requests 200
+  python bench_load.py --ckpt outputs/cloud_model_fast.pt --mode uvicorn --mix CCSN_v2=0.8 test_image=0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import List, Tuple
+
+PROJECT_DIR = Path(__file__).resolve().parent
+ALLOWED_EXT = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+DEFAULT_MIX = ("CCSN_v2=0.9", "test_image=0.1")
+
+
+# -----------------------
+# Workload
+# -----------------------
+def load_images(mix: List[str], n: int, seed: int = 42) -> List[Tuple[str, bytes]]:
+    """--mix "폴더=비율" 목록대로 n장을 뽑아 (파일명, 바이트)로 반환 (seed 고정 → 커밋 간 같은 워크로드)."""
+    rng = random.Random(seed)
+    groups, weights = [], []
+    for spec in mix:
+        name, _, w = spec.partition("=")
+        d = PROJECT_DIR / name
+        paths = [p for p in sorted(d.rglob("*")) if p.suffix.lower() in ALLOWED_EXT] if d.exists() else []
+        if not paths:
+            print(f"[HaneulGyeol] skip image group (no images): {d}")
+            continue
+        groups.append(paths)
+        weights.append(float(w or 1.0))
+    if not groups:
+        raise FileNotFoundError(f"No images found for mix: {mix}")
+
+    out = []
+    for _ in range(n):
+        p = rng.choice(rng.choices(groups, weights=weights)[0])
+        out.append((p.name, p.read_bytes()))
+    return out
+
+
+def multipart(filename: str, data: bytes, field: str = "file") -> Tuple[str, bytes]:
+    boundary = uuid.uuid4().hex
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    return f"multipart/form-data; boundary={boundary}", head + data + f"\r\n--{boundary}--\r\n".encode()
+
+
+# -----------------------
+# Clients
+# -----------------------
+class AsgiClient:
+    """ASGI 앱을 직접 호출하는 최소 클라이언트 (httpx 등 추가 의존성 없음)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, path: str, body: bytes = b"", content_type: str = "") -> Tuple[int, bytes]:
+        headers = [(b"host", b"bench")]
+        if body:
+            headers += [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())]
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": b"", "root_path": "", "headers": headers,
+            "client": ("127.0.0.1", 0), "server": ("bench", 80),
+        }
+        done = asyncio.Event()
+        sent_body = False
+        status, chunks = 0, []
+
+        async def receive():
+            nonlocal sent_body
+            if not sent_body:
+                sent_body = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    done.set()
+
+        await self.app(scope, receive, send)
+        return status, b"".join(chunks)
+
+    async def close(self):
+        pass
+
+
+class HttpClient:
+    """HTTP/1.1 keep-alive 연결 하나 (워커마다 하나씩)."""
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body: bytes = b"", content_type: str = "") -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nContent-Length: {len(body)}\r\n"
+        if content_type:
+            head += f"Content-Type: {content_type}\r\n"
+        self.writer.write(head.encode() + b"\r\n" + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            await self.close()
+            raise ConnectionError("server closed connection")
+        status = int(status_line.split()[1])
+        length, close = 0, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            k, _, v = line.decode("latin-1").partition(":")
+            if k.lower() == "content-length":
+                length = int(v)
+            elif k.lower() == "connection" and v.strip().lower() == "close":
+                close = True
+        data = await self.reader.readexactly(length) if length else b""
+        if close:
+            await self.close()
+        return status, data
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+# -----------------------
+# Load loop
+# -----------------------
+def percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(round(q * (len(sorted_vals) - 1))))]
+
+
+async def run_level(make_client, endpoint: str, images, concurrency: int, n_requests: int) -> dict:
+    """concurrency개 워커가 n_requests개 요청을 나눠서 보내고, 지연/상태 코드를 모음."""
+    field = "files" if endpoint.rstrip("/").endswith("_batch") else "file"
+    bodies = [multipart(name, data, field) for name, data in images]
+    next_i = 0
+    latencies, statuses = [], {}
+
+    async def worker():
+        nonlocal next_i
+        client = make_client()
+        try:
+            while next_i < n_requests:
+                i = next_i
+                next_i += 1
+                ct, body = bodies[i % len(bodies)]
+                t0 = time.perf_counter()
+                try:
+                    status, _ = await client.request("POST", endpoint, body, ct)
+                except Exception:
+                    status = 0  # 연결 실패 등
+                latencies.append((time.perf_counter() - t0) * 1000.0)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+        finally:
+            await client.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+
+    ok = statuses.get("200", 0)
+    lat = sorted(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": n_requests,
+        "ok": ok,
+        "errors": n_requests - ok,
+        "error_rate": round((n_requests - ok) / max(1, n_requests), 4),
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(ok / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(statistics.fmean(lat), 2) if lat else 0.0,
+        "p50_ms": round(percentile(lat, 0.50), 2),
+        "p95_ms": round(percentile(lat, 0.95), 2),
+        "p99_ms": round(percentile(lat, 0.99), 2),
+    }
+
+
+async def wait_ready(client, timeout_s: float) -> dict:
+    deadline = time.perf_counter() + timeout_s
+    while True:
+        try:
+            status, body = await client.request("GET", "/ready")
+            if status == 200:
+                return json.loads(body)
+        except (ConnectionError, OSError):
+            await client.close()
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"server not ready after {timeout_s}s")
+        await asyncio.sleep(0.2)
+
+
+async def sweep(make_client, args, images) -> List[dict]:
+    ready = await wait_ready(make_client(), args.ready_timeout)
+    print(f"📦 server ready | warmup={ready.get('warmup')} ({ready.get('warmup_s')}s)")
+
+    if args.warmup_requests:
+        await run_level(make_client, args.endpoint, images, 1, args.warmup_requests)
+
+    results = []
+    for c in args.concurrency:
+        r = await run_level(make_client, args.endpoint, images, c, args.requests)
+        print(f"✅ c={c:>3} | {r['throughput_rps']:>7.2f} req/s | p50={r['p50_ms']:.1f}ms "
+              f"p95={r['p95_ms']:.1f}ms p99={r['p99_ms']:.1f}ms | errors={r['error_rate']:.2%}")
+        results.append(r)
+    return results
+
+
+async def run_inproc(args, images) -> List[dict]:
+    import api  # env(LOCAL_MODEL_PATH 등)를 설정한 뒤에 import
+
+    async with api.app.router.lifespan_context(api.app):
+        return await sweep(lambda: AsgiClient(api.app), args, images)
+
+
+def run_uvicorn(args, images) -> List[dict]:
+    cmd = [sys.executable, "-m", "uvicorn", "api:app", "--host", "127.0.0.1",
+           "--port", str(args.port), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=PROJECT_DIR, env=os.environ.copy())
+    try:
+        return asyncio.run(sweep(lambda: HttpClient("127.0.0.1", args.port), args, images))
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+# -----------------------
+# Report
+# -----------------------
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_baseline_diff(results: List[dict], baseline_path: str):
+    base = {r["concurrency"]: r for r in json.loads(Path(baseline_path).read_text(encoding="utf-8"))["results"]}
+    print(f"\n🔎 vs baseline {baseline_path}")
+    for r in results:
+        b = base.get(r["concurrency"])
+        if b is None:
+            continue
+        parts = []
+        for k in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            delta = (r[k] - b[k]) / b[k] * 100 if b[k] else 0.0
+            parts.append(f"{k}={r[k]} ({delta:+.1f}%)")
+        print(f"  c={r['concurrency']:>3} | " + " | ".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ckpt", type=str, default=str(PROJECT_DIR / "outputs" / "cloud_model_best.pt"))
+    parser.add_argument("--mode", choices=("inproc", "uvicorn"), default="inproc")
+    parser.add_argument("--endpoint", type=str, default="/predict")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--warmup_requests", type=int, default=8)
+    parser.add_argument("--mix", nargs="+", default=list(DEFAULT_MIX), help="folder=weight (relative to AIModel/)")
+    parser.add_argument("--images", type=int, default=64, help="distinct images in the workload")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache", action="store_true", help="keep the prediction cache enabled")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ready_timeout", type=float, default=300.0)
+    parser.add_argument("--out", type=str, default="")
+    parser.add_argument("--baseline", type=str, default="", help="previous report to compare against")
+    args = parser.parse_args()
+
+    # ✅ 서버 설정은 환경변수로 (inproc은 import 전에, uvicorn은 자식 프로세스로 전달)
+    if not Path(args.ckpt).exists():
+        raise FileNotFoundError(f"Checkpoint not found: {args.ckpt}")
+    os.environ["LOCAL_MODEL_PATH"] = str(Path(args.ckpt).resolve())
+    if not args.cache:
+        os.environ["PRED_CACHE_SIZE"] = "0"
+        os.environ.pop("PRED_CACHE_DIR", None)
+
+    images = load_images(args.mix, args.images, seed=args.seed)
+    print(f"📦 workload: {len(images)} images, mix={args.mix}, "
+          f"avg={statistics.fmean(len(d) for _, d in images) / 1e3:.0f}KB")
+
+    if args.mode == "inproc":
+        results = asyncio.run(run_inproc(args, images))
+    else:
+        results = run_uvicorn(args, images)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "ckpt": Path(args.ckpt).name,
+            "mode": args.mode,
+            "endpoint": args.endpoint,
+            "mix": args.mix,
+            "images": args.images,
+            "seed": args.seed,
+            "cache": args.cache,
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            # 서버 동작에 영향을 주는 환경변수 (리포트끼리 비교할 때 확인용)
+            "env": {k: v for k, v in sorted(os.environ.items())
+                    if k.startswith(("BATCH_", "INFER_", "HF_QUANTIZE", "ORT_", "WARMUP"))},
+        },
+        "results": results,
+    }
+    out = Path(args.out) if args.out else PROJECT_DIR / "outputs" / f"load_report_{Path(args.ckpt).stem}_{args.mode}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    print(f"\n📌 saved report -> {out}")
+
+    if args.baseline:
+        print_baseline_diff(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
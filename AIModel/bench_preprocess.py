@@ -0,0 +1,112 @@
+# AIModel/bench_preprocess.py
+"""
+전처리 마이크로벤치마크 (이미지 1장당 비용).
+
+  before : 요청마다 Compose를 새로 만들고 convert("RGB") → Resize → CenterCrop → ToTensor → Normalize
+  cached : 같은 파이프라인을 레지스트리(get_transform)에서 재사용
+  fused  : get_preprocessor — resize(box=...) 한 번 + 단일 할당 정규화
+
+디코딩 비용은 세 방식이 같으므로 제외(이미지는 미리 decode 해 둠).
+
+사용:
+  python bench_preprocess.py --img 320 --n 200
+"""
+import argparse
+import random
+import statistics
+import time
+from pathlib import Path
+
+import torch
+from PIL import Image
+from torchvision import transforms
+
+from preprocess import get_preprocessor, get_transform
+
+PROJECT_DIR = Path(__file__).resolve().parent
+IMAGE_DIRS = [PROJECT_DIR / "test_image", PROJECT_DIR / "CCSN_v2"]
+ALLOWED_EXT = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+
+def collect_images(n: int, seed: int = 42) -> list:
+    paths = []
+    for d in IMAGE_DIRS:
+        if d.exists():
+            paths += [p for p in sorted(d.rglob("*")) if p.suffix.lower() in ALLOWED_EXT]
+    if not paths:
+        raise RuntimeError(f"No images found under {IMAGE_DIRS}")
+    # test_image(대용량 사진)는 항상 포함, 나머지는 샘플링
+    fixed = [p for p in paths if p.parent == IMAGE_DIRS[0]]
+    rest = [p for p in paths if p.parent != IMAGE_DIRS[0]]
+    random.Random(seed).shuffle(rest)
+    return fixed + rest[:max(0, n - len(fixed))]
+
+
+def build_before(img_size: int):
+    # 기존 predictor.build_transform (요청마다 생성)
+    return transforms.Compose([
+        transforms.Resize(int(img_size * 1.15)),
+        transforms.CenterCrop(img_size),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+    ])
+
+
+def bench(name: str, fn, images: list, repeat: int) -> dict:
+    fn(images[0])  # warmup
+    times = []
+    for _ in range(repeat):
+        for img in images:
+            t0 = time.perf_counter()
+            fn(img)
+            times.append((time.perf_counter() - t0) * 1000.0)
+    times.sort()
+    return {
+        "name": name,
+        "mean_ms": statistics.fmean(times),
+        "p50_ms": times[len(times) // 2],
+        "p95_ms": times[int(len(times) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--img", type=int, default=320)
+    parser.add_argument("--n", type=int, default=200, help="number of images")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=1, help="torch intra-op threads")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+
+    paths = collect_images(args.n)
+    images = []
+    for p in paths:
+        img = Image.open(p)
+        img.load()
+        images.append(img)
+    print(f"📦 {len(images)} images | img_size={args.img} | repeat={args.repeat}")
+
+    cached_tf = get_transform(args.img)
+    fused = get_preprocessor(args.img)
+
+    results = [
+        bench("before", lambda im: build_before(args.img)(im.convert("RGB")), images, args.repeat),
+        bench("cached", lambda im: cached_tf(im.convert("RGB")), images, args.repeat),
+        bench("fused", fused, images, args.repeat),
+    ]
+
+    # 결과가 실제로 같은지 확인 (리샘플링 반올림 수준의 차이만 허용)
+    ref = cached_tf(images[-1].convert("RGB"))
+    diff = (ref - fused(images[-1])).abs().max().item()
+
+    base = results[0]["mean_ms"]
+    print(f"\n{'path':<8} {'mean(ms)':>10} {'p50(ms)':>10} {'p95(ms)':>10} {'speedup':>8}")
+    for r in results:
+        print(f"{r['name']:<8} {r['mean_ms']:>10.3f} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} "
+              f"{base / r['mean_ms']:>7.2f}x")
+    print(f"\nmax |cached - fused| = {diff:.4f} (normalized units)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# AIModel/bench_startup.py
+"""
+서버 기동(콜드 스타트) 시간 분해 벤치마크.
+
+단계별로 새 프로세스에서 측정:
+  import      : torch + model_loader_HF (+ legacy는 torchvision / huggingface_hub까지)
+  download    : HF 다운로드 / 캐시 조회 (--ckpt를 주면 건너뜀)
+  hash        : 체크포인트 sha256 (모델 식별자; current는 HF 캐시 blob이면 파일을 읽지 않음)
+  deserialize : torch.load (legacy: 메타용 + 가중치용 2회, current: mmap 1회)
+  lazy_import : torchvision import (current는 eager 모델을 만들 때만, TorchScript/ONNX 백엔드는 불필요)
+  build       : torchvision 모델 생성 (legacy: 랜덤 초기화, current: meta 디바이스)
+  load_weights: load_state_dict (legacy: 복사, current: assign)
+  first_infer : 첫 forward (1장)
+
+  legacy  : 예전 model_loader_HF 방식 재현
+  current : 지금 load_model_bundle 경로
+
+사용:
+  python bench_startup.py                                  # HF에서 받은 체크포인트
+  python bench_startup.py --ckpt outputs/cloud_model_best.pt --repeat 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent
+MODES = ("legacy", "current")
+PHASES = ("import", "download", "hash", "deserialize", "lazy_import", "build", "load_weights", "first_infer")
+
+
+def _child(mode: str, ckpt_path: str):
+    """(별도 프로세스에서 실행) 단계별 시간(초)과 peak RSS를 JSON으로 출력."""
+    t = {}
+    t0 = time.perf_counter()
+    import torch
+
+    import model_loader_HF as ml
+    if mode == "legacy":
+        import huggingface_hub  # noqa: F401
+        import torchvision  # noqa: F401
+    t["import"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if not ckpt_path:
+        ckpt_path = ml.download_model_from_hf()
+    t["download"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if mode == "legacy":
+        # 예전: 로드할 때마다 파일 전체를 읽어 해시
+        import hashlib
+        with open(ckpt_path, "rb") as f:
+            hashlib.sha256(f.read()).hexdigest()
+    else:
+        # 지금: eager 로드는 해시하지 않고 model_id가 처음 필요할 때 한 번 (HF blob이면 파일 이름 = sha256)
+        ml.file_sha256(ckpt_path)
+    t["hash"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if mode == "legacy":
+        ckpt = torch.load(ckpt_path, map_location="cpu")  # 메타(classes/arch) 확인용
+        state_ckpt = torch.load(ckpt_path, map_location="cpu")  # load_checkpoint_to_model 안에서 다시
+    else:
+        ckpt = state_ckpt = ml.read_checkpoint(ckpt_path)
+    t["deserialize"] = time.perf_counter() - t0
+
+    num_classes = len(ckpt.get("classes", ml.CLOUD_CLASSES))
+    arch = str(ckpt.get("arch", "resnet18")).lower()
+    img_size = int(ckpt.get("img_size", 192 if "model" in ckpt else 320))
+    builder = ml.build_convnext_tiny if arch.startswith("convnext") else ml.build_resnet18
+
+    t0 = time.perf_counter()
+    import torchvision  # noqa: F401,F811  (legacy는 이미 import됨 → ~0)
+    t["lazy_import"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if mode == "legacy":
+        model = builder(num_classes)
+    else:
+        with torch.device("meta"):
+            model = builder(num_classes)
+    t["build"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    model, _ = ml.load_checkpoint_to_model(model, state_ckpt, assign=(mode != "legacy"))
+    model.eval()
+    t["load_weights"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with torch.inference_mode():
+        model(torch.randn(1, 3, img_size, img_size))
+    t["first_infer"] = time.perf_counter() - t0
+
+    from bench_decode import peak_rss_mb
+
+    print(json.dumps({"arch": arch, "phases": t, "peak_rss_mb": peak_rss_mb()}))
+
+
+def run_child(mode: str, ckpt_path: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, __file__, "--_child", mode, ckpt_path],
+        capture_output=True, text=True, check=True, cwd=PROJECT_DIR,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    if len(sys.argv) >= 3 and sys.argv[1] == "--_child":
+        _child(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else "")
+        return
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ckpt", type=str, default="", help="local checkpoint (default: download from HF)")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = []
+    for mode in args.modes:
+        runs = [run_child(mode, args.ckpt) for _ in range(args.repeat)]
+        row = {"mode": mode, "arch": runs[0]["arch"]}
+        for p in PHASES:
+            row[f"{p}_s"] = round(statistics.median(r["phases"][p] for r in runs), 3)
+        row["total_s"] = round(sum(row[f"{p}_s"] for p in PHASES), 3)
+        row["peak_rss_mb"] = round(statistics.median(r["peak_rss_mb"] for r in runs), 1)
+        rows.append(row)
+
+    keys = list(rows[0].keys())
+    print(" | ".join(f"{k:>15}" for k in keys))
+    for r in rows:
+        print(" | ".join(f"{str(r[k]):>15}" for k in keys))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# AIModel/bench_utils.py
+"""
+리포트/벤치마크 스크립트들이 같이 쓰는 도우미.
+
+- split_loader   : splits/ccsn_split/{train,val,test}를 추론용 transform으로 읽는 DataLoader
+- collect_logits : 모델(또는 logits를 돌려주는 callable)로 split 전체 logits/labels 수집
+- topk_accuracy  : logits에서 top-k 정확도
+- measure_latency: 고정 입력으로 반복 실행해 p50/p99 지연 시간
+- model_size_mb  : state_dict 직렬화 크기
+"""
+import io
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import torch
+from torch.utils.data import DataLoader, Subset
+from torchvision import datasets
+
+from preprocess import get_transform
+
+PROJECT_DIR = Path(__file__).resolve().parent
+DATA_DIR = PROJECT_DIR / "splits" / "ccsn_split"
+
+
+def split_loader(img_size: int, class_names: List[str], split: str = "test",
+                 batch_size: int = 32, max_images: Optional[int] = None,
+                 num_workers: int = 0, data_dir: Path = DATA_DIR) -> DataLoader:
+    """
+    ImageFolder의 클래스 인덱스(폴더 정렬 순)를 체크포인트의 class_names 순서로 맞춰서 반환.
+    max_images를 주면 split 전체에서 고르게 뽑은 부분집합만 사용.
+    """
+    split_dir = Path(data_dir) / split
+    if not split_dir.exists():
+        raise FileNotFoundError(f"Split not found: {split_dir} (run split_dataset_ccsn.py first)")
+
+    ds = datasets.ImageFolder(split_dir, transform=get_transform(img_size))
+    remap = {i: class_names.index(c) for i, c in enumerate(ds.classes)}
+    ds.target_transform = remap.__getitem__
+
+    if max_images and max_images < len(ds):
+        step = len(ds) / max_images
+        ds = Subset(ds, [int(i * step) for i in range(max_images)])
+
+    return DataLoader(ds, batch_size=batch_size, shuffle=False, num_workers=num_workers)
+
+
+@torch.no_grad()
+def collect_logits(model: Callable, loader: DataLoader, device: str = "cpu"):
+    """반환: (logits[N,C] float32 CPU, labels[N])"""
+    all_logits, all_labels = [], []
+    for x, y in loader:
+        logits = model(x.to(device))
+        all_logits.append(logits.float().cpu())
+        all_labels.append(y)
+    return torch.cat(all_logits), torch.cat(all_labels)
+
+
+def topk_accuracy(logits: torch.Tensor, labels: torch.Tensor, k: int = 1) -> float:
+    k = min(k, logits.size(1))
+    topk = logits.topk(k, dim=1).indices
+    return (topk == labels.view(-1, 1)).any(dim=1).float().mean().item()
+
+
+@torch.no_grad()
+def measure_latency(fn: Callable, x, iters: int = 20, warmup: int = 3) -> dict:
+    """fn(x)를 반복 실행해서 ms 단위 통계를 반환."""
+    for _ in range(warmup):
+        fn(x)
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+
+    times = []
+    for _ in range(iters):
+        t0 = time.perf_counter()
+        fn(x)
+        if torch.cuda.is_available():
+            torch.cuda.synchronize()
+        times.append((time.perf_counter() - t0) * 1000.0)
+
+    times.sort()
+    return {
+        "mean_ms": statistics.fmean(times),
+        "p50_ms": times[len(times) // 2],
+        "p99_ms": times[min(len(times) - 1, int(len(times) * 0.99))],
+    }
+
+
+def model_size_mb(model: torch.nn.Module) -> float:
+    buf = io.BytesIO()
+    torch.save(model.state_dict(), buf)
+    return buf.tell() / 1e6
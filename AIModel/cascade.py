@@ -0,0 +1,178 @@
+# AIModel/cascade.py
+"""
+2단계 추론 cascade: 빠른 모델이 먼저 답하고, 확신이 낮을 때만 무거운 모델.
+
+- 1단계: 빠른 모델 (예: train.py ResNet18 cloud_model_fast.pt, 192px) — 모든 이미지
+- 2단계: 서버 기본 모델 (get_model_bundle, 예: ConvNeXt-Tiny 320px)
+         — 1단계 점수가 CASCADE_THRESHOLD 미만인 이미지만 모아서 한 번 더 forward
+- 점수(CASCADE_SCORE): p1 (top-1 확률) 또는 margin (p1 - p2)
+  predictor.confidence_level과 같은 두 값이므로 임계값도 같은 감각으로 고를 수 있다.
+- 최종 확률은 항상 2단계 모델의 클래스 순서로 맞춤 (1단계 결과도 재배열)
+
+환경 변수 (CASCADE_FAST_FILENAME 또는 CASCADE_FAST_PATH가 있으면 켜짐):
+- CASCADE_FAST_FILENAME : 같은 HF 레포의 빠른 모델 파일 (예: cloud_model_fast.pt)
+- CASCADE_FAST_PATH     : 로컬 경로 (오프라인/테스트, FILENAME보다 우선)
+- CASCADE_THRESHOLD     : 기본 0.6 — tune_cascade.py가 val split 기준으로 골라줌
+- CASCADE_SCORE         : p1 (기본) / margin
+
+  CASCADE_FAST_FILENAME=cloud_model_fast.pt CASCADE_THRESHOLD=0.72 uvicorn api:app
+"""
+import os
+import time
+from typing import List, Optional, Tuple
+
+import torch
+import torch.nn.functional as F
+
+from predictor import build_result
+
+CASCADE_FAST_FILENAME = os.getenv("CASCADE_FAST_FILENAME", "")
+CASCADE_FAST_PATH = os.getenv("CASCADE_FAST_PATH", "")
+CASCADE_THRESHOLD = float(os.getenv("CASCADE_THRESHOLD", "0.6"))
+CASCADE_SCORE = os.getenv("CASCADE_SCORE", "p1").lower()
+
+SCORES = ("p1", "margin")
+
+
+def confidence_score(probs: torch.Tensor, score: str = "p1") -> torch.Tensor:
+    """(N,C) 확률 → (N,) 확신도. p1 = top-1 확률, margin = p1 - p2."""
+    if score not in SCORES:
+        raise ValueError(f"Unsupported CASCADE_SCORE: {score} (choose from {SCORES})")
+    top2 = probs.topk(min(2, probs.size(1)), dim=1).values
+    if score == "p1" or top2.size(1) < 2:
+        return top2[:, 0]
+    return top2[:, 0] - top2[:, 1]
+
+
+class Cascade:
+    """두 ModelBundle을 묶은 추론기. forward는 infer 스레드 하나에서만 호출된다는 전제 (통계 락 없음)."""
+
+    def __init__(self, fast, heavy, threshold: float = CASCADE_THRESHOLD, score: str = CASCADE_SCORE):
+        missing = [c for c in heavy.class_names if c not in fast.class_names]
+        if missing:
+            raise RuntimeError(f"cascade: classes missing from fast model: {missing}")
+        confidence_score(torch.ones(1, 2), score)  # 잘못된 score는 기동 시 바로 에러
+        self.fast = fast
+        self.heavy = heavy
+        self.threshold = float(threshold)
+        self.score = score
+        # 빠른 모델 출력 → 무거운 모델 클래스 순서
+        self.remap = torch.tensor([fast.class_names.index(c) for c in heavy.class_names])
+        self.counts = {"fast": 0, "heavy": 0}
+
+    @property
+    def img_sizes(self) -> Tuple[int, int]:
+        return self.fast.img_size, self.heavy.img_size
+
+    @property
+    def model_id(self) -> str:
+        # 임계값/점수가 바뀌면 결과도 바뀌므로 예측 캐시 키에 포함
+        return f"cascade-{self.fast.model_id}-{self.heavy.model_id}-{self.score}{self.threshold:g}"
+
+    @torch.no_grad()
+    def probs(self, x_fast: torch.Tensor, x_heavy: torch.Tensor,
+              timings: Optional[dict] = None) -> Tuple[torch.Tensor, torch.Tensor]:
+        """반환: (확률 (N,C) CPU, 무거운 모델이 답한 행 mask (N,))."""
+        t0 = _sync_time(self.fast.device)
+        probs = F.softmax(self.fast.model(x_fast.to(self.fast.device)).float(), dim=1).cpu()[:, self.remap]
+        escalate = confidence_score(probs, self.score) < self.threshold
+        t1 = _sync_time(self.fast.device)
+
+        if escalate.any():
+            xh = x_heavy[escalate].to(self.heavy.device)
+            probs[escalate] = F.softmax(self.heavy.model(xh).float(), dim=1).cpu()
+        t2 = _sync_time(self.heavy.device)
+
+        n_heavy = int(escalate.sum())
+        self.counts["heavy"] += n_heavy
+        self.counts["fast"] += len(probs) - n_heavy
+        if timings is not None:
+            timings["forward_fast"] = t1 - t0
+            timings["forward_heavy"] = t2 - t1
+        return probs, escalate
+
+    def stats(self) -> dict:
+        total = max(1, sum(self.counts.values()))
+        return {
+            "fast_model_id": self.fast.model_id,
+            "heavy_model_id": self.heavy.model_id,
+            "score": self.score,
+            "threshold": self.threshold,
+            "answered": dict(self.counts),
+            "escalation_rate": round(self.counts["heavy"] / total, 4),
+        }
+
+
+def _sync_time(device) -> float:
+    if str(device).startswith("cuda"):
+        torch.cuda.synchronize()
+    return time.perf_counter()
+
+
+def predict_batch_cascade(cascade: Cascade, meta: dict, items: List[Tuple[torch.Tensor, torch.Tensor]],
+                          topk: int = 3, timings: Optional[dict] = None) -> list:
+    """
+    predictor.predict_batch의 cascade 버전. items: preprocess_bytes_timed(data, cascade.img_sizes)의
+    (1,3,h,w) 텐서 쌍 목록. 결과 meta에 어느 모델이 답했는지(cascade_stage) 표시.
+    """
+    x_fast = torch.cat([x for x, _ in items])
+    x_heavy = torch.cat([x for _, x in items])
+    probs, escalate = cascade.probs(x_fast, x_heavy, timings)
+
+    t0 = time.perf_counter()
+    values, indices = probs.topk(topk, dim=1)
+    values, indices = values.tolist(), indices.tolist()
+    t1 = time.perf_counter()
+
+    fast_meta = {**meta, "img_size": cascade.fast.img_size, "arch": cascade.fast.arch}
+    results = []
+    for v, i, esc in zip(values, indices, escalate.tolist()):
+        r = build_result(meta if esc else fast_meta, v, i)
+        r["meta"]["cascade_stage"] = "heavy" if esc else "fast"
+        results.append(r)
+
+    if timings is not None:
+        timings["forward"] = timings["forward_fast"] + timings["forward_heavy"]
+        timings["topk"] = t1 - t0
+        timings["json"] = time.perf_counter() - t1
+    return results
+
+
+# -----------------------
+# Server singleton
+# -----------------------
+_cascade: Optional[Cascade] = None
+
+
+def cascade_enabled() -> bool:
+    return bool(CASCADE_FAST_PATH or CASCADE_FAST_FILENAME)
+
+
+def download_fast_model() -> str:
+    if CASCADE_FAST_PATH:
+        if not os.path.exists(CASCADE_FAST_PATH):
+            raise FileNotFoundError(f"CASCADE_FAST_PATH not found: {CASCADE_FAST_PATH}")
+        return CASCADE_FAST_PATH
+
+    from huggingface_hub import hf_hub_download
+
+    from model_loader_HF import HF_CACHE_DIR, HF_REPO_ID, HF_REVISION
+
+    return hf_hub_download(repo_id=HF_REPO_ID, filename=CASCADE_FAST_FILENAME,
+                           revision=HF_REVISION, cache_dir=HF_CACHE_DIR)
+
+
+def get_cascade() -> Optional[Cascade]:
+    """cascade가 꺼져 있으면 None. 2단계 모델은 get_model_bundle()과 같은 객체를 공유."""
+    global _cascade
+    if _cascade is not None or not cascade_enabled():
+        return _cascade
+
+    from model_loader_HF import get_model_bundle, load_model_bundle
+
+    heavy = get_model_bundle()
+    fast = load_model_bundle(download_fast_model(), device=heavy.device)
+    _cascade = Cascade(fast, heavy)
+    print(f"[HaneulGyeol] Cascade enabled | fast={fast.arch}@{fast.img_size} -> "
+          f"heavy={heavy.arch}@{heavy.img_size} when {_cascade.score} < {_cascade.threshold:g}")
+    return _cascade
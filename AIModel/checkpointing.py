@@ -0,0 +1,92 @@
+# AIModel/checkpointing.py
+"""
+학습 체크포인트 저장/복원 (train_gpu.py --resume).
+
+- atomic_save      : 임시 파일에 쓰고 os.replace → 저장 도중 죽어도 이전 파일이 깨지지 않음
+- AsyncCheckpointer: 텐서를 CPU로 복사(snapshot)만 학습 스레드에서 하고,
+                     직렬화/디스크 쓰기는 백그라운드 스레드에서 (한 번에 하나, 다음 저장 전에 이전 저장 완료 대기)
+- rng_state / set_rng_state : python / numpy / torch(CPU, CUDA) 난수 상태
+"""
+import os
+import random
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import torch
+
+
+def snapshot(obj, memo: Optional[dict] = None):
+    """
+    state_dict 등 중첩 구조의 텐서를 CPU 복사본으로 (이후 학습이 원본을 바꿔도 저장 내용은 고정).
+    memo: 같은 텐서를 여러 파일에 저장할 때 (last / best / resume) 한 번만 복사.
+    """
+    memo = {} if memo is None else memo
+    if isinstance(obj, torch.Tensor):
+        if id(obj) not in memo:
+            memo[id(obj)] = obj.detach().to("cpu", copy=True)
+        return memo[id(obj)]
+    if isinstance(obj, dict):
+        return {k: snapshot(v, memo) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(snapshot(v, memo) for v in obj)
+    return obj
+
+
+def atomic_save(obj, path):
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    torch.save(obj, tmp)
+    os.replace(tmp, path)
+
+
+class AsyncCheckpointer:
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    def _run(self, items):
+        try:
+            for obj, path in items:
+                atomic_save(obj, path)
+        except BaseException as e:  # 학습 스레드에서 다음 wait() 때 다시 던짐
+            self._error = e
+
+    def save(self, *items):
+        """save((obj, path), ...): snapshot 후 백그라운드에서 순서대로 저장."""
+        self.wait()
+        memo = {}
+        items = [(snapshot(obj, memo), path) for obj, path in items]
+        self._thread = threading.Thread(target=self._run, args=(items,), daemon=True)
+        self._thread.start()
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            err, self._error = self._error, None
+            raise err
+
+
+# -----------------------
+# RNG
+# -----------------------
+def rng_state() -> dict:
+    state = {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def set_rng_state(state: dict):
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
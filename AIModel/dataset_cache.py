@@ -0,0 +1,202 @@
+# AIModel/dataset_cache.py
+"""
+학습용 디코딩 캐시: splits/ccsn_split/{train,val,test} → uint8 샤드(memmap).
+
+ImageFolder는 에폭마다 모든 JPEG를 다시 디코딩/리사이즈하므로 CPU가 병목이 된다.
+한 번만 디코딩해서 짧은 변을 --short_side로 맞춘 RGB 픽셀을 샤드 파일에 이어 붙여 두고,
+학습 때는 memmap에서 복사 없이 Image.frombuffer로 바로 PIL 이미지를 만든다.
+(에폭 2..N에서 JPEG 디코딩 없음, 기존 torchvision transform은 그대로 사용)
+
+레이아웃 (<out>/<split>/):
+  meta.json          : classes, short_side, 샘플 수, 샤드 목록
+  index.npz          : shard, offset, height, width, label (샘플별)
+  shard_00000.u8 ... : HWC uint8 픽셀을 이어 붙인 raw 파일
+
+--short_side는 학습 Resize 크기 / (1 - sky_crop) 이상이어야 화질 손실이 없다
+(기본 400 = CCSN 원본 크기).
+
+사용:
+  python dataset_cache.py --data_dir splits/ccsn_split --out splits/ccsn_cache --short_side 400
+  python train_gpu.py --cache_dir splits/ccsn_cache
+"""
+import argparse
+import json
+import os
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+from torch.utils.data import Dataset
+
+PROJECT_DIR = Path(__file__).resolve().parent
+SPLITS = ("train", "val", "test")
+ALLOWED_EXT = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+CACHE_VERSION = 1
+
+
+# -----------------------
+# Build
+# -----------------------
+def scan_split(split_dir: Path):
+    """ImageFolder와 같은 규칙: 클래스 = 하위 폴더(정렬 순), 라벨 = 그 인덱스."""
+    classes = sorted(d.name for d in split_dir.iterdir() if d.is_dir())
+    samples = []
+    for label, c in enumerate(classes):
+        for p in sorted((split_dir / c).rglob("*")):
+            if p.suffix.lower() in ALLOWED_EXT:
+                samples.append((str(p), label))
+    return classes, samples
+
+
+def load_resized(args: Tuple[str, int]) -> np.ndarray:
+    """(워커 프로세스) 디코딩 → RGB → 짧은 변 short_side로 리사이즈 → HWC uint8."""
+    path, short_side = args
+    img = Image.open(path)
+    if img.format == "JPEG":
+        img.draft("RGB", (short_side, short_side))
+    img = img.convert("RGB")
+    w, h = img.size
+    scale = short_side / min(w, h)
+    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    if size != (w, h):
+        img = img.resize(size, Image.BILINEAR)
+    return np.asarray(img, dtype=np.uint8)
+
+
+def build_split(split_dir: Path, out_dir: Path, short_side: int = 400,
+                shard_mb: int = 256, workers: int = 0) -> dict:
+    classes, samples = scan_split(split_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for old in out_dir.glob("shard_*.u8"):
+        old.unlink()
+
+    n = len(samples)
+    shard_ids = np.zeros(n, dtype=np.int32)
+    offsets = np.zeros(n, dtype=np.int64)
+    heights = np.zeros(n, dtype=np.int32)
+    widths = np.zeros(n, dtype=np.int32)
+    labels = np.array([y for _, y in samples], dtype=np.int64)
+
+    shard_bytes = shard_mb * 1024 * 1024
+    shards = []
+    f, pos = None, 0
+
+    jobs = [(p, short_side) for p, _ in samples]
+    workers = workers or (os.cpu_count() or 1)
+    with Pool(workers) as pool:
+        for i, arr in enumerate(pool.imap(load_resized, jobs, chunksize=8)):
+            if f is None or pos + arr.nbytes > shard_bytes:
+                if f is not None:
+                    f.close()
+                shards.append(f"shard_{len(shards):05d}.u8")
+                f, pos = open(out_dir / shards[-1], "wb"), 0
+            f.write(arr.tobytes())
+            shard_ids[i], offsets[i] = len(shards) - 1, pos
+            heights[i], widths[i] = arr.shape[:2]
+            pos += arr.nbytes
+    if f is not None:
+        f.close()
+
+    np.savez(out_dir / "index.npz", shard=shard_ids, offset=offsets,
+             height=heights, width=widths, label=labels)
+    meta = {
+        "version": CACHE_VERSION,
+        "source": str(split_dir),
+        "classes": classes,
+        "short_side": short_side,
+        "num_samples": n,
+        "shards": shards,
+    }
+    (out_dir / "meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    return meta
+
+
+# -----------------------
+# Dataset
+# -----------------------
+class ShardedImageDataset(Dataset):
+    """
+    build_split 결과를 읽는 Dataset. ImageFolder 대신 그대로 끼워 쓸 수 있게
+    classes / samples / targets 속성과 (transform(img), label) 반환 형식을 맞춤.
+
+    memmap은 워커 프로세스마다 처음 접근할 때 연다 (pickle로 데이터가 복사되지 않도록).
+    """
+
+    def __init__(self, root, transform=None):
+        self.root = Path(root)
+        meta_path = self.root / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(f"Cache not found: {meta_path} (run dataset_cache.py first)")
+        self.meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if self.meta.get("version") != CACHE_VERSION:
+            raise RuntimeError(f"Cache version mismatch in {self.root} (rebuild with dataset_cache.py)")
+
+        idx = np.load(self.root / "index.npz")
+        self.shard = idx["shard"]
+        self.offset = idx["offset"]
+        self.height = idx["height"]
+        self.width = idx["width"]
+        self.targets = idx["label"].tolist()
+
+        self.classes = list(self.meta["classes"])
+        self.class_to_idx = {c: i for i, c in enumerate(self.classes)}
+        # ImageFolder 호환: (키, 라벨) — 클래스 개수/가중치 계산에 사용
+        self.samples = [(f"{self.root.name}/{i}", y) for i, y in enumerate(self.targets)]
+        self.transform = transform
+        self._maps: Optional[list] = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_maps"] = None
+        return state
+
+    def __len__(self):
+        return len(self.targets)
+
+    def _shard(self, i: int) -> np.memmap:
+        if self._maps is None:
+            self._maps = [np.memmap(self.root / s, dtype=np.uint8, mode="r") for s in self.meta["shards"]]
+        return self._maps[i]
+
+    def load_image(self, i: int) -> Image.Image:
+        h, w = int(self.height[i]), int(self.width[i])
+        off = int(self.offset[i])
+        buf = self._shard(int(self.shard[i]))[off:off + h * w * 3]
+        # 복사 없이 memmap 페이지를 그대로 참조하는 PIL 이미지
+        return Image.frombuffer("RGB", (w, h), buf, "raw", "RGB", 0, 1)
+
+    def __getitem__(self, i: int):
+        img = self.load_image(i)
+        if self.transform is not None:
+            img = self.transform(img)
+        return img, self.targets[i]
+
+
+def open_split(cache_dir, split: str, transform=None) -> ShardedImageDataset:
+    return ShardedImageDataset(Path(cache_dir) / split, transform=transform)
+
+
+# -----------------------
+# CLI
+# -----------------------
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data_dir", type=str, default=str(PROJECT_DIR / "splits" / "ccsn_split"))
+    parser.add_argument("--out", type=str, default=str(PROJECT_DIR / "splits" / "ccsn_cache"))
+    parser.add_argument("--splits", nargs="+", default=list(SPLITS))
+    parser.add_argument("--short_side", type=int, default=400)
+    parser.add_argument("--shard_mb", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=0, help="0 = cpu count")
+    args = parser.parse_args()
+
+    for split in args.splits:
+        meta = build_split(Path(args.data_dir) / split, Path(args.out) / split,
+                           short_side=args.short_side, shard_mb=args.shard_mb, workers=args.workers)
+        size_mb = sum((Path(args.out) / split / s).stat().st_size for s in meta["shards"]) / 1e6
+        print(f"✅ {split}: {meta['num_samples']} images -> {len(meta['shards'])} shard(s), {size_mb:.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# AIModel/ddp_utils.py
+"""
+train_gpu.py의 DistributedDataParallel 모드용 헬퍼.
+
+torchrun이 설정하는 WORLD_SIZE / RANK / LOCAL_RANK 환경 변수가 있으면 분산 모드,
+없으면 기존 단일 디바이스 그대로 (모든 함수가 world_size=1로 동작).
+CUDA가 있으면 nccl, 없으면 gloo (CPU에서 여러 프로세스로 테스트 가능).
+
+사용:
+  torchrun --nproc_per_node 2 train_gpu.py --batch 48            # 1노드 2GPU
+  torchrun --nnodes 2 --node_rank 0 --master_addr <host> --nproc_per_node 4 train_gpu.py
+  torchrun --nproc_per_node 2 train_gpu.py --batch 8 --epochs 1   # CPU/gloo 테스트
+"""
+import math
+import os
+from typing import Iterator, List, Sequence
+
+import torch
+import torch.distributed as dist
+from torch.utils.data import Sampler, Subset
+
+
+def setup_distributed():
+    """반환: (rank, world_size, local_rank). torchrun 밖에서는 (0, 1, 0)."""
+    world_size = int(os.getenv("WORLD_SIZE", "1"))
+    if world_size <= 1:
+        return 0, 1, 0
+    rank = int(os.environ["RANK"])
+    local_rank = int(os.getenv("LOCAL_RANK", "0"))
+    if torch.cuda.is_available():
+        torch.cuda.set_device(local_rank)
+        dist.init_process_group(backend="nccl")
+    else:
+        dist.init_process_group(backend="gloo")
+    return rank, world_size, local_rank
+
+
+def is_distributed() -> bool:
+    return dist.is_available() and dist.is_initialized()
+
+
+def barrier():
+    if is_distributed():
+        dist.barrier()
+
+
+def cleanup_distributed():
+    if is_distributed():
+        dist.destroy_process_group()
+
+
+def scaled_lr(base_lr: float, world_size: int, rule: str = "sqrt") -> float:
+    """
+    전역 배치가 world_size배가 되므로 lr도 키움.
+    linear: lr * world_size (SGD 기준 규칙) / sqrt: lr * sqrt(world_size) (AdamW에 무난) / none
+    """
+    if rule == "linear":
+        return base_lr * world_size
+    if rule == "sqrt":
+        return base_lr * math.sqrt(world_size)
+    return base_lr
+
+
+def shard_dataset(ds, rank: int, world_size: int):
+    """평가용: 겹치지 않게 rank::world_size로 나눔 (DistributedSampler처럼 패딩으로 중복시키지 않음)."""
+    if world_size <= 1:
+        return ds
+    return Subset(ds, range(rank, len(ds), world_size))
+
+
+class DistributedWeightedSampler(Sampler[int]):
+    """
+    WeightedRandomSampler(replacement=True)의 분산 버전.
+
+    모든 rank가 같은 시드(seed + epoch)로 전체 num_samples개를 한 번에 뽑고
+    rank::world_size로 나눠 가짐 → 합치면 단일 프로세스에서 한 번 뽑은 것과 같은 분포,
+    rank끼리 겹치지 않음. 에폭마다 set_epoch(epoch) 호출 필요.
+    """
+
+    def __init__(self, weights: Sequence[float], num_samples: int, rank: int = 0,
+                 world_size: int = 1, seed: int = 0):
+        self.weights = torch.as_tensor(weights, dtype=torch.double)
+        self.rank = rank
+        self.world_size = world_size
+        self.seed = seed
+        self.epoch = 0
+        # rank마다 같은 개수 (drop_last 배치 수가 rank마다 달라 DDP가 멈추는 일 방지)
+        self.num_samples = int(math.ceil(num_samples / world_size))
+        self.total_size = self.num_samples * world_size
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def __iter__(self) -> Iterator[int]:
+        g = torch.Generator()
+        g.manual_seed(self.seed + self.epoch)
+        idx: List[int] = torch.multinomial(self.weights, self.total_size, replacement=True, generator=g).tolist()
+        return iter(idx[self.rank:self.total_size:self.world_size])
+
+    def __len__(self) -> int:
+        return self.num_samples
+
+
+def silence_non_main(is_main: bool):
+    """rank 0만 print (tqdm은 disable=로 따로 끔)."""
+    if is_main:
+        return
+    import builtins
+    builtins.print = lambda *args, **kwargs: None
+
+
+def broadcast_state(model: torch.nn.Module, src: int = 0):
+    """rank src의 가중치를 모든 rank로 (체크포인트 파일이 rank 0 노드에만 있을 때)."""
+    if not is_distributed():
+        return
+    for t in model.state_dict().values():
+        dist.broadcast(t, src)
+
+
+def all_gather_object(obj) -> list:
+    """모든 rank의 obj 목록 (rank 순서). 분산이 아니면 [obj]."""
+    if not is_distributed():
+        return [obj]
+    out = [None] * dist.get_world_size()
+    dist.all_gather_object(out, obj)
+    return out
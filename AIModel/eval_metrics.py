@@ -0,0 +1,168 @@
+# AIModel/eval_metrics.py
+"""
+학습/평가 공용 지표 누적기 (train.py, train_gpu.py, 평가 스크립트).
+
+기존: 배치마다 topk_acc(...).item() / loss.item() → 스텝마다 디바이스 동기화,
+      confusion_matrix는 예측-정답 쌍마다 파이썬 루프.
+변경: 모든 누적을 디바이스 텐서 연산으로 (confusion matrix는 index_add_ 한 번 — bincount는 CUDA에서 동기화),
+      compute()에서 에폭당 한 번만 CPU로 가져와 top-1/top-k, 클래스별 precision/recall/F1, 평균 loss 계산.
+      DDP(torch.distributed 초기화 상태)에서는 compute()가 모든 rank의 누적값을 all_reduce로 합친다.
+
+사용:
+  meter = MetricMeter(num_classes, device)
+  for x, y in loader:
+      logits = model(x)
+      meter.update(logits, y, loss)
+  m = meter.compute()   # {"loss", "top1", "top3", "macro_f1", "per_class", "confusion", ...}
+"""
+import csv
+from typing import Dict, List, Optional, Sequence
+
+import torch
+import torch.distributed as dist
+
+
+class MetricMeter:
+    """logits/정답/loss를 디바이스에 누적. update()는 동기화를 일으키지 않는다."""
+
+    def __init__(self, num_classes: int, device="cpu", topk: Sequence[int] = (1, 3)):
+        self.num_classes = int(num_classes)
+        self.device = torch.device(device)
+        self.topk = tuple(topk)
+        self.reset()
+
+    def reset(self):
+        c = self.num_classes
+        self.cm = torch.zeros(c * c, dtype=torch.int64, device=self.device)
+        self.topk_hits = torch.zeros(len(self.topk), dtype=torch.int64, device=self.device)
+        self.loss_sum = torch.zeros((), dtype=torch.float64, device=self.device)
+        self.loss_count = torch.zeros((), dtype=torch.int64, device=self.device)
+        self.count = torch.zeros((), dtype=torch.int64, device=self.device)
+        # top-k hit 누적표에서 k번째 열 (update마다 H2D 복사하지 않도록 한 번만)
+        self.kmax = min(max(self.topk), c)
+        self.topk_cols = torch.tensor([min(k, self.kmax) - 1 for k in self.topk], device=self.device)
+
+    @torch.no_grad()
+    def update_loss(self, loss: torch.Tensor, n: int):
+        """배치 평균 loss를 샘플 수로 가중해 누적 (mixup 학습처럼 정확도가 의미 없을 때 단독 사용)."""
+        self.loss_sum += loss.detach().double() * n
+        self.loss_count += n
+
+    @torch.no_grad()
+    def update(self, logits: torch.Tensor, y: torch.Tensor, loss: Optional[torch.Tensor] = None):
+        logits = logits.detach()
+        y = y.detach().to(self.device)
+        c = self.num_classes
+
+        # confusion matrix: 행 = 정답, 열 = 예측
+        pred = logits.argmax(dim=1)
+        # (bincount는 출력 크기를 정하려고 max().item()을 부르므로 CUDA에서 스텝마다 동기화됨)
+        self.cm.index_add_(0, y * c + pred, torch.ones_like(pred))
+
+        # top-k: 한 번의 topk로 모든 k 처리 (누적 hit → k번째 열)
+        hit = (logits.topk(self.kmax, dim=1).indices == y.view(-1, 1)).cumsum(dim=1).clamp_(max=1)
+        self.topk_hits += hit.index_select(1, self.topk_cols).sum(dim=0)
+
+        self.count += y.numel()
+        if loss is not None:
+            self.update_loss(loss, y.numel())
+
+    def _reduced(self) -> List[torch.Tensor]:
+        """(DDP) 모든 rank의 누적값 합계. 원본은 건드리지 않으므로 compute()를 여러 번 불러도 됨."""
+        state = [self.cm, self.topk_hits, self.loss_sum, self.loss_count, self.count]
+        if not (dist.is_available() and dist.is_initialized()):
+            return state
+        state = [t.clone() for t in state]
+        for t in state:
+            dist.all_reduce(t)
+        return state
+
+    def compute(self) -> Dict:
+        """에폭 끝에 한 번 호출: 여기서만 디바이스 → CPU 동기화 (DDP면 rank 간 합산 포함)."""
+        c = self.num_classes
+        cm, hits, loss_sum, loss_n, n = self._reduced()
+        cm = cm.view(c, c).cpu()
+        hits = hits.cpu().tolist()
+        n = int(n.item())
+        loss_n = int(loss_n.item())
+        loss = float(loss_sum.item()) / max(1, loss_n) if loss_n else float("nan")
+
+        tp = cm.diag().double()
+        support = cm.sum(dim=1).double()     # 정답 기준
+        predicted = cm.sum(dim=0).double()   # 예측 기준
+        precision = torch.where(predicted > 0, tp / predicted.clamp_min(1), torch.zeros_like(tp))
+        recall = torch.where(support > 0, tp / support.clamp_min(1), torch.zeros_like(tp))
+        denom = precision + recall
+        f1 = torch.where(denom > 0, 2 * precision * recall / denom.clamp_min(1e-12), torch.zeros_like(tp))
+        present = support > 0
+
+        out = {
+            "count": n,
+            "loss": loss,
+            "confusion": cm.numpy(),
+            "per_class": {
+                "precision": precision.tolist(),
+                "recall": recall.tolist(),
+                "f1": f1.tolist(),
+                "support": support.long().tolist(),
+            },
+            "macro_f1": float(f1[present].mean()) if present.any() else 0.0,
+        }
+        for k, h in zip(self.topk, hits):
+            out[f"top{k}"] = h / max(1, n)
+        return out
+
+
+# -----------------------
+# Reporting
+# -----------------------
+def format_report(metrics: Dict, classes: List[str]) -> str:
+    pc = metrics["per_class"]
+    lines = [f"{'class':>5} | {'prec':>6} | {'recall':>6} | {'f1':>6} | {'n':>5}"]
+    for i, c in enumerate(classes):
+        lines.append(f"{c:>5} | {pc['precision'][i]:>6.3f} | {pc['recall'][i]:>6.3f} | "
+                     f"{pc['f1'][i]:>6.3f} | {pc['support'][i]:>5}")
+    lines.append(f"{'macro':>5} | {'':>6} | {'':>6} | {metrics['macro_f1']:>6.3f} | {metrics['count']:>5}")
+    return "\n".join(lines)
+
+
+def write_confusion_csv(path, cm, classes: List[str]):
+    """plot_confusion_matrix.py가 읽는 형식: 첫 행 true\\pred + 클래스, 이후 행마다 정답 클래스."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["true\\pred"] + list(classes))
+        for i, row in enumerate(cm):
+            w.writerow([classes[i]] + [int(v) for v in row])
+
+
+# -----------------------
+# Calibration
+# -----------------------
+@torch.no_grad()
+def calibration_stats(logits: torch.Tensor, y: torch.Tensor, n_bins: int = 15) -> Dict:
+    """
+    ECE/MCE (confidence를 n_bins 구간으로 나눠 |정확도 - 평균 confidence|의 가중 평균/최대),
+    NLL, Brier score, 평균 confidence. 전체 logits를 한 번에 받아 마지막에 한 번만 동기화.
+    """
+    logits = logits.detach().float()
+    y = y.to(logits.device)
+    logp = torch.log_softmax(logits, dim=1)
+    probs = logp.exp()
+    conf, pred = probs.max(dim=1)
+    correct = (pred == y).double()
+
+    bins = (conf * n_bins).long().clamp_(max=n_bins - 1)
+    count = torch.bincount(bins, minlength=n_bins).double()
+    acc_sum = torch.bincount(bins, weights=correct, minlength=n_bins)
+    conf_sum = torch.bincount(bins, weights=conf.double(), minlength=n_bins)
+    gap = (acc_sum - conf_sum).abs() / count.clamp_min(1)
+
+    onehot = torch.nn.functional.one_hot(y, probs.size(1)).to(probs.dtype)
+    stats = torch.stack([
+        (gap * count).sum() / max(1, y.numel()),
+        gap.max(),
+        -logp.gather(1, y.view(-1, 1)).double().mean(),
+        (probs - onehot).pow(2).sum(dim=1).double().mean(),
+        conf.double().mean(),
+    ]).cpu().tolist()
+    return dict(zip(("ece", "mce", "nll", "brier", "mean_conf"), stats))
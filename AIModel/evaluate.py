@@ -0,0 +1,187 @@
+# AIModel/evaluate.py
+"""
+체크포인트 평가 (여러 개를 한 번에).
+
+train_gpu.py 끝부분을 다시 돌리거나 predict.py로 한 장씩 돌리는 대신:
+- 체크포인트는 load_model_bundle로 로드 (서버와 같은 형식 자동 판별: model_state / model / state_dict ...)
+- test split은 한 번만 디코딩해서 모든 모델이 공유
+  (img_size가 다른 모델이 섞여 있으면 크기별로 전처리 텐서를 한 번씩만 만듦)
+- 배치 추론 → eval_metrics.MetricMeter로 top-1/top-3, 클래스별 P/R/F1
+- 모델마다 confusion matrix CSV (plot_confusion_matrix.py 형식) + calibration (ECE/NLL/Brier) + 처리량
+- 요약은 표로 출력하고 outputs/eval_report.csv에 저장
+
+전처리는 서버와 같은 fused 전처리 (--sky_crop 기본 0 = API와 동일, train_gpu.py 테스트와 맞추려면 0.25).
+
+사용:
+  python evaluate.py outputs/cloud_model_best.pt outputs/cloud_model_fast.pt
+  python evaluate.py outputs/*.pt --cache_dir splits/ccsn_cache --batch_size 64
+  python evaluate.py outputs/cloud_model_best.pt --backend onnxruntime
+"""
+import argparse
+import csv
+import os
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import torch
+
+from eval_metrics import MetricMeter, calibration_stats, format_report, write_confusion_csv
+from preprocess import get_preprocessor
+
+PROJECT_DIR = Path(__file__).resolve().parent
+BACKENDS = ("eager", "torchscript", "onnxruntime")
+
+
+# -----------------------
+# Data (한 번만 디코딩)
+# -----------------------
+def load_split_images(args, max_img_size: int):
+    """(classes, labels, PIL 이미지 목록). 캐시가 있으면 디코딩 없이 memmap에서 바로."""
+    if args.cache_dir:
+        from dataset_cache import open_split
+        ds = open_split(args.cache_dir, args.split)
+        return ds.classes, list(ds.targets), [ds.load_image(i) for i in range(len(ds))]
+
+    from dataset_cache import scan_split
+    classes, samples = scan_split(Path(args.data_dir) / args.split)
+    # 가장 큰 입력 크기 기준으로 JPEG draft 디코딩 (작은 모델도 같은 이미지를 그대로 사용)
+    pre = get_preprocessor(max_img_size, args.sky_crop)
+    images = []
+    for path, _ in samples:
+        with open(path, "rb") as f:
+            img = pre.decode(f.read()).convert("RGB")
+        images.append(img)
+    return classes, [y for _, y in samples], images
+
+
+class SharedInputs:
+    """img_size별 전처리 결과 텐서를 한 번만 만들어 여러 모델이 공유."""
+
+    def __init__(self, images, sky_crop: float):
+        self.images = images
+        self.sky_crop = sky_crop
+        self._cache: Dict[int, torch.Tensor] = {}
+
+    def get(self, img_size: int) -> torch.Tensor:
+        if img_size not in self._cache:
+            pre = get_preprocessor(img_size, self.sky_crop)
+            self._cache[img_size] = torch.stack([pre(img) for img in self.images])
+        return self._cache[img_size]
+
+
+# -----------------------
+# Evaluation
+# -----------------------
+def load_bundle(ckpt: str, backend: str, device):
+    from backends import onnx_artifact_path
+    from model_loader_HF import compiled_artifact_path, load_model_bundle
+
+    kwargs = {}
+    if backend == "onnxruntime":
+        kwargs["onnx_path"] = onnx_artifact_path(ckpt)
+    elif backend == "torchscript":
+        kwargs["compiled_path"] = compiled_artifact_path(ckpt)
+    for p in kwargs.values():
+        if not os.path.exists(p):
+            print(f"[HaneulGyeol] {backend} artifact not found: {p} -> eager")
+    return load_model_bundle(ckpt, device=device, **kwargs)
+
+
+def evaluate_model(b, x_all: torch.Tensor, labels: torch.Tensor, ds_classes: List[str],
+                   batch_size: int, n_bins: int) -> Dict:
+    # 데이터셋 라벨(폴더 순서) → 모델 출력 인덱스(체크포인트 classes 순서)
+    missing = [c for c in ds_classes if c not in b.class_names]
+    if missing:
+        raise RuntimeError(f"classes not in checkpoint: {missing}")
+    remap = torch.tensor([b.class_names.index(c) for c in ds_classes])
+    y_all = remap[labels]
+
+    device = b.device
+    use_cuda = str(device).startswith("cuda")
+    meter = MetricMeter(len(b.class_names), device)
+    outs = []
+
+    with torch.inference_mode():
+        b.model(x_all[:batch_size].to(device))  # warm-up (처리량 측정에서 제외)
+        if use_cuda:
+            torch.cuda.synchronize()
+        t0 = time.perf_counter()
+        for i in range(0, len(x_all), batch_size):
+            x = x_all[i:i + batch_size].to(device, non_blocking=True)
+            y = y_all[i:i + batch_size].to(device, non_blocking=True)
+            logits = b.model(x).float()
+            meter.update(logits, y)
+            outs.append(logits)
+        if use_cuda:
+            torch.cuda.synchronize()
+        el = time.perf_counter() - t0
+
+    m = meter.compute()
+    m.update(calibration_stats(torch.cat(outs), y_all.to(device), n_bins=n_bins))
+    m["images_per_s"] = len(x_all) / max(el, 1e-9)
+    m["ms_per_batch"] = el * 1000.0 / max(1, -(-len(x_all) // batch_size))
+    return m
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("ckpts", nargs="+", help="checkpoint .pt files")
+    parser.add_argument("--data_dir", type=str, default=str(PROJECT_DIR / "splits" / "ccsn_split"))
+    parser.add_argument("--cache_dir", type=str, default="", help="use dataset_cache.py shards instead of JPEGs")
+    parser.add_argument("--split", type=str, default="test")
+    parser.add_argument("--sky_crop", type=float, default=0.0)
+    parser.add_argument("--batch_size", type=int, default=64)
+    parser.add_argument("--device", type=str, default=None)
+    parser.add_argument("--backend", type=str, default="eager", choices=BACKENDS,
+                        help="use the exported artifact next to each checkpoint if present")
+    parser.add_argument("--bins", type=int, default=15, help="ECE bins")
+    parser.add_argument("--out_dir", type=str, default=str(PROJECT_DIR / "outputs"))
+    args = parser.parse_args()
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    bundles = [(ckpt, load_bundle(ckpt, args.backend, args.device)) for ckpt in args.ckpts]
+
+    t0 = time.perf_counter()
+    ds_classes, labels, images = load_split_images(args, max(b.img_size for _, b in bundles))
+    inputs = SharedInputs(images, args.sky_crop)
+    labels = torch.tensor(labels, dtype=torch.int64)
+    print(f"📦 {args.split}: {len(images)} images, {len(ds_classes)} classes "
+          f"(decoded once in {time.perf_counter() - t0:.1f}s)")
+
+    rows = []
+    for ckpt, b in bundles:
+        name = Path(ckpt).stem
+        m = evaluate_model(b, inputs.get(b.img_size), labels, ds_classes, args.batch_size, args.bins)
+
+        cm_path = out_dir / f"confusion_matrix_{name}.csv"
+        write_confusion_csv(cm_path, m["confusion"], b.class_names)
+
+        print(f"\n=== {name} | arch={b.arch} img={b.img_size} backend={b.backend} device={b.device} ===")
+        print(format_report(m, b.class_names))
+        print(f"📌 saved confusion matrix -> {cm_path}")
+
+        rows.append({
+            "model": name, "arch": b.arch, "img": b.img_size, "backend": b.backend,
+            "top1": m["top1"], "top3": m["top3"], "macro_f1": m["macro_f1"],
+            "ece": m["ece"], "nll": m["nll"], "brier": m["brier"], "mean_conf": m["mean_conf"],
+            "img/s": m["images_per_s"], "ms/batch": m["ms_per_batch"],
+        })
+
+    keys = list(rows[0].keys())
+    print("\n" + " | ".join(f"{k:>10}" for k in keys))
+    for r in rows:
+        print(" | ".join(f"{r[k]:>10.4f}" if isinstance(r[k], float) else f"{str(r[k])[:10]:>10}" for k in keys))
+
+    report = out_dir / "eval_report.csv"
+    with open(report, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=keys)
+        w.writeheader()
+        w.writerows(rows)
+    print(f"\n✅ saved report -> {report}")
+
+
+if __name__ == "__main__":
+    main()
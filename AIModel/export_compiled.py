@@ -0,0 +1,155 @@
+# AIModel/export_compiled.py
+"""
+학습된 체크포인트 → TorchScript(trace + freeze) 컴파일 모델(.torchscript.pt) 빌드.
+
+- 결과물은 기본적으로 체크포인트 옆 <stem>.torchscript.pt 로 저장되고,
+  model_loader_HF.load_model_bundle은 이 파일이 있으면 eager 대신 우선 사용한다.
+  (HF에 올릴 경우 HF_COMPILED_FILENAME으로 파일명을 지정)
+- 파일 안에 meta.json(classes/arch/img_size/run_name/ckpt_sha256)을 같이 넣어
+  로더가 torchvision 모델을 만들지 않고도 번들을 구성할 수 있게 함
+- 빌드 후 test split에서 eager와 logits를 비교해 수치 검증 (--atol 초과 시 실패)
+- --bench: eager vs compiled 콜드 스타트(별도 프로세스) / 정상 상태 지연 시간
+
+사용:
+  python export_compiled.py --ckpt outputs/cloud_model_best.pt outputs/cloud_model_fast.pt --bench
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import torch
+
+from model_loader_HF import compiled_artifact_path, load_model_bundle
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+
+def export_torchscript(ckpt_path: str, out_path: str = None) -> str:
+    b = load_model_bundle(ckpt_path, device="cpu", precision="fp32", channels_last=False)
+    out_path = out_path or compiled_artifact_path(ckpt_path)
+
+    example = torch.randn(1, 3, b.img_size, b.img_size)
+    with torch.no_grad():
+        traced = torch.jit.trace(b.model, example)
+        frozen = torch.jit.freeze(traced)
+
+    meta = {
+        "classes": b.class_names,
+        "arch": b.arch,
+        "img_size": b.img_size,
+        "run_name": Path(ckpt_path).stem,
+        "ckpt_sha256": b.checkpoint_sha256(),
+    }
+    torch.jit.save(frozen, out_path, _extra_files={"meta.json": json.dumps(meta)})
+    print(f"✅ saved compiled model -> {out_path}")
+    return out_path
+
+
+def validate(ckpt_path: str, compiled_path: str, max_test: int = 0, atol: float = 1e-3) -> dict:
+    """eager vs compiled logits 비교. test split이 없으면 랜덤 입력으로 대신 확인."""
+    from bench_utils import collect_logits, split_loader
+
+    eager = load_model_bundle(ckpt_path, device="cpu", precision="fp32", channels_last=False)
+    comp = load_model_bundle(ckpt_path, device="cpu", compiled_path=compiled_path)
+    if comp.backend != "torchscript":
+        raise RuntimeError(f"compiled model was not used: {compiled_path}")
+
+    try:
+        loader = split_loader(eager.img_size, eager.class_names, split="test",
+                              max_images=max_test or None)
+        a, labels = collect_logits(eager.model, loader)
+        c, _ = collect_logits(comp.model, loader)
+        source = f"test split ({len(labels)} images)"
+    except FileNotFoundError:
+        x = torch.randn(16, 3, eager.img_size, eager.img_size)
+        with torch.no_grad():
+            a, c = eager.model(x), comp.model(x)
+        source = "random inputs (test split not found)"
+
+    res = {
+        "source": source,
+        "max_abs_diff": (a - c).abs().max().item(),
+        "top1_agree": (a.argmax(1) == c.argmax(1)).float().mean().item(),
+    }
+    res["ok"] = res["max_abs_diff"] <= atol
+    return res
+
+
+def _cold_start(ckpt_path: str, compiled_path: str):
+    """(별도 프로세스에서 실행) 로드 + 첫 추론까지 걸린 시간을 JSON으로 출력."""
+    t0 = time.perf_counter()
+    b = load_model_bundle(ckpt_path, device="cpu", compiled_path=compiled_path or None)
+    t1 = time.perf_counter()
+    with torch.no_grad():
+        b.model(torch.randn(1, 3, b.img_size, b.img_size))
+    t2 = time.perf_counter()
+    print(json.dumps({"backend": b.backend, "load_s": t1 - t0, "first_infer_s": t2 - t1}))
+
+
+def cold_start(ckpt_path: str, compiled_path: str = "") -> dict:
+    out = subprocess.run(
+        [sys.executable, __file__, "--_cold", ckpt_path, compiled_path],
+        capture_output=True, text=True, check=True, cwd=PROJECT_DIR,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def bench(ckpt_path: str, compiled_path: str, iters: int = 20) -> list:
+    from bench_utils import measure_latency
+
+    rows = []
+    for name, path in (("eager", ""), ("torchscript", compiled_path)):
+        cold = cold_start(ckpt_path, path)
+        b = load_model_bundle(ckpt_path, device="cpu", compiled_path=path or None)
+        row = {"backend": name, "arch": b.arch,
+               "cold_load_s": round(cold["load_s"], 3),
+               "cold_first_infer_s": round(cold["first_infer_s"], 3)}
+        for bs in (1, 8):
+            lat = measure_latency(b.model, torch.randn(bs, 3, b.img_size, b.img_size), iters=iters)
+            row[f"b{bs}_p50_ms"] = round(lat["p50_ms"], 2)
+        rows.append(row)
+    return rows
+
+
+def main():
+    if len(sys.argv) >= 2 and sys.argv[1] == "--_cold":
+        _cold_start(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else "")
+        return
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ckpt", nargs="+", default=[str(PROJECT_DIR / "outputs" / "cloud_model_best.pt")])
+    parser.add_argument("--max_test", type=int, default=0, help="0 = whole test split")
+    parser.add_argument("--atol", type=float, default=1e-3)
+    parser.add_argument("--bench", action="store_true")
+    parser.add_argument("--iters", type=int, default=20)
+    args = parser.parse_args()
+
+    failed = False
+    rows = []
+    for ckpt in args.ckpt:
+        out = export_torchscript(ckpt)
+        v = validate(ckpt, out, max_test=args.max_test, atol=args.atol)
+        status = "OK" if v["ok"] else "FAIL"
+        print(f"🔎 [{status}] {Path(ckpt).name}: max|eager-compiled|={v['max_abs_diff']:.2e} "
+              f"top1_agree={v['top1_agree']:.4f} on {v['source']}")
+        if not v["ok"]:
+            failed = True
+            Path(out).unlink(missing_ok=True)  # 검증 실패한 산출물은 로더가 쓰지 않도록 삭제
+            continue
+        if args.bench:
+            rows += [dict(ckpt=Path(ckpt).name, **r) for r in bench(ckpt, out, iters=args.iters)]
+
+    if rows:
+        keys = list(rows[0].keys())
+        print("\n" + " | ".join(f"{k:>18}" for k in keys))
+        for r in rows:
+            print(" | ".join(f"{str(r[k]):>18}" for k in keys))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
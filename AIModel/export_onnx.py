@@ -0,0 +1,111 @@
+# AIModel/export_onnx.py
+"""
+학습된 체크포인트 → ONNX(.onnx) 내보내기 (INFER_BACKEND=onnxruntime 용).
+
+- 입력 "input" [batch, 3, img_size, img_size] / 출력 "logits" [batch, C], batch 축은 동적
+- img_size는 체크포인트에 저장된 값을 그대로 사용
+- metadata_props에 classes(JSON)/arch/img_size/run_name/ckpt_sha256을 넣어
+  로더가 torchvision 모델을 만들지 않고도 번들을 구성할 수 있게 함
+- 내보낸 뒤 여러 배치 크기에서 eager와 logits를 비교 (--atol 초과 시 실패, 산출물 삭제)
+
+사용 (선택 의존성: pip install onnx onnxruntime):
+  python export_onnx.py --ckpt outputs/cloud_model_best.pt outputs/cloud_model_fast.pt
+  INFER_BACKEND=onnxruntime uvicorn api:app ...
+"""
+import argparse
+import json
+import sys
+import warnings
+from pathlib import Path
+
+import torch
+
+from backends import OnnxRuntimeModel, onnx_artifact_path
+from model_loader_HF import load_model_bundle
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+ONNX_OPSET = 17
+
+
+def export_onnx(ckpt_path: str, out_path: str = None, opset: int = ONNX_OPSET) -> str:
+    import onnx
+
+    b = load_model_bundle(ckpt_path, device="cpu", precision="fp32", channels_last=False)
+    out_path = out_path or onnx_artifact_path(ckpt_path)
+
+    example = torch.randn(1, 3, b.img_size, b.img_size)
+    with torch.no_grad(), warnings.catch_warnings():
+        # dynamic_axes를 쓰는 TorchScript 기반 exporter를 명시적으로 사용 (deprecation 경고 숨김)
+        warnings.simplefilter("ignore", DeprecationWarning)
+        torch.onnx.export(
+            b.model, (example,), out_path,
+            input_names=["input"],
+            output_names=["logits"],
+            dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+            opset_version=opset,
+            dynamo=False,
+        )
+
+    meta = {
+        "classes": json.dumps(b.class_names, ensure_ascii=False),
+        "arch": b.arch,
+        "img_size": str(b.img_size),
+        "run_name": Path(ckpt_path).stem,
+        "ckpt_sha256": b.checkpoint_sha256(),
+    }
+    m = onnx.load(out_path)
+    del m.metadata_props[:]
+    for k, v in meta.items():
+        p = m.metadata_props.add()
+        p.key, p.value = k, v
+    onnx.save(m, out_path)
+
+    print(f"✅ saved onnx model -> {out_path}")
+    return out_path
+
+
+def validate(ckpt_path: str, onnx_path: str, batch_sizes=(1, 8, 32), atol: float = 1e-3) -> dict:
+    """eager vs onnxruntime logits 비교 (동적 batch 축도 같이 확인)."""
+    eager = load_model_bundle(ckpt_path, device="cpu", precision="fp32", channels_last=False)
+    ort_model = OnnxRuntimeModel(onnx_path)
+
+    diff, agree = 0.0, []
+    with torch.no_grad():
+        for bs in batch_sizes:
+            x = torch.randn(bs, 3, eager.img_size, eager.img_size)
+            a, o = eager.model(x), ort_model(x)
+            diff = max(diff, (a - o).abs().max().item())
+            agree.append((a.argmax(1) == o.argmax(1)).float().mean().item())
+
+    return {
+        "batch_sizes": list(batch_sizes),
+        "max_abs_diff": diff,
+        "top1_agree": min(agree),
+        "ok": diff <= atol,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ckpt", nargs="+", default=[str(PROJECT_DIR / "outputs" / "cloud_model_best.pt")])
+    parser.add_argument("--opset", type=int, default=ONNX_OPSET)
+    parser.add_argument("--atol", type=float, default=1e-3)
+    args = parser.parse_args()
+
+    failed = False
+    for ckpt in args.ckpt:
+        out = export_onnx(ckpt, opset=args.opset)
+        v = validate(ckpt, out, atol=args.atol)
+        status = "OK" if v["ok"] else "FAIL"
+        print(f"🔎 [{status}] {Path(ckpt).name}: max|eager-onnx|={v['max_abs_diff']:.2e} "
+              f"top1_agree={v['top1_agree']:.4f} (batch {v['batch_sizes']})")
+        if not v["ok"]:
+            failed = True
+            Path(out).unlink(missing_ok=True)  # 검증 실패한 산출물은 로더가 쓰지 않도록 삭제
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# AIModel/gpu_aug.py
+"""
+학습 augmentation을 GPU에서 배치 텐서 연산으로 (train_gpu.py --gpu_aug).
+
+기존: DataLoader 워커(CPU)가 이미지마다 SkyCrop → RandomResizedCrop → ColorJitter → Flip → Normalize
+      → GPU가 CPU를 기다림
+변경: CPU는 SkyCrop + 고정 크기 Resize + uint8 텐서화만 (base_transform)
+      → uint8 배치를 GPU로 옮긴 뒤 GpuAugment가 샘플별 랜덤 파라미터로 한 번에 처리
+        (전송량도 float32의 1/4)
+
+분포는 기존 모드와 같게 맞춤:
+  light : Resize(img) → RandomHorizontalFlip → Normalize
+  medium: RandomResizedCrop(img, scale=(0.7, 1.0), ratio=(0.8, 1.25)) (+flip, 한 번의 grid_sample로)
+          → ColorJitter(0.15, 0.15, 0.10, 0.02) (샘플별 계수, 적용 순서는 배치마다 랜덤)
+          → Normalize
+CCSN 이미지는 정사각형이라 고정 크기 Resize가 기존 Resize(img)와 같은 크기를 만든다.
+"""
+from typing import Tuple
+
+import torch
+import torch.nn.functional as F
+
+from preprocess import NORMALIZATIONS, SkyCrop
+
+AUG_MODES = ("light", "medium")
+
+RRC_SCALE = (0.7, 1.0)
+RRC_RATIO = (0.8, 1.25)
+JITTER = {"brightness": 0.15, "contrast": 0.15, "saturation": 0.10, "hue": 0.02}
+
+
+def base_size(img_size: int, sky_crop: float = 0.0) -> Tuple[int, int]:
+    """정사각형 원본에 SkyCrop → Resize(img_size)를 적용했을 때의 (H, W)."""
+    keep = 1.0 - sky_crop if sky_crop > 0 else 1.0
+    return img_size, int(img_size / keep)
+
+
+def base_transform(img_size: int, sky_crop: float = 0.0):
+    """DataLoader 워커에서 할 일: SkyCrop + 고정 크기 Resize + uint8 CHW 텐서 (랜덤 요소 없음)."""
+    from torchvision import transforms
+
+    steps = [SkyCrop(sky_crop)] if sky_crop > 0 else []
+    steps += [transforms.Resize(base_size(img_size, sky_crop)), transforms.PILToTensor()]
+    return transforms.Compose(steps)
+
+
+# -----------------------
+# Color ops (x: float [0,1], (N,3,H,W), factor: (N,))
+# -----------------------
+def _grayscale(x: torch.Tensor) -> torch.Tensor:
+    r, g, b = x.unbind(1)
+    return (0.299 * r + 0.587 * g + 0.114 * b).unsqueeze(1)
+
+
+def _blend(x: torch.Tensor, other: torch.Tensor, factor: torch.Tensor) -> torch.Tensor:
+    f = factor.view(-1, 1, 1, 1)
+    return (f * x + (1.0 - f) * other).clamp_(0.0, 1.0)
+
+
+def adjust_brightness(x, factor):
+    return (x * factor.view(-1, 1, 1, 1)).clamp_(0.0, 1.0)
+
+
+def adjust_contrast(x, factor):
+    mean = _grayscale(x).mean(dim=(1, 2, 3), keepdim=True)
+    return _blend(x, mean, factor)
+
+
+def adjust_saturation(x, factor):
+    return _blend(x, _grayscale(x), factor)
+
+
+def _rgb_to_hsv(x: torch.Tensor) -> torch.Tensor:
+    r, g, b = x.unbind(1)
+    minc, maxc = torch.aminmax(x, dim=1)
+    delta = maxc - minc
+    s = delta / maxc.clamp_min(1e-8)
+    dc = delta.clamp_min(1e-8)
+    h = torch.where(maxc == r, (g - b) / dc, torch.where(maxc == g, 2.0 + (b - r) / dc, 4.0 + (r - g) / dc))
+    h = h.div_(6.0).remainder_(1.0).masked_fill_(delta == 0, 0.0)
+    return torch.stack([h, s, maxc], dim=1)
+
+
+def _hsv_to_rgb(hsv: torch.Tensor) -> torch.Tensor:
+    # 채널 n(r=5, g=3, b=1)마다 k = (n + 6h) mod 6, c = v - v*s*clamp(min(k, 4-k), 0, 1)
+    h, s, v = hsv[:, 0:1], hsv[:, 1:2], hsv[:, 2:3]
+    n = torch.tensor([5.0, 3.0, 1.0], device=hsv.device, dtype=hsv.dtype).view(1, 3, 1, 1)
+    k = (n + h * 6.0) % 6.0
+    return v - v * s * torch.minimum(k, 4.0 - k).clamp_(0.0, 1.0)
+
+
+def adjust_hue(x, shift):
+    hsv = _rgb_to_hsv(x)
+    hsv[:, 0] = (hsv[:, 0] + shift.view(-1, 1, 1)) % 1.0
+    return _hsv_to_rgb(hsv).clamp_(0.0, 1.0)
+
+
+# -----------------------
+# RandomResizedCrop params (torchvision과 같은 알고리즘, 샘플별 벡터화)
+# -----------------------
+def rrc_boxes(n: int, h: int, w: int, scale=RRC_SCALE, ratio=RRC_RATIO,
+              attempts: int = 10, device=None) -> torch.Tensor:
+    """반환: (n, 4) = (x0, y0, crop_w, crop_h) 픽셀 단위."""
+    area = float(h * w)
+    target = area * torch.empty(n, attempts, device=device).uniform_(*scale)
+    log_r = torch.log(torch.tensor(ratio, device=device))
+    ar = torch.exp(torch.empty(n, attempts, device=device).uniform_(float(log_r[0]), float(log_r[1])))
+    cw = torch.sqrt(target * ar).round()
+    ch = torch.sqrt(target / ar).round()
+    valid = (cw > 0) & (cw <= w) & (ch > 0) & (ch <= h)
+
+    # 첫 번째로 유효한 시도 선택
+    first = valid.float().argmax(dim=1, keepdim=True)
+    cw, ch = cw.gather(1, first).squeeze(1), ch.gather(1, first).squeeze(1)
+    ok = valid.any(dim=1)
+
+    # 폴백: 전체 이미지를 ratio 범위로 맞춘 center crop
+    in_ratio = w / h
+    if in_ratio < ratio[0]:
+        fw, fh = w, round(w / ratio[0])
+    elif in_ratio > ratio[1]:
+        fw, fh = round(h * ratio[1]), h
+    else:
+        fw, fh = w, h
+    cw = torch.where(ok, cw, torch.full_like(cw, fw))
+    ch = torch.where(ok, ch, torch.full_like(ch, fh))
+
+    x0 = torch.floor(torch.rand(n, device=device) * (w - cw + 1))
+    y0 = torch.floor(torch.rand(n, device=device) * (h - ch + 1))
+    x0 = torch.where(ok, x0, torch.full_like(x0, 0.0) + ((w - cw) / 2).round())
+    y0 = torch.where(ok, y0, torch.full_like(y0, 0.0) + ((h - ch) / 2).round())
+    return torch.stack([x0, y0, cw, ch], dim=1)
+
+
+def crop_resize_flip(x: torch.Tensor, boxes: torch.Tensor, flip: torch.Tensor, out_size: int) -> torch.Tensor:
+    """박스 영역을 out_size로 리샘플 + (flip이면) 좌우 반전을 한 번의 grid_sample로."""
+    n, _, h, w = x.shape
+    x0, y0, cw, ch = boxes.unbind(1)
+    theta = torch.zeros(n, 2, 3, device=x.device, dtype=x.dtype)
+    sx = cw / w
+    theta[:, 0, 0] = torch.where(flip, -sx, sx)
+    theta[:, 0, 2] = (x0 + cw / 2) / w * 2 - 1
+    theta[:, 1, 1] = ch / h
+    theta[:, 1, 2] = (y0 + ch / 2) / h * 2 - 1
+    grid = F.affine_grid(theta, [n, 3, out_size, out_size], align_corners=False)
+    return F.grid_sample(x, grid, mode="bilinear", padding_mode="border", align_corners=False)
+
+
+class GpuAugment:
+    """uint8 (N,3,H,W) 배치 → augmentation + Normalize된 float32 배치 (입력과 같은 디바이스)."""
+
+    def __init__(self, mode: str, img_size: int, normalization: str = "imagenet"):
+        if mode not in AUG_MODES:
+            raise ValueError(f"Unsupported aug mode: {mode} (choose from {AUG_MODES})")
+        self.mode = mode
+        self.img_size = int(img_size)
+        self.mean, self.std = NORMALIZATIONS[normalization]
+
+    def color_jitter(self, x: torch.Tensor) -> torch.Tensor:
+        n, dev = x.size(0), x.device
+
+        def factors(amount):
+            return torch.empty(n, device=dev).uniform_(1.0 - amount, 1.0 + amount)
+
+        ops = [
+            lambda t: adjust_brightness(t, factors(JITTER["brightness"])),
+            lambda t: adjust_contrast(t, factors(JITTER["contrast"])),
+            lambda t: adjust_saturation(t, factors(JITTER["saturation"])),
+            lambda t: adjust_hue(t, torch.empty(n, device=dev).uniform_(-JITTER["hue"], JITTER["hue"])),
+        ]
+        for i in torch.randperm(len(ops)).tolist():
+            x = ops[i](x)
+        return x
+
+    def normalize(self, x: torch.Tensor) -> torch.Tensor:
+        mean = torch.tensor(self.mean, device=x.device, dtype=x.dtype).view(1, 3, 1, 1)
+        std = torch.tensor(self.std, device=x.device, dtype=x.dtype).view(1, 3, 1, 1)
+        return x.sub_(mean).div_(std)
+
+    @torch.no_grad()
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        x = x.float().div_(255.0)
+        n, _, h, w = x.shape
+        flip = torch.rand(n, device=x.device) < 0.5
+
+        if self.mode == "light":
+            x = torch.where(flip.view(-1, 1, 1, 1), x.flip(-1), x)
+        else:
+            boxes = rrc_boxes(n, h, w, device=x.device)
+            x = crop_resize_flip(x, boxes, flip, self.img_size)
+            x = self.color_jitter(x)
+
+        return self.normalize(x.contiguous())
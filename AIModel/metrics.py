@@ -0,0 +1,252 @@
+# AIModel/metrics.py
+"""
+/metrics용 최소 Prometheus 메트릭 (text exposition format 0.0.4, 외부 의존성 없음).
+
+- Counter / Gauge / Histogram + 라벨
+- observe/inc는 락 한 번 + bisect 정도라 운영에서 켜 둬도 부담이 없음
+  (이벤트 루프, 디코딩 워커, infer 스레드 어디서 불러도 안전)
+- Gauge.set_function(fn): 스크레이프할 때 값을 읽음 (배처 대기열 길이 등)
+- Registry.const_labels: 모든 시리즈에 붙는 라벨 (arch / run_name / device)
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 초 단위 (1ms ~ 10s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + body + "}" if body else ""
+
+
+def _fmt_value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _series(self, const: List[Tuple[str, str]]):
+        """(라벨 문자열 생성용 pairs, 값) 목록 — 스냅샷을 떠서 락 밖에서 포맷."""
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in sorted(items):
+            yield const + list(zip(self.labelnames, key)), value
+
+    def render(self, const: List[Tuple[str, str]]) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for pairs, value in self._series(const):
+            lines.append(f"{self.name}{_fmt_labels(pairs)} {_fmt_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._fn: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float]):
+        """라벨 없는 게이지: 스크레이프 시점에 fn()을 읽음."""
+        self._fn = fn
+
+    def _series(self, const):
+        if self._fn is not None:
+            try:
+                yield const, float(self._fn())
+            except Exception:
+                return
+            return
+        yield from super()._series(const)
+
+
+class _HistogramValue:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, n_buckets: int):
+        self.counts = [0] * n_buckets
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            h = self._values.get(key)
+            if h is None:
+                h = self._values[key] = _HistogramValue(len(self.buckets))
+            h.counts[i] += 1
+            h.sum += value
+            h.count += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self, const):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for pairs, h in self._series(const):
+            with self._lock:
+                counts, total, count = list(h.counts), h.sum, h.count
+            acc = 0
+            for le, c in zip(self.buckets, counts):
+                acc += c
+                lines.append(f"{self.name}_bucket{_fmt_labels(pairs + [('le', _fmt_value(le))])} {acc}")
+            lines.append(f"{self.name}_sum{_fmt_labels(pairs)} {_fmt_value(total)}")
+            lines.append(f"{self.name}_count{_fmt_labels(pairs)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.const_labels: Dict[str, str] = {}
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def set_const_labels(self, **labels):
+        self.const_labels = {k: str(v) for k, v in labels.items()}
+
+    def render(self) -> str:
+        const = list(self.const_labels.items())
+        lines = []
+        for m in self.metrics:
+            lines += m.render(const)
+        return "\n".join(lines) + "\n"
+
+
+# -----------------------
+# HaneulGyeol API 메트릭 (api.py에서 사용)
+# -----------------------
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter(
+    "hg_requests_total", "HTTP requests by endpoint and status code.", ("endpoint", "status"))
+REQUEST_SECONDS = REGISTRY.histogram(
+    "hg_request_seconds", "End-to-end HTTP request latency.", ("endpoint",))
+IN_FLIGHT = REGISTRY.gauge(
+    "hg_requests_in_flight", "Requests currently being handled.", ("endpoint",))
+# read/decode/transform: 이미지 1장 기준, forward/topk/json: 배치 1회 기준
+STAGE_SECONDS = REGISTRY.histogram(
+    "hg_stage_seconds", "Latency per pipeline stage (read/decode/transform per image; "
+    "forward/topk/json per batch).", ("stage",))
+BATCH_SIZE = REGISTRY.histogram(
+    "hg_batch_size", "Images per forward pass.", buckets=(1, 2, 4, 8, 16, 32, 64))
+IMAGE_ERRORS = REGISTRY.counter(
+    "hg_image_errors_total", "Images that failed, by stage.", ("stage",))
+CACHE_LOOKUPS = REGISTRY.counter(
+    "hg_cache_lookups_total", "Prediction cache lookups.", ("result",))
+MODEL_INFO = REGISTRY.gauge(
+    "hg_model_info", "Loaded model identity (always 1).", ("model_id", "backend"))
+BATCHER_QUEUE = REGISTRY.gauge("hg_batcher_queue_depth", "Items waiting in the micro-batcher queue.")
+DECODE_INFLIGHT = REGISTRY.gauge("hg_decode_inflight", "Decode jobs running or queued in the worker pool.")
+CASCADE_ANSWERS = REGISTRY.counter(
+    "hg_cascade_answers_total", "Images answered by each cascade stage (fast / heavy).", ("stage",))
+
+
+class MetricsMiddleware:
+    """
+    요청 수/상태 코드, 지연 시간, 진행 중 요청 수를 기록하는 ASGI 미들웨어.
+    (BaseHTTPMiddleware보다 가볍게 — 응답 본문을 감싸지 않고 status만 가로챔)
+    endpoints에 없는 경로는 "other"로 묶어 라벨 개수를 제한한다.
+    """
+
+    def __init__(self, app, endpoints: Iterable[str] = ()):
+        self.app = app
+        self.endpoints = set(endpoints)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope.get("path", "")
+        endpoint = path if path in self.endpoints else "other"
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc(endpoint=endpoint)
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_FLIGHT.dec(endpoint=endpoint)
+            REQUEST_SECONDS.observe(time.perf_counter() - t0, endpoint=endpoint)
+            REQUESTS.inc(endpoint=endpoint, status=status[0])
@@ -1,13 +1,18 @@
 # model_loader.py
+import hashlib
+import json
 import os
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Optional, Tuple
 
 import torch
-from huggingface_hub import hf_hub_download
-from torchvision import models
 
+# huggingface_hub / torchvision은 실제로 필요한 함수 안에서 import (서버 기동 시간 단축, bench_startup.py)
+from backends import INFER_BACKEND, OnnxRuntimeModel, check_backend, onnx_artifact_path
 from cloud_classes import CLOUD_CLASSES
+from precision import INFER_CHANNELS_LAST, INFER_PRECISION, apply_precision, precision_tag
+from preprocess import FusedPreprocess, get_preprocessor
 
 
 @dataclass
@@ -15,14 +20,45 @@ class ModelBundle:
     model: torch.nn.Module
     device: str
     class_names: list
-    
+    img_size: int = 320
+    # 로드된 모델의 img_size에 맞춘 전처리기 (레지스트리에서 한 번만 생성)
+    preprocess: Optional[FusedPreprocess] = None
+    arch: str = "unknown"
+    ckpt_sha256: str = ""  # 비어 있으면 checkpoint_sha256()이 ckpt_path로 처음 필요할 때 계산
+    ckpt_path: str = ""
+    quantize: str = ""  # "" / "dynamic" / "static"
+    backend: str = "eager"  # "eager" / "torchscript" / "onnxruntime"
+    precision: str = "fp32"  # "fp32" / "bf16" / "fp16" (eager만, precision.py)
+    channels_last: bool = False
+
+    def checkpoint_sha256(self) -> str:
+        # eager 로드는 해시가 필요 없으므로 로드 시점이 아니라 처음 쓰일 때 계산 (이후 재사용)
+        if not self.ckpt_sha256 and self.ckpt_path:
+            self.ckpt_sha256 = file_sha256(self.ckpt_path)
+        return self.ckpt_sha256
+
+    @property
+    def model_id(self) -> str:
+        # 예측 캐시 등에서 "같은 모델인지" 판단하는 식별자
+        mid = f"{self.arch}-{self.img_size}-{self.checkpoint_sha256()[:16]}"
+        if self.quantize:
+            return f"{mid}-int8{self.quantize}"
+        tag = precision_tag(self.precision, self.channels_last)
+        return f"{mid}-{tag}" if tag else mid
+
 HF_REPO_ID   = os.getenv("HF_REPO_ID", "Jinu219/HaneulGyeol")
 
 HF_FILENAME  = os.getenv("HF_FILENAME", "cloud_model_best.pt")
 HF_REVISION  = os.getenv("HF_REVISION")  # 선택: "main" 또는 커밋 해시/태그
 HF_CACHE_DIR = os.getenv("HF_CACHE_DIR", "./hf_cache")  # 컨테이너 로컬 캐시
+HF_QUANTIZE  = os.getenv("HF_QUANTIZE", "")  # 선택: "dynamic" / "static" (CPU int8 추론, quantize.py)
+HF_COMPILED_FILENAME = os.getenv("HF_COMPILED_FILENAME", "")  # 선택: export_compiled.py 결과물 (예: cloud_model_best.torchscript.pt)
+HF_USE_COMPILED = os.getenv("HF_USE_COMPILED", "1") != "0"   # 0이면 컴파일 모델이 있어도 eager 사용
+HF_ONNX_FILENAME = os.getenv("HF_ONNX_FILENAME", "")  # 선택: export_onnx.py 결과물 (INFER_BACKEND=onnxruntime)
 
 def load_model(model_ctor, device: str):
+    from huggingface_hub import hf_hub_download
+
     # 1) Hub에서 모델 파일 다운로드(캐시됨) → 로컬 경로 획득
     model_path = hf_hub_download(
         repo_id=HF_REPO_ID,
@@ -40,37 +76,72 @@ def load_model(model_ctor, device: str):
     model.to(device).eval()
     return model
 
-def build_resnet18(num_classes: int) -> torch.nn.Module:
+def build_resnet18(num_classes: int, pretrained: bool = False) -> torch.nn.Module:
     """
     ResNet18 backbone. 최종 FC만 num_classes로 교체.
     (학습 때 ResNet18 fine-tuning 했다는 전제)
+    pretrained=True: ImageNet 가중치로 시작 (학습 스크립트용, 서버 로드는 ckpt로 덮어쓰므로 False)
     """
-    model = models.resnet18(weights=None)  # 가중치는 ckpt로 로드하므로 None
+    from torchvision import models
+
+    model = models.resnet18(weights="DEFAULT" if pretrained else None)
     model.fc = torch.nn.Linear(model.fc.in_features, num_classes)
     return model
 
 
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    체크포인트 파일 해시 (모델 식별용).
+    hf_hub_download 캐시의 LFS 파일은 blobs/<sha256> 로 저장되므로 파일을 읽지 않고 이름을 그대로 사용.
+    """
+    real = Path(os.path.realpath(path))
+    if real.parent.name == "blobs" and len(real.name) == 64 and all(c in "0123456789abcdef" for c in real.name):
+        return real.name
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
 def get_device() -> str:
     return "cuda" if torch.cuda.is_available() else "cpu"
 
 
+def read_checkpoint(ckpt_path: str):
+    """
+    체크포인트를 (한 번만) 읽는다.
+    torch.save 기본(zip) 형식이면 mmap=True → 가중치를 메모리로 복사하지 않고 파일 페이지를 그대로 텐서로 사용.
+    예전(legacy) 형식이라 mmap이 안 되면 일반 로드로 폴백.
+    """
+    try:
+        return torch.load(ckpt_path, map_location="cpu", mmap=True)
+    except RuntimeError:
+        return torch.load(ckpt_path, map_location="cpu")
+
+
 
 def load_checkpoint_to_model(
     model: torch.nn.Module,
-    ckpt_path: str
+    ckpt_path: "str | dict",
+    assign: bool = False,
 ) -> tuple[torch.nn.Module, dict]:
     """
     다양한 저장 형식의 checkpoint를 안전하게 로드한다.
+    ckpt_path 자리에 이미 읽은 checkpoint(dict)를 넘기면 파일을 다시 읽지 않는다.
+    assign=True: meta 디바이스에서 만든 모델에 텐서를 복사 없이 그대로 꽂음 (load_state_dict(assign=True))
 
     지원 형태:
     1) ckpt["model_state"]        (너 케이스, 가장 중요)
     2) ckpt["state_dict"]
     3) ckpt["model_state_dict"]
-    4) ckpt 자체가 state_dict
+    4) ckpt["model"]              (train.py fast 모델 형식)
+    5) ckpt 자체가 state_dict
     + prefix: module. / model. 자동 제거
     """
 
-    ckpt = torch.load(ckpt_path, map_location="cpu")
+    ckpt = read_checkpoint(ckpt_path) if isinstance(ckpt_path, (str, os.PathLike)) else ckpt_path
 
     meta: dict = {}
     state: dict | None = None
@@ -92,6 +163,11 @@ def load_checkpoint_to_model(
             state = ckpt["model_state_dict"]
             meta = {k: v for k, v in ckpt.items() if k != "model_state_dict"}
 
+        elif "model" in ckpt and isinstance(ckpt["model"], dict):
+            # train.py: {"model": state_dict, "classes": [...]}
+            state = ckpt["model"]
+            meta = {k: v for k, v in ckpt.items() if k != "model"}
+
         else:
             # dict 자체가 state_dict인 경우
             state = ckpt
@@ -118,7 +194,7 @@ def load_checkpoint_to_model(
     # --------------------------------------------------
     # 3) state_dict 로드
     # --------------------------------------------------
-    model.load_state_dict(state, strict=True)
+    model.load_state_dict(state, strict=True, assign=assign)
 
     return model, meta
 
@@ -129,7 +205,16 @@ def load_checkpoint_to_model(
 def download_model_from_hf() -> str:
     """
     Hugging Face Hub에서 모델 파일을 다운로드하고 로컬 경로 반환.
+    LOCAL_MODEL_PATH가 있으면 다운로드 없이 그 파일을 사용한다.
     """
+    local_path = os.getenv("LOCAL_MODEL_PATH")  # optional: 오프라인 벤치/테스트용 로컬 체크포인트
+    if local_path:
+        if not os.path.exists(local_path):
+            raise FileNotFoundError(f"LOCAL_MODEL_PATH not found: {local_path}")
+        return local_path
+
+    from huggingface_hub import hf_hub_download
+
     repo_id = os.getenv("HF_REPO_ID", "Jinu219/HaneulGyeol")
 
     if not repo_id:
@@ -166,28 +251,183 @@ def get_model_bundle() -> ModelBundle:
     if _bundle is not None:
         return _bundle
 
-    from cloud_classes import CLOUD_CLASSES
-    import os
-    import torch
+    # HF에서 ckpt 다운로드 → (있으면) 컴파일 모델 우선 → 로드
+    ckpt_path = download_model_from_hf()
+    backend = check_backend(INFER_BACKEND)
+    _bundle = load_model_bundle(
+        ckpt_path,
+        quantize=HF_QUANTIZE,
+        compiled_path=find_compiled_artifact(ckpt_path) if backend == "torch" else None,
+        onnx_path=find_onnx_artifact(ckpt_path) if backend == "onnxruntime" else None,
+    )
+    return _bundle
+
+
+def _find_artifact(ckpt_path: str, hf_filename: str, local_path: str, kind: str) -> Optional[str]:
+    """
+    체크포인트에서 파생된 산출물 경로를 찾는다. 없으면 None.
+    1) hf_filename이 있으면 같은 HF 레포에서 다운로드
+    2) 아니면 체크포인트 옆의 local_path
+    """
+    if hf_filename:
+        from huggingface_hub import hf_hub_download
+
+        try:
+            return hf_hub_download(
+                repo_id=HF_REPO_ID,
+                filename=hf_filename,
+                revision=HF_REVISION,
+                cache_dir=HF_CACHE_DIR,
+            )
+        except Exception as e:
+            print(f"[HaneulGyeol] {kind} model not available ({e})")
+            return None
+
+    return local_path if os.path.exists(local_path) else None
+
+
+def compiled_artifact_path(ckpt_path: str) -> str:
+    """export_compiled.py 기본 출력 경로: 체크포인트 옆의 <stem>.torchscript.pt (outputs/*.pt LFS 규칙에 포함)"""
+    return str(Path(ckpt_path).with_suffix(".torchscript.pt"))
+
+
+def find_compiled_artifact(ckpt_path: str) -> Optional[str]:
+    """
+    컴파일된(TorchScript) 모델 경로를 찾는다. 없으면 None → eager로 로드.
+    (HF_COMPILED_FILENAME 또는 체크포인트 옆의 <stem>.torchscript.pt)
+    """
+    if not HF_USE_COMPILED:
+        return None
+    return _find_artifact(ckpt_path, HF_COMPILED_FILENAME, compiled_artifact_path(ckpt_path), "compiled")
+
+
+def find_onnx_artifact(ckpt_path: str) -> Optional[str]:
+    """ONNX 모델 경로 (HF_ONNX_FILENAME 또는 체크포인트 옆의 <stem>.onnx). 없으면 None."""
+    return _find_artifact(ckpt_path, HF_ONNX_FILENAME, onnx_artifact_path(ckpt_path), "onnx")
+
+
+def load_compiled_bundle(compiled_path: str, ckpt_sha256: str, device: str) -> Optional[ModelBundle]:
+    """
+    TorchScript(frozen) 모델 로드. 메타(classes/arch/img_size)는 파일 안의 meta.json에서 읽는다.
+    원본 체크포인트 해시가 다르면(오래된 산출물) None → eager 폴백.
+    """
+    extra = {"meta.json": ""}
+    model = torch.jit.load(compiled_path, map_location=device, _extra_files=extra)
+    meta = json.loads(extra["meta.json"] or "{}")
+
+    if meta.get("ckpt_sha256") != ckpt_sha256:
+        print(f"[HaneulGyeol] compiled model is stale (checkpoint changed): {compiled_path} -> eager")
+        return None
+
+    model.eval()
+    img_size = int(meta["img_size"])
+    return ModelBundle(
+        model=model,
+        device=device,
+        class_names=list(meta["classes"]),
+        img_size=img_size,
+        preprocess=get_preprocessor(img_size),
+        arch=meta.get("arch", "unknown"),
+        ckpt_sha256=ckpt_sha256,
+        backend="torchscript",
+    )
+
 
+def load_onnx_bundle(onnx_path: str, ckpt_sha256: str) -> Optional[ModelBundle]:
+    """
+    ONNX Runtime(CPU) 백엔드 번들. 메타는 ONNX metadata_props에서 읽는다.
+    원본 체크포인트 해시가 다르면(오래된 산출물) None → PyTorch 폴백.
+    """
+    model = OnnxRuntimeModel(onnx_path)
+    meta = model.meta
+
+    if meta.get("ckpt_sha256") != ckpt_sha256:
+        print(f"[HaneulGyeol] onnx model is stale (checkpoint changed): {onnx_path} -> torch")
+        return None
+
+    img_size = int(meta["img_size"])
+    return ModelBundle(
+        model=model,
+        device="cpu",  # ORT CPU 세션이므로 입력도 CPU 텐서
+        class_names=list(meta["classes"]),
+        img_size=img_size,
+        preprocess=get_preprocessor(img_size),
+        arch=meta.get("arch", "unknown"),
+        ckpt_sha256=ckpt_sha256,
+        backend="onnxruntime",
+    )
+
+
+def load_model_bundle(ckpt_path: str, device: Optional[str] = None, quantize: str = "",
+                      compiled_path: Optional[str] = None,
+                      onnx_path: Optional[str] = None,
+                      precision: Optional[str] = None,
+                      channels_last: Optional[bool] = None) -> ModelBundle:
+    """
+    로컬 체크포인트 경로에서 ModelBundle 생성 (HF 다운로드 없음).
+    벤치마크/리포트 스크립트도 이 함수로 서버와 같은 방식으로 모델을 올린다.
+    onnx_path / compiled_path가 있으면 그 백엔드를 우선 사용하고, 실패하면 eager로 폴백한다.
+    precision / channels_last: None이면 INFER_PRECISION / INFER_CHANNELS_LAST (eager에만 적용)
+    """
     # --------------------------------------------------
     # 1) 디바이스 결정
     # --------------------------------------------------
-    device = "cuda" if torch.cuda.is_available() else "cpu"
+    device = device or get_device()
+    # 해시는 ONNX/컴파일 산출물이 최신인지 확인할 때만 여기서 계산 (eager는 ModelBundle이 필요할 때)
+    ckpt_sha256 = ""
 
     # --------------------------------------------------
-    # 2) HF에서 ckpt 다운로드
+    # 2) (선택) int8 양자화는 CPU 전용
     # --------------------------------------------------
-    ckpt_path = download_model_from_hf()
+    quantize = (quantize or "").lower()
+    if quantize and device != "cpu":
+        print(f"[HaneulGyeol] HF_QUANTIZE={quantize} ignored on device={device} (CPU only)")
+        quantize = ""
+
+    # ONNX / 컴파일 모델은 fp32 그대로이므로 양자화와는 같이 쓰지 않음
+    if onnx_path and not quantize:
+        try:
+            ckpt_sha256 = ckpt_sha256 or file_sha256(ckpt_path)
+            bundle = load_onnx_bundle(onnx_path, ckpt_sha256)
+        except Exception as e:
+            print(f"[HaneulGyeol] failed to load onnx model ({e}) -> torch")
+            bundle = None
+        if bundle is not None:
+            print(
+                f"[HaneulGyeol] Model loaded | "
+                f"arch={bundle.arch}, "
+                f"num_classes={len(bundle.class_names)}, "
+                f"img_size={bundle.img_size}, "
+                f"device=cpu, backend=onnxruntime"
+            )
+            return bundle
+
+    if compiled_path and not quantize:
+        try:
+            ckpt_sha256 = ckpt_sha256 or file_sha256(ckpt_path)
+            bundle = load_compiled_bundle(compiled_path, ckpt_sha256, device)
+        except Exception as e:
+            print(f"[HaneulGyeol] failed to load compiled model ({e}) -> eager")
+            bundle = None
+        if bundle is not None:
+            print(
+                f"[HaneulGyeol] Model loaded | "
+                f"arch={bundle.arch}, "
+                f"num_classes={len(bundle.class_names)}, "
+                f"img_size={bundle.img_size}, "
+                f"device={device}, backend=torchscript"
+            )
+            return bundle
 
     # --------------------------------------------------
-    # 3) ckpt 로드 (메타 먼저 확인)
+    # 3) ckpt 로드 (한 번만 읽고 메타/가중치 모두 여기서 사용)
     # --------------------------------------------------
-    ckpt = torch.load(ckpt_path, map_location="cpu")
+    ckpt = read_checkpoint(ckpt_path)
 
     # 기본값 (fallback)
     class_names = CLOUD_CLASSES[:]
     arch = "resnet18"
+    img_size = 320
 
     if isinstance(ckpt, dict):
         # ✅ 저장된 클래스 순서 사용 (가장 중요)
@@ -198,23 +438,27 @@ def get_model_bundle() -> ModelBundle:
         if "arch" in ckpt and isinstance(ckpt["arch"], str):
             arch = ckpt["arch"].lower()
 
+        # ✅ 학습 때 입력 크기
+        if "img_size" in ckpt:
+            img_size = int(ckpt["img_size"])
+        elif "model" in ckpt:
+            img_size = 192  # train.py fast 모델 (predict.py와 동일)
+
     num_classes = len(class_names)
 
     # --------------------------------------------------
     # 4) 모델 생성 (arch 자동 분기)
+    #    meta 디바이스에서 만들면 어차피 덮어쓸 가중치의 할당/랜덤 초기화를 건너뜀
     # --------------------------------------------------
-    if arch in ["resnet18", "resnet-18"]:
-        model = build_resnet18(num_classes=num_classes)
-    elif arch in ["convnext_tiny", "convnext-tiny", "convnexttiny"]:
-        model = build_convnext_tiny(num_classes=num_classes)
-    else:
-        raise RuntimeError(f"Unsupported architecture in checkpoint: {arch}")
+    arch_cfg = ckpt.get("arch_cfg") if isinstance(ckpt, dict) else None  # 예: prune.py의 블록별 채널 수
+    with torch.device("meta"):
+        model = build_model(arch, num_classes=num_classes, cfg=arch_cfg)
 
 
     # --------------------------------------------------
-    # 5) state_dict 로드 (model_state)
+    # 5) state_dict 로드 (model_state) — 이미 읽은 ckpt 텐서를 그대로 사용
     # --------------------------------------------------
-    model, meta = load_checkpoint_to_model(model, ckpt_path)
+    model, meta = load_checkpoint_to_model(model, ckpt, assign=True)
 
     # --------------------------------------------------
     # 6) 디바이스 이동 및 eval
@@ -222,13 +466,33 @@ def get_model_bundle() -> ModelBundle:
     model.to(device)
     model.eval()
 
+    if quantize:
+        from quantize import quantize_model
+        model, quantize = quantize_model(model, quantize, img_size=img_size)
+        precision, channels_last = "fp32", False
+    else:
+        # bf16/fp16 autocast + channels_last를 forward에 묶음 (출력은 fp32 logits)
+        model, precision, channels_last = apply_precision(
+            model, device,
+            INFER_PRECISION if precision is None else precision,
+            INFER_CHANNELS_LAST if channels_last is None else channels_last,
+        )
+
     # --------------------------------------------------
     # 7) 번들로 묶기
     # --------------------------------------------------
-    _bundle = ModelBundle(
+    bundle = ModelBundle(
         model=model,
         device=device,
         class_names=class_names,
+        img_size=img_size,
+        preprocess=get_preprocessor(img_size),
+        arch=arch,
+        ckpt_sha256=ckpt_sha256,
+        ckpt_path=str(ckpt_path),
+        quantize=quantize,
+        precision=precision,
+        channels_last=channels_last,
     )
 
     # --------------------------------------------------
@@ -238,20 +502,25 @@ def get_model_bundle() -> ModelBundle:
         f"[HaneulGyeol] Model loaded | "
         f"arch={arch}, "
         f"num_classes={num_classes}, "
+        f"img_size={img_size}, "
         f"device={device}"
+        + (f", quantize={quantize}" if quantize else "")
+        + (f", precision={precision}" if precision != "fp32" else "")
+        + (", channels_last" if channels_last else "")
     )
 
-    return _bundle
+    return bundle
 
-from torchvision import models
 import torch.nn as nn
 
-def build_convnext_tiny(num_classes: int) -> torch.nn.Module:
+def build_convnext_tiny(num_classes: int, pretrained: bool = False) -> torch.nn.Module:
     """
     ConvNeXt-Tiny backbone. classifier 마지막 Linear를 num_classes로 교체.
-    torchvision 버전에 따라 weights enum이 다를 수 있으므로 weights=None 사용.
+    torchvision 버전에 따라 weights enum이 다를 수 있으므로 "DEFAULT" 문자열 / None 사용.
     """
-    model = models.convnext_tiny(weights=None)
+    from torchvision import models
+
+    model = models.convnext_tiny(weights="DEFAULT" if pretrained else None)
 
     # torchvision convnext는 classifier가 Sequential로 되어있고 마지막이 Linear인 경우가 많음
     if isinstance(model.classifier, nn.Sequential):
@@ -270,3 +539,75 @@ def build_convnext_tiny(num_classes: int) -> torch.nn.Module:
         raise RuntimeError("Unexpected ConvNeXt classifier type.")
 
     return model
+
+
+def _replace_last_linear(head: nn.Sequential, num_classes: int):
+    """classifier Sequential의 마지막 Linear를 num_classes 출력으로 교체 (MobileNetV3 / EfficientNet)."""
+    for i in range(len(head) - 1, -1, -1):
+        if isinstance(head[i], nn.Linear):
+            head[i] = nn.Linear(head[i].in_features, num_classes)
+            return
+    raise RuntimeError("Could not find Linear layer in classifier.")
+
+
+def build_mobilenet_v3_large(num_classes: int, pretrained: bool = False) -> torch.nn.Module:
+    """MobileNetV3-Large (train_distill.py 학생 모델, CPU 서빙용)."""
+    from torchvision import models
+
+    model = models.mobilenet_v3_large(weights="DEFAULT" if pretrained else None)
+    _replace_last_linear(model.classifier, num_classes)
+    return model
+
+
+def build_mobilenet_v3_small(num_classes: int, pretrained: bool = False) -> torch.nn.Module:
+    from torchvision import models
+
+    model = models.mobilenet_v3_small(weights="DEFAULT" if pretrained else None)
+    _replace_last_linear(model.classifier, num_classes)
+    return model
+
+
+def build_efficientnet_b0(num_classes: int, pretrained: bool = False) -> torch.nn.Module:
+    from torchvision import models
+
+    model = models.efficientnet_b0(weights="DEFAULT" if pretrained else None)
+    _replace_last_linear(model.classifier, num_classes)
+    return model
+
+
+def build_resnet18_pruned(num_classes: int, pretrained: bool = False, widths=None) -> torch.nn.Module:
+    """prune.py 결과: BasicBlock 안쪽 채널 수가 widths인 ResNet18."""
+    from prune import set_widths
+
+    return set_widths(build_resnet18(num_classes), "resnet18", widths)
+
+
+def build_convnext_tiny_pruned(num_classes: int, pretrained: bool = False, widths=None) -> torch.nn.Module:
+    """prune.py 결과: CNBlock MLP hidden 크기가 widths인 ConvNeXt-Tiny."""
+    from prune import set_widths
+
+    return set_widths(build_convnext_tiny(num_classes), "convnext_tiny", widths)
+
+
+# 체크포인트 "arch" → 모델 생성 함수 (새 구조는 여기에 등록하면 서버/평가/내보내기에서 모두 로드 가능)
+MODEL_BUILDERS = {
+    "resnet18": build_resnet18,
+    "resnet-18": build_resnet18,
+    "convnext_tiny": build_convnext_tiny,
+    "convnext-tiny": build_convnext_tiny,
+    "convnexttiny": build_convnext_tiny,
+    "mobilenet_v3_large": build_mobilenet_v3_large,
+    "mobilenet_v3_small": build_mobilenet_v3_small,
+    "efficientnet_b0": build_efficientnet_b0,
+    "resnet18_pruned": build_resnet18_pruned,
+    "convnext_tiny_pruned": build_convnext_tiny_pruned,
+}
+
+
+def build_model(arch: str, num_classes: int, pretrained: bool = False,
+                cfg: Optional[dict] = None) -> torch.nn.Module:
+    """cfg: 체크포인트의 arch_cfg (구조 파라미터, 예: pruned 모델의 widths)를 builder에 그대로 전달."""
+    builder = MODEL_BUILDERS.get((arch or "").lower())
+    if builder is None:
+        raise RuntimeError(f"Unsupported architecture in checkpoint: {arch}")
+    return builder(num_classes=num_classes, pretrained=pretrained, **(cfg or {}))
@@ -0,0 +1,182 @@
+# AIModel/precision.py
+"""
+추론 정밀도 / 메모리 레이아웃.
+
+- INFER_PRECISION=fp32 | bf16 | fp16
+    bf16 : autocast(bfloat16) — CPU(AVX512-BF16/AMX)와 CUDA(Ampere+)
+    fp16 : autocast(float16) — CUDA 전용 (CPU에서는 무시하고 fp32)
+- INFER_CHANNELS_LAST=1 : 가중치/입력을 channels_last(NHWC)로 → conv 커널이 더 빠른 경우가 많음
+
+load_model_bundle이 eager 모델을 InferenceModel로 감싸므로 api / predict_bulk / evaluate /
+predict.py 모두 같은 설정으로 돌아간다 (출력 logits는 항상 fp32).
+predict_utils.predict_image는 넘겨받은 모델을 그대로 쓰므로 감싼 모델을 넘길 것.
+TorchScript / ONNX / int8 양자화 모델에는 적용하지 않음.
+
+호스트별로 가장 빠르면서 안전한 설정 고르기 (test split 정확도 drift + 지연 시간):
+  python precision.py --ckpt outputs/cloud_model_best.pt
+  python precision.py --ckpt outputs/cloud_model_best.pt --cache_dir splits/ccsn_cache --max_drop 0.005
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Tuple
+
+import torch
+import torch.nn as nn
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+INFER_PRECISION = os.getenv("INFER_PRECISION", "fp32").lower()
+INFER_CHANNELS_LAST = os.getenv("INFER_CHANNELS_LAST", "0") == "1"
+
+PRECISIONS = ("fp32", "bf16", "fp16")
+DTYPES = {"bf16": torch.bfloat16, "fp16": torch.float16}
+
+
+@lru_cache(maxsize=None)
+def resolve_precision(precision: str, device: str) -> str:
+    # 캐시: 모델을 여러 번 로드해도 경고는 한 번만
+    precision = (precision or "fp32").lower()
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unsupported INFER_PRECISION: {precision} (choose from {PRECISIONS})")
+    if precision == "fp16" and not str(device).startswith("cuda"):
+        print(f"[HaneulGyeol] INFER_PRECISION=fp16 ignored on device={device} (CUDA only, use bf16 on CPU)")
+        return "fp32"
+    return precision
+
+
+def autocast(device: str, precision: str):
+    """fp32면 아무것도 하지 않는 컨텍스트."""
+    if precision == "fp32":
+        return contextlib.nullcontext()
+    device_type = "cuda" if str(device).startswith("cuda") else "cpu"
+    return torch.autocast(device_type=device_type, dtype=DTYPES[precision])
+
+
+class InferenceModel(nn.Module):
+    """정밀도/레이아웃을 forward에 묶은 래퍼. 호출 방식(model(x) -> logits)은 그대로."""
+
+    def __init__(self, model: nn.Module, device: str, precision: str = "fp32", channels_last: bool = False):
+        super().__init__()
+        self.model = model
+        self.device = device
+        self.precision = precision
+        self.channels_last = channels_last
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        if self.channels_last and x.dim() == 4:
+            x = x.contiguous(memory_format=torch.channels_last)
+        with autocast(self.device, self.precision):
+            out = self.model(x)
+        return out.float()
+
+
+def apply_precision(model: nn.Module, device: str, precision: str = INFER_PRECISION,
+                    channels_last: bool = INFER_CHANNELS_LAST) -> Tuple[nn.Module, str, bool]:
+    """반환: (감싼 모델, 실제 적용된 precision, channels_last). 이미 감싼 모델은 그대로."""
+    if isinstance(model, InferenceModel):
+        return model, model.precision, model.channels_last
+    precision = resolve_precision(precision, device)
+    if precision == "fp32" and not channels_last:
+        return model, precision, False
+    if channels_last:
+        model = model.to(memory_format=torch.channels_last)
+    return InferenceModel(model, device, precision, channels_last).eval(), precision, channels_last
+
+
+def precision_tag(precision: str, channels_last: bool) -> str:
+    """model_id 등에 붙이는 접미사 (기본 fp32/NCHW면 빈 문자열)."""
+    tag = "" if precision == "fp32" else precision
+    return tag + ("-cl" if channels_last else "")
+
+
+# -----------------------
+# Report: drift + latency
+# -----------------------
+def _latency_ms(model, x: torch.Tensor, device: str, iters: int) -> float:
+    times = []
+    with torch.inference_mode():
+        model(x)  # warm-up
+        for _ in range(iters):
+            t0 = time.perf_counter()
+            model(x)
+            if str(device).startswith("cuda"):
+                torch.cuda.synchronize()
+            times.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(times)
+
+
+def main():
+    from evaluate import SharedInputs, load_split_images
+    from model_loader_HF import load_model_bundle
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ckpt", type=str, default=str(PROJECT_DIR / "outputs" / "cloud_model_best.pt"))
+    parser.add_argument("--data_dir", type=str, default=str(PROJECT_DIR / "splits" / "ccsn_split"))
+    parser.add_argument("--cache_dir", type=str, default="")
+    parser.add_argument("--split", type=str, default="test")
+    parser.add_argument("--sky_crop", type=float, default=0.0)
+    parser.add_argument("--device", type=str, default=None)
+    parser.add_argument("--precisions", nargs="+", default=None, choices=PRECISIONS,
+                        help="default: fp32 bf16 (+fp16 on CUDA)")
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--iters", type=int, default=20)
+    parser.add_argument("--max_drop", type=float, default=0.005, help="allowed top-1 drop vs fp32")
+    parser.add_argument("--min_agree", type=float, default=0.99, help="required top-1 agreement with fp32")
+    args = parser.parse_args()
+
+    base = load_model_bundle(args.ckpt, device=args.device, precision="fp32", channels_last=False)
+    device = base.device
+    precisions = args.precisions or (["fp32", "bf16", "fp16"] if str(device).startswith("cuda") else ["fp32", "bf16"])
+
+    classes, labels, images = load_split_images(args, base.img_size)
+    x_all = SharedInputs(images, args.sky_crop).get(base.img_size)
+    remap = torch.tensor([base.class_names.index(c) for c in classes])
+    y_all = remap[torch.tensor(labels)]
+    print(f"📦 {args.split}: {len(images)} images | arch={base.arch} img={base.img_size} device={device}")
+
+    def predict_all(model):
+        outs = []
+        with torch.inference_mode():
+            for i in range(0, len(x_all), 32):
+                outs.append(model(x_all[i:i + 32].to(device)).float().cpu())
+        return torch.softmax(torch.cat(outs), dim=1)
+
+    ref = predict_all(base.model)
+    ref_top1 = ref.argmax(1)
+
+    keys = ["precision", "ch_last", "top1", "drop", "agree", "max|dp|"] + [f"b{b} ms" for b in args.batch_sizes] + ["safe"]
+    print(" | ".join(f"{k:>9}" for k in keys))
+    rows = []
+    for precision in precisions:
+        for cl in (False, True):
+            model, applied, cl = apply_precision(base.model, device, precision, cl)
+            if applied != precision:
+                continue
+            probs = predict_all(model)
+            top1 = (probs.argmax(1) == y_all).float().mean().item()
+            drop = (ref_top1 == y_all).float().mean().item() - top1
+            agree = (probs.argmax(1) == ref_top1).float().mean().item()
+            max_dp = (probs - ref).abs().max().item()
+            lat = [_latency_ms(model, x_all[:b].to(device), device, args.iters) for b in args.batch_sizes]
+            safe = drop <= args.max_drop and agree >= args.min_agree
+            rows.append((precision, cl, lat, safe))
+            vals = [precision, int(cl), f"{top1:.4f}", f"{drop:+.4f}", f"{agree:.4f}", f"{max_dp:.4f}"] \
+                + [f"{v:.1f}" for v in lat] + ["yes" if safe else "NO"]
+            print(" | ".join(f"{v:>9}" for v in vals))
+            # 다음 조합을 위해 레이아웃 원상복구 (apply_precision은 가중치를 제자리에서 변환)
+            base.model.to(memory_format=torch.contiguous_format)
+
+    safe_rows = [r for r in rows if r[3]]
+    if safe_rows:
+        best = min(safe_rows, key=lambda r: r[2][-1])
+        print(f"\n✅ fastest safe setting (b{args.batch_sizes[-1]}): "
+              f"INFER_PRECISION={best[0]} INFER_CHANNELS_LAST={int(best[1])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 import sys
 from pathlib import Path
 import torch
-import torch.nn as nn
-from torchvision import transforms, models
 from PIL import Image
 
+from precision import apply_precision
+from preprocess import get_transform
+
 CLOUD_DESC = {
     "Ac": "고적운: 중층에 나타나는 작은 구름 덩어리들이 물결처럼 배열된 구름",
     "As": "고층운: 하늘을 넓게 덮는 회색 또는 푸른빛의 얇은 층구름",
@@ -25,16 +26,10 @@ DEFAULT_MODEL = PROJECT_DIR / "outputs" / "cloud_model_fast.pt"  # fallback
 device = "cuda" if torch.cuda.is_available() else "cpu"
 
 
-def build_model(arch: str, num_classes: int):
-    arch = (arch or "").lower()
-    if arch == "convnext_tiny":
-        m = models.convnext_tiny(weights=None)
-        m.classifier[2] = nn.Linear(m.classifier[2].in_features, num_classes)
-        return m
-    # fallback: resnet18
-    m = models.resnet18(weights=None)
-    m.fc = nn.Linear(m.fc.in_features, num_classes)
-    return m
+def build_model(arch: str, num_classes: int, cfg=None):
+    # 모델 구조는 서버와 같은 레지스트리 (model_loader_HF.MODEL_BUILDERS, cfg = 체크포인트 arch_cfg)
+    from model_loader_HF import build_model as build_registered
+    return build_registered(arch or "resnet18", num_classes, cfg=cfg)
 
 
 def load_checkpoint(model_path: Path):
@@ -53,18 +48,13 @@ def load_checkpoint(model_path: Path):
     classes = ckpt["classes"]
     img_size = int(ckpt.get("img_size", 224))
     arch = ckpt.get("arch", "convnext_tiny")
-    model = build_model(arch, len(classes))
+    model = build_model(arch, len(classes), ckpt.get("arch_cfg"))
     model.load_state_dict(ckpt["model_state"])
     return model, classes, img_size, arch
 
 
 def make_tf(img_size: int):
-    return transforms.Compose([
-        transforms.Resize(int(img_size * 1.15)),
-        transforms.CenterCrop(img_size),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=[0.485,0.456,0.406], std=[0.229,0.224,0.225]),
-    ])
+    return get_transform(img_size)
 
 
 def predict_image(model, classes, tf, img_path: Path, topk=3):
@@ -87,18 +77,33 @@ def predict_image(model, classes, tf, img_path: Path, topk=3):
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python predict.py <image_path> [model_path(optional)]")
+        print("       python predict.py <image_dir> [model_path(optional)] [predict_bulk.py options]  (bulk mode)")
         sys.exit(1)
 
+    # 폴더가 들어오면 대량 모드 (모델 한 번 로드 + 배치 추론 + CSV/JSONL, predict_bulk.py)
+    if Path(sys.argv[1]).is_dir():
+        from predict_bulk import main as bulk_main
+
+        # 예전 형식 `predict.py <dir> model.pt` → 두 번째 인자는 입력이 아니라 --ckpt
+        if (len(sys.argv) >= 3 and Path(sys.argv[2]).suffix in (".pt", ".pth")
+                and "--ckpt" not in sys.argv and not any(a.startswith("--ckpt=") for a in sys.argv)):
+            sys.argv[2:3] = ["--ckpt", sys.argv[2]]
+        bulk_main()
+        sys.exit(0)
+
     img_path = Path(sys.argv[1])
     model_path = Path(sys.argv[2]) if len(sys.argv) >= 3 else DEFAULT_MODEL
 
     model, classes, img_size, arch = load_checkpoint(model_path)
     model.to(device)
+    # INFER_PRECISION=bf16|fp16, INFER_CHANNELS_LAST=1 (서버와 같은 설정)
+    model, precision, channels_last = apply_precision(model, device)
     tf = make_tf(img_size)
 
     results = predict_image(model, classes, tf, img_path, topk=3)
 
-    print(f"\n🌥️ Model: {arch} | img_size={img_size} | device={device}")
+    print(f"\n🌥️ Model: {arch} | img_size={img_size} | device={device} | precision={precision}"
+          + (" channels_last" if channels_last else ""))
     print("🌥️ 구름 분류 결과 (Top-3):\n")
     for rank, (label, prob) in enumerate(results, 1):
         desc = CLOUD_DESC.get(label, "설명 없음")
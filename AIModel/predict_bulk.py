@@ -0,0 +1,228 @@
+# AIModel/predict_bulk.py
+"""
+대량 분류 (보관된 하늘 사진 수만 장 라벨링용).
+
+predict.py는 이미지 1장마다 프로세스를 새로 띄우고 체크포인트를 다시 읽지만,
+여기서는 모델을 한 번만 올리고:
+- 폴더(재귀) / 파일 목록(--list, 한 줄에 경로 하나)에서 이미지 수집
+- DataLoader 워커에서 병렬 디코딩 (JPEG draft + fused 전처리)
+- 배치 추론 (--amp: CUDA는 fp16, CPU는 bf16 autocast)
+- 결과를 배치마다 CSV / JSONL로 바로 기록 (--out 확장자로 형식 결정)
+- 중단 후 같은 명령을 다시 실행하면 이미 기록된 경로는 건너뛰고 이어서 처리 (--overwrite로 처음부터)
+- 진행 중 / 종료 시 images/s 출력
+
+사용:
+  python predict_bulk.py /data/sky_archive --ckpt outputs/cloud_model_best.pt --out outputs/archive.csv
+  python predict_bulk.py --list paths.txt --out outputs/archive.jsonl --batch_size 128 --amp
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterable, List, Set
+
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+from predictor import confidence_level
+from preprocess import get_preprocessor
+
+PROJECT_DIR = Path(__file__).resolve().parent
+ALLOWED_EXT = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+
+# -----------------------
+# Inputs
+# -----------------------
+def collect_paths(inputs: Iterable[str], list_file: str = "") -> List[str]:
+    paths: List[str] = []
+    for inp in inputs:
+        p = Path(inp)
+        if p.is_dir():
+            paths += [str(q) for q in sorted(p.rglob("*")) if q.suffix.lower() in ALLOWED_EXT]
+        elif p.is_file():
+            paths.append(str(p))
+        else:
+            print(f"[HaneulGyeol] skip (not found): {p}")
+    if list_file:
+        with open(list_file, encoding="utf-8") as f:
+            paths += [line.strip() for line in f if line.strip()]
+    # 같은 파일이 여러 번 들어와도 한 번만 (순서 유지)
+    return list(dict.fromkeys(paths))
+
+
+class ImagePathDataset(Dataset):
+    """경로 → (입력 텐서, 인덱스, 에러 메시지). 디코딩 실패는 에러로 넘겨서 전체 작업을 멈추지 않음."""
+
+    def __init__(self, paths: List[str], img_size: int):
+        self.paths = paths
+        self.img_size = int(img_size)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, i):
+        try:
+            with open(self.paths[i], "rb") as f:
+                x = get_preprocessor(self.img_size).from_bytes(f.read())
+            return x, i, ""
+        except Exception as e:
+            return None, i, str(e) or e.__class__.__name__
+
+
+def collate(batch):
+    ok = [(x, i) for x, i, err in batch if x is not None]
+    failed = [(i, err) for x, i, err in batch if x is None]
+    x = torch.stack([x for x, _ in ok]) if ok else None
+    return x, [i for _, i in ok], failed
+
+
+# -----------------------
+# Output (CSV / JSONL, resumable)
+# -----------------------
+class ResultWriter:
+    """
+    배치마다 append + flush.
+    resume: 기존 파일의 완전한 줄만 남기고(중간에 끊긴 마지막 줄 제거) 기록된 경로 집합을 돌려줌.
+    """
+
+    def __init__(self, path: str, topk: int, overwrite: bool = False):
+        self.path = Path(path)
+        self.topk = topk
+        self.fmt = "jsonl" if self.path.suffix.lower() in (".jsonl", ".json") else "csv"
+        self.fields = ["path"] + [f"{k}{r}" for r in range(1, topk + 1) for k in ("top", "prob")] \
+            + ["confidence_level", "error"]
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if overwrite and self.path.exists():
+            self.path.unlink()
+        self.done: Set[str] = self._load_done()
+
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        self.f = open(self.path, "a", newline="", encoding="utf-8")
+        self.csv = csv.DictWriter(self.f, fieldnames=self.fields) if self.fmt == "csv" else None
+        if self.csv is not None and new_file:
+            self.csv.writeheader()
+
+    def _load_done(self) -> Set[str]:
+        if not self.path.exists():
+            return set()
+        raw = self.path.read_bytes()
+        cut = raw.rfind(b"\n") + 1
+        if cut < len(raw):
+            # 마지막 줄이 기록 도중 끊김 → 잘라내고 그 이미지는 다시 처리
+            with open(self.path, "r+b") as f:
+                f.truncate(cut)
+        text = raw[:cut].decode("utf-8")
+        if self.fmt == "jsonl":
+            return {json.loads(line)["path"] for line in text.splitlines() if line.strip()}
+        return {row["path"] for row in csv.DictReader(text.splitlines())}
+
+    def write(self, rows: List[dict]):
+        for r in rows:
+            if self.fmt == "jsonl":
+                self.f.write(json.dumps(r, ensure_ascii=False) + "\n")
+            else:
+                flat = {"path": r["path"], "confidence_level": r.get("confidence_level", ""),
+                        "error": r.get("error", "")}
+                for rank, p in enumerate(r.get("predictions", []), 1):
+                    flat[f"top{rank}"], flat[f"prob{rank}"] = p["code"], p["prob"]
+                self.csv.writerow(flat)
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+# -----------------------
+# Main
+# -----------------------
+def main():
+    from model_loader_HF import load_model_bundle
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputs", nargs="*", help="image files or directories (recursive)")
+    parser.add_argument("--list", type=str, default="", help="text file with one image path per line")
+    parser.add_argument("--ckpt", type=str, default=str(PROJECT_DIR / "outputs" / "cloud_model_best.pt"))
+    parser.add_argument("--out", type=str, default=str(PROJECT_DIR / "outputs" / "bulk_predictions.csv"),
+                        help=".csv or .jsonl")
+    parser.add_argument("--batch_size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1))
+    parser.add_argument("--topk", type=int, default=3)
+    parser.add_argument("--amp", action="store_true", help="mixed precision (fp16 on CUDA, bf16 on CPU)")
+    parser.add_argument("--device", type=str, default=None)
+    parser.add_argument("--overwrite", action="store_true", help="ignore existing output and start over")
+    parser.add_argument("--log_every", type=int, default=20, help="progress line every N batches")
+    args = parser.parse_args()
+
+    paths = collect_paths(args.inputs, args.list)
+    if not paths:
+        parser.error("no input images (give directories/files or --list)")
+
+    writer = ResultWriter(args.out, args.topk, overwrite=args.overwrite)
+    todo = [p for p in paths if p not in writer.done]
+    print(f"📦 images: {len(paths)} | already done: {len(paths) - len(todo)} | todo: {len(todo)} -> {args.out}")
+    if not todo:
+        writer.close()
+        return
+
+    b = load_model_bundle(args.ckpt, device=args.device)
+    classes = b.class_names
+    topk = min(args.topk, len(classes))
+    use_cuda = str(b.device).startswith("cuda")
+    amp_dtype = torch.float16 if use_cuda else torch.bfloat16
+    amp = args.amp and b.backend == "eager"
+
+    loader = DataLoader(
+        ImagePathDataset(todo, b.img_size),
+        batch_size=args.batch_size,
+        shuffle=False,
+        num_workers=args.workers,
+        collate_fn=collate,
+        pin_memory=use_cuda,
+        persistent_workers=args.workers > 0,
+        prefetch_factor=4 if args.workers > 0 else None,
+    )
+
+    n_done = n_err = 0
+    t_start = time.perf_counter()
+    try:
+        for step, (x, idx, failed) in enumerate(loader, 1):
+            rows = [{"path": todo[i], "error": err} for i, err in failed]
+
+            if x is not None:
+                with torch.inference_mode(), torch.autocast(
+                        device_type="cuda" if use_cuda else "cpu", dtype=amp_dtype, enabled=amp):
+                    logits = b.model(x.to(b.device, non_blocking=True))
+                probs = torch.softmax(logits.float(), dim=1)
+                values, indices = probs.topk(topk, dim=1)
+
+                for i, vs, ks in zip(idx, values.tolist(), indices.tolist()):
+                    p2 = vs[1] if len(vs) > 1 else 0.0
+                    rows.append({
+                        "path": todo[i],
+                        "predictions": [{"code": classes[k], "prob": round(v, 4)} for v, k in zip(vs, ks)],
+                        "confidence_level": confidence_level(vs[0], p2),
+                    })
+
+            writer.write(rows)
+            n_done += len(rows)
+            n_err += len(failed)
+
+            if step % args.log_every == 0:
+                el = time.perf_counter() - t_start
+                print(f"  {n_done}/{len(todo)} | {n_done / el:.1f} images/s | errors={n_err}")
+    except KeyboardInterrupt:
+        print("\n⛔ interrupted — rerun the same command to resume")
+    finally:
+        writer.close()
+
+    el = time.perf_counter() - t_start
+    print(f"✅ done {n_done} images in {el:.1f}s | {n_done / max(el, 1e-9):.1f} images/s "
+          f"| errors={n_err} | arch={b.arch} device={b.device} amp={amp}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,9 @@ import torch
 from PIL import Image
 from torchvision import transforms
 
+from preprocess import get_preprocessor, get_transform
+from tta import build_views, tta_views
+
 
 @dataclass
 class Prediction:
@@ -26,15 +29,7 @@ def build_infer_transform() -> transforms.Compose:
     학습 시 사용한 mean/std가 따로 있으면 그걸로 맞추는 게 제일 좋음.
     일반적으로 ImageNet pretrained 기준이면 아래가 표준.
     """
-    return transforms.Compose([
-        transforms.Resize(256),
-        transforms.CenterCrop(224),
-        transforms.ToTensor(),
-        transforms.Normalize(
-            mean=[0.485, 0.456, 0.406],
-            std=[0.229, 0.224, 0.225],
-        ),
-    ])
+    return get_transform(224, resize=256)
 
 
 @torch.inference_mode()
@@ -47,18 +42,26 @@ def predict_image(
     low_conf_threshold: float = 0.45,
     mix_gap_threshold: float = 0.10,
     entropy_threshold: float = 2.0,
+    tta: int = 1,
 ) -> PredictResponse:
     """
     - top1/top3 반환
     - 불확실/혼합 가능성 플래그 제공
+    - tta > 1: tta.py의 view(flip/sky crop/모서리 crop) tta개를 한 번의 forward로 → logits 평균
+    - model은 그대로 호출만 함: INFER_PRECISION / INFER_CHANNELS_LAST를 쓰려면 로드할 때 한 번
+      적용한 모델을 넘길 것 (load_model_bundle().model 또는 precision.apply_precision 결과)
     """
     if image.mode != "RGB":
         image = image.convert("RGB")
 
-    tfm = build_infer_transform()
-    x = tfm(image).unsqueeze(0).to(device)
+    # build_infer_transform()과 같은 Resize(256)/CenterCrop(224)를 fused 경로로
+    n = tta_views(tta)
+    if n > 1:
+        x = build_views(image, 224, n, resize=256).to(device)
+    else:
+        x = get_preprocessor(224, resize=256)(image).unsqueeze(0).to(device)
 
-    logits = model(x)
+    logits = model(x).mean(dim=0, keepdim=True)
     probs = torch.softmax(logits, dim=1)[0]  # (C,)
 
     # TopK
@@ -86,6 +89,7 @@ def predict_image(
         "possible_mixed_cloud": is_mixed,
         "high_entropy": is_high_entropy,
         "entropy": entropy,
+        "tta_views": n,
         "thresholds": {
             "low_conf_threshold": low_conf_threshold,
             "mix_gap_threshold": mix_gap_threshold,
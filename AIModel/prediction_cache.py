@@ -0,0 +1,192 @@
+# AIModel/prediction_cache.py
+"""
+같은 이미지가 다시 들어오면(재시도, 공유 갤러리 사진 등) 디코딩/추론 없이 결과를 돌려주는 캐시.
+
+- 키: 이미지 바이트 해시 (+ 요청 옵션) / 네임스페이스: 모델 식별자(체크포인트 해시, arch, img_size)
+- 메모리: LRU (PRED_CACHE_SIZE개), 선택적 TTL (PRED_CACHE_TTL초, 0이면 만료 없음)
+- 디스크(선택): PRED_CACHE_DIR/<model_id>/ab/abcdef....json
+- bind(model_id)로 모델이 바뀐 걸 감지하면 메모리 캐시를 비움 (디스크는 model_id별 폴더라 섞이지 않음)
+- async 핸들러에서는 aget/aput: 메모리 LRU는 그 자리에서, 디스크 파일 읽기/쓰기는 asyncio.to_thread로
+  (이벤트 루프가 파일 I/O에 막히지 않음; 카운터/LRU는 루프 스레드에서만 바뀜)
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+PRED_CACHE_SIZE = int(os.getenv("PRED_CACHE_SIZE", "1024"))  # 0이면 캐시 끔
+PRED_CACHE_TTL = float(os.getenv("PRED_CACHE_TTL", "0"))
+PRED_CACHE_DIR = os.getenv("PRED_CACHE_DIR")  # 예: ./pred_cache
+
+
+class PredictionCache:
+    def __init__(self, max_items: int = PRED_CACHE_SIZE, ttl: float = PRED_CACHE_TTL,
+                 disk_dir: Optional[str] = PRED_CACHE_DIR):
+        self.max_items = max(0, int(max_items))
+        self.ttl = max(0.0, float(ttl))
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.model_id: Optional[str] = None
+        self._mem: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_items > 0 or self.disk_dir is not None
+
+    # --------------------------------------------------
+    # model identity
+    # --------------------------------------------------
+    def bind(self, model_id: str):
+        """현재 모델 식별자를 알려줌. 이전과 다르면 메모리 캐시를 비운다."""
+        if model_id == self.model_id:
+            return
+        if self.model_id is not None:
+            self.invalidations += 1
+        self._mem.clear()
+        self.model_id = model_id
+
+    @staticmethod
+    def key(data: bytes, *extra) -> str:
+        h = hashlib.blake2b(data, digest_size=20)
+        for e in extra:
+            h.update(repr(e).encode("utf-8"))
+        return h.hexdigest()
+
+    # --------------------------------------------------
+    # get / put
+    # --------------------------------------------------
+    def _expired(self, ts: float) -> bool:
+        return self.ttl > 0 and (time.time() - ts) > self.ttl
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        if self.disk_dir is None or self.model_id is None:
+            return None
+        return self.disk_dir / self.model_id / key[:2] / f"{key}.json"
+
+    def _get_mem(self, key: str) -> Optional[Any]:
+        item = self._mem.get(key)
+        if item is None:
+            return None
+        ts, value = item
+        if self._expired(ts):
+            del self._mem[key]
+            return None
+        self._mem.move_to_end(key)
+        return value
+
+    def _read_disk(self, path: Path) -> Optional[tuple]:
+        """(mtime, value) 또는 None. 파일만 다루므로 워커 스레드에서 호출해도 안전."""
+        try:
+            if not path.exists():
+                return None
+            ts = path.stat().st_mtime
+            if self._expired(ts):
+                path.unlink(missing_ok=True)
+                return None
+            return ts, json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_disk(path: Path, value: Any):
+        tmp = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 쓰기마다 다른 임시 파일 → 같은 키를 동시에 써도(같은 이미지 동시 업로드) 서로 덮어쓰지 않음
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=path.parent,
+                                             prefix=f".{path.stem}.", suffix=".tmp", delete=False) as f:
+                tmp = f.name
+                f.write(json.dumps(value, ensure_ascii=False))
+            os.replace(tmp, path)
+        except OSError:
+            if tmp is not None:
+                Path(tmp).unlink(missing_ok=True)
+
+    def _finish_get(self, key: str, model_id: Optional[str], item: Optional[tuple]) -> Optional[Any]:
+        if item is None:
+            self.misses += 1
+            return None
+        ts, value = item
+        # 디스크를 읽는 사이 bind()로 모델이 바뀌었으면 메모리에는 넣지 않음
+        if model_id == self.model_id:
+            self._put_mem(key, value, ts)
+        self.hits += 1
+        self.disk_hits += 1
+        return value
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        value = self._get_mem(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        path = self._disk_path(key)
+        return self._finish_get(key, self.model_id, self._read_disk(path) if path is not None else None)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """get과 같지만 디스크 읽기는 워커 스레드에서."""
+        if not self.enabled:
+            return None
+        value = self._get_mem(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        path, model_id = self._disk_path(key), self.model_id
+        item = await asyncio.to_thread(self._read_disk, path) if path is not None else None
+        return self._finish_get(key, model_id, item)
+
+    def _put_mem(self, key: str, value: Any, ts: float):
+        if self.max_items <= 0:
+            return
+        self._mem[key] = (ts, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+            self.evictions += 1
+
+    def put(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        self._put_mem(key, value, time.time())
+        path = self._disk_path(key)
+        if path is not None:
+            self._write_disk(path, value)
+
+    async def aput(self, key: str, value: Any):
+        """put과 같지만 디스크 쓰기는 워커 스레드에서."""
+        if not self.enabled:
+            return
+        self._put_mem(key, value, time.time())
+        path = self._disk_path(key)
+        if path is not None:
+            await asyncio.to_thread(self._write_disk, path, value)
+
+    def clear(self):
+        self._mem.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "model_id": self.model_id,
+            "size": len(self._mem),
+            "max_items": self.max_items,
+            "ttl_sec": self.ttl,
+            "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
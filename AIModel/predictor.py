@@ -1,8 +1,13 @@
 # AIModel/predictor.py
+import time
+from typing import Any, List, Optional, Tuple
+
 from PIL import Image
 import torch
 import torch.nn.functional as F
-from torchvision import transforms
+
+from preprocess import get_preprocessor, get_transform
+from tta import average_logits
 
 # ✅ 운형 코드 -> 한글명/설명 (너 취향대로 길게 늘려도 됨)
 CLOUD_INFO = {
@@ -43,28 +48,39 @@ TIPS = [
 ]
 
 def build_transform(img_size: int):
-    return transforms.Compose([
-        transforms.Resize(int(img_size * 1.15)),
-        transforms.CenterCrop(img_size),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=[0.485,0.456,0.406], std=[0.229,0.224,0.225]),
-    ])
-
-def predict_image(model, meta, img: Image.Image, topk: int = 3):
-    device = meta["device"]
-    img_size = int(meta.get("img_size", 320))
+    # 요청마다 Compose를 새로 만들지 않도록 레지스트리에서 가져옴
+    return get_transform(int(img_size))
 
-    tf = build_transform(img_size)
-    x = tf(img).unsqueeze(0).to(device)
+def preprocess_bytes(data: bytes, img_size: int) -> torch.Tensor:
+    """
+    업로드 바이트 → (1,3,H,W) 입력 텐서.
+    워커 스레드/프로세스에서 호출되므로 모듈 최상위 함수로 둔다(pickle 가능).
+    """
+    # JPEG는 draft 디코딩으로 필요한 해상도까지만 풀어서 처리
+    return get_preprocessor(int(img_size)).from_bytes(data).unsqueeze(0)
 
-    with torch.no_grad():
-        logits = model(x)
-        probs = F.softmax(logits, dim=1)[0]
+def preprocess_bytes_timed(data: bytes, img_size: "int | Tuple[int, ...]") -> Tuple[Any, float, float]:
+    """
+    preprocess_bytes + 단계별 시간(초): (x, decode_s, transform_s).
+    프로세스 워커에서도 시간이 유실되지 않도록 결과와 같이 돌려준다 (/metrics용).
+    img_size가 튜플이면 (cascade.py) 한 번만 디코딩해서 크기별 입력 텐서 튜플을 돌려준다.
+    """
+    sizes = (int(img_size),) if isinstance(img_size, int) else tuple(int(s) for s in img_size)
+    pres = [get_preprocessor(s) for s in sizes]
+    t0 = time.perf_counter()
+    img = max(pres, key=lambda p: p.img_size).decode(data)  # draft는 가장 큰 입력 기준
+    img.load()  # Image.open은 헤더만 읽으므로 실제 디코딩을 여기서
+    t1 = time.perf_counter()
+    xs = tuple(pre(img).unsqueeze(0) for pre in pres)
+    x = xs[0] if isinstance(img_size, int) else xs
+    return x, t1 - t0, time.perf_counter() - t1
 
-    values, indices = probs.topk(topk)
+def build_result(meta, values, indices) -> dict:
+    """top-k 확률/인덱스(파이썬 리스트)를 AISection이 기대하는 결과 dict로 변환."""
+    img_size = int(meta.get("img_size", 320))
 
     preds = []
-    for v, i in zip(values.tolist(), indices.tolist()):
+    for v, i in zip(values, indices):
         code = meta["classes"][i]  # "Cu", "Ac", ...
         info = CLOUD_INFO.get(code, {"ko": code, "desc": "설명 준비 중"})
         preds.append({
@@ -90,3 +106,48 @@ def predict_image(model, meta, img: Image.Image, topk: int = 3):
             "run_name": meta.get("run_name", "unknown"),
         }
     }
+
+def predict_batch(model, meta, x: torch.Tensor, topk: int = 3,
+                  timings: Optional[dict] = None, views: Optional[List[int]] = None) -> list:
+    """
+    이미 전처리된 (N,3,H,W) 텐서를 한 번의 forward로 추론.
+    반환: 이미지별 결과 dict 리스트 (입력 순서 유지)
+    timings를 주면 단계별 시간(초)을 채움: forward / topk / json
+    views를 주면 x는 이미지별 TTA view(tta.py)를 이어 붙인 것 → 이미지별로 logits 평균 후 softmax
+    """
+    device = meta["device"]
+
+    t0 = time.perf_counter()
+    with torch.no_grad():
+        logits = model(x.to(device))
+        if timings is not None and str(device).startswith("cuda"):
+            torch.cuda.synchronize()  # 비동기 실행 시간이 topk로 넘어가지 않도록
+        t1 = time.perf_counter()
+        if views is not None:
+            logits = average_logits(logits, views)
+        probs = F.softmax(logits, dim=1)
+
+    values, indices = probs.topk(topk, dim=1)
+    values, indices = values.tolist(), indices.tolist()
+    t2 = time.perf_counter()
+
+    results = [
+        build_result(meta, v, i)
+        for v, i in zip(values, indices)
+    ]
+    if views is not None:
+        for r, n in zip(results, views):
+            r["meta"]["tta_views"] = n
+
+    if timings is not None:
+        timings["forward"] = t1 - t0
+        timings["topk"] = t2 - t1
+        timings["json"] = time.perf_counter() - t2
+    return results
+
+def predict_image(model, meta, img: Image.Image, topk: int = 3):
+    img_size = int(meta.get("img_size", 320))
+
+    x = get_preprocessor(img_size)(img).unsqueeze(0)
+
+    return predict_batch(model, meta, x, topk=topk)[0]
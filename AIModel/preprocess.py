@@ -0,0 +1,152 @@
+# AIModel/preprocess.py
+"""
+추론용 전처리 모음.
+
+1) get_transform(...)    : 기존 torchvision Compose 파이프라인을 (img_size, sky_crop, normalization)
+                           키로 한 번만 만들어 재사용하는 레지스트리
+2) get_preprocessor(...) : 같은 키의 "fused" 전처리기.
+                           Resize+CenterCrop을 PIL resize(box=...) 한 번으로 합치고,
+                           uint8 → float 변환과 정규화를 한 번의 할당 + in-place 연산으로 처리
+                           (ToTensor / Normalize의 중간 텐서 복사 제거)
+3) FusedPreprocess.decode : JPEG는 draft 모드(DCT 축소 디코딩)로 필요한 해상도까지만 디코딩
+                           → 12MP 휴대폰 사진도 1/2~1/8 크기로 바로 풀어서 CPU/메모리 절약
+                           (PNG/WebP 등은 일반 디코딩으로 폴백)
+"""
+import io
+import math
+import warnings
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+import torch
+from PIL import Image
+
+NORMALIZATIONS = {
+    # ImageNet pretrained 기준 (train.py / train_gpu.py와 동일)
+    "imagenet": ((0.485, 0.456, 0.406), (0.229, 0.224, 0.225)),
+}
+
+# np.asarray(PIL)은 읽기 전용 배열 → from_numpy가 경고하지만, 바로 float로 새로 할당하므로 원본에 쓰지 않음
+warnings.filterwarnings("ignore", message="The given NumPy array is not writable")
+
+RESIZE_RATIO = 1.15  # 학습 val_tf: Resize(int(img*1.15)) → CenterCrop(img)
+
+
+# -----------------------
+# Optional: crop bottom to reduce ground objects (lamp posts, buildings, etc.)
+# -----------------------
+class SkyCrop:
+    def __init__(self, crop_ratio: float):
+        self.crop_ratio = float(crop_ratio)
+
+    def __call__(self, img):
+        if self.crop_ratio <= 0:
+            return img
+        w, h = img.size
+        cut = int(h * self.crop_ratio)
+        # remove bottom cut pixels
+        return img.crop((0, 0, w, max(1, h - cut)))
+
+
+def _resize_size(img_size: int, resize: Optional[int]) -> int:
+    return int(resize) if resize else int(img_size * RESIZE_RATIO)
+
+
+@lru_cache(maxsize=None)
+def get_transform(img_size: int, sky_crop: float = 0.0, normalization: str = "imagenet",
+                  resize: Optional[int] = None) -> "transforms.Compose":
+    """
+    기존 방식(PIL → Tensor → Normalize)의 추론 transform.
+    같은 키로는 항상 같은 객체를 돌려주므로 요청마다 Compose를 새로 만들지 않는다.
+    """
+    # torchvision은 import만 ~2s → fused 경로만 쓰는 서버는 기동 시 불러오지 않음
+    from torchvision import transforms
+
+    mean, std = NORMALIZATIONS[normalization]
+    steps = [SkyCrop(sky_crop)] if sky_crop > 0 else []
+    steps += [
+        transforms.Resize(_resize_size(img_size, resize)),
+        transforms.CenterCrop(img_size),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=list(mean), std=list(std)),
+    ]
+    return transforms.Compose(steps)
+
+
+class FusedPreprocess:
+    """
+    PIL 이미지 → 정규화된 (3,H,W) float32 텐서.
+    get_transform과 같은 결과(리샘플링 반올림 오차 수준)를 더 적은 복사로 만든다.
+    """
+
+    def __init__(self, img_size: int, sky_crop: float = 0.0, normalization: str = "imagenet",
+                 resize: Optional[int] = None):
+        self.img_size = int(img_size)
+        self.sky_crop = float(sky_crop)
+        self.resize = _resize_size(self.img_size, resize)
+
+        mean, std = NORMALIZATIONS[normalization]
+        std_t = torch.tensor(std, dtype=torch.float32).view(3, 1, 1)
+        # (x/255 - mean)/std == x * scale + bias
+        self.scale = 1.0 / (255.0 * std_t)
+        self.bias = -torch.tensor(mean, dtype=torch.float32).view(3, 1, 1) / std_t
+
+    def draft_size(self) -> Tuple[int, int]:
+        """
+        draft에 요청할 최소 (w, h).
+        SkyCrop 후에도 짧은 변이 self.resize 이상이어야 Resize가 축소만 하게 된다.
+        """
+        keep = 1.0 - self.sky_crop if self.sky_crop > 0 else 1.0
+        return self.resize, int(math.ceil(self.resize / keep)) + 1
+
+    def decode(self, data: bytes, draft: bool = True) -> Image.Image:
+        img = Image.open(io.BytesIO(data))
+        if draft and img.format == "JPEG":
+            rw, rh = self.draft_size()
+            # 1/2 이상 줄일 수 있을 때만 (결과 크기는 요청 크기 이상이 되도록 1/2, 1/4, 1/8 중에서 고름)
+            if min(img.size[0] // rw, img.size[1] // rh) >= 2:
+                img.draft("RGB", (rw, rh))
+        return img
+
+    def crop_box(self, w: int, h: int) -> Tuple[float, float, float, float]:
+        """
+        Resize(short side) → CenterCrop에 해당하는 "원본 좌표계"의 영역.
+        이 영역을 img_size로 바로 리샘플하면 중간 리사이즈 이미지가 필요 없다.
+        """
+        if self.sky_crop > 0:
+            h = max(1, h - int(h * self.sky_crop))
+        # Resize: 짧은 변을 self.resize로 (torchvision과 같은 긴 변 계산)
+        if w <= h:
+            rw, rh = self.resize, int(self.resize * h / w)
+        else:
+            rw, rh = int(self.resize * w / h), self.resize
+        sx, sy = w / rw, h / rh
+        # CenterCrop 좌표 (torchvision과 같은 반올림)
+        left = int(round((rw - self.img_size) / 2.0))
+        top = int(round((rh - self.img_size) / 2.0))
+        return (left * sx, top * sy, (left + self.img_size) * sx, (top + self.img_size) * sy)
+
+    def to_uint8(self, img: Image.Image) -> Image.Image:
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        box = self.crop_box(*img.size)
+        return img.resize((self.img_size, self.img_size), Image.BILINEAR, box=box)
+
+    def normalize(self, arr: np.ndarray) -> torch.Tensor:
+        # HWC uint8 → CHW float32 (한 번 할당) → in-place 정규화
+        x = torch.from_numpy(arr).permute(2, 0, 1).to(torch.float32, memory_format=torch.contiguous_format)
+        return x.mul_(self.scale).add_(self.bias)
+
+    def __call__(self, img: Image.Image) -> torch.Tensor:
+        return self.normalize(np.asarray(self.to_uint8(img)))
+
+    def from_bytes(self, data: bytes, draft: bool = True) -> torch.Tensor:
+        return self(self.decode(data, draft=draft))
+
+
+@lru_cache(maxsize=None)
+def get_preprocessor(img_size: int, sky_crop: float = 0.0, normalization: str = "imagenet",
+                     resize: Optional[int] = None) -> FusedPreprocess:
+    """(img_size, sky_crop, normalization) 별로 한 번만 만드는 fused 전처리기."""
+    return FusedPreprocess(img_size, sky_crop=sky_crop, normalization=normalization, resize=resize)
@@ -0,0 +1,309 @@
+# AIModel/prune.py
+"""
+구조적(채널) 가지치기 → 짧은 fine-tuning → 물리적으로 작은 dense 모델로 저장.
+
+0을 채워 넣는 비구조적 sparsity는 CPU dense 커널에서 빨라지지 않으므로,
+잔차(residual) 연결과 무관한 "블록 안쪽" 채널만 통째로 잘라내고 레이어를 좁게 다시 만든다.
+- resnet18      : BasicBlock의 conv1 출력 / bn1 / conv2 입력 채널
+                  중요도 = |bn1.gamma| * conv2 해당 입력 채널 가중치의 L1 (정규화된 활성값이 실제로 기여하는 크기)
+- convnext_tiny : CNBlock MLP의 hidden(4*dim) 유닛 (Linear1 출력 / Linear2 입력) — ConvNeXt 연산의 대부분
+                  중요도 = Linear1 행 L1 * Linear2 열 L1
+블록마다 같은 비율로 자르고 남는 채널 수는 --round_to(기본 8)의 배수로 맞춤 (SIMD/GEMM 효율).
+
+저장 형식은 train_gpu.py와 같고 arch="<원래 arch>_pruned", arch_cfg={"widths": [블록별 채널 수]}
+→ model_loader_HF의 MODEL_BUILDERS가 같은 모양으로 만들어서 로드 (서버/evaluate/export_* 그대로 사용).
+
+리포트 (sparsity 수준별 params / MACs / 지연 시간 / top-1·top-3, test split):
+  python prune.py --ckpt outputs/cloud_model_best.pt --sparsity 0.25 0.5 0.7 --epochs 2
+  python prune.py --ckpt outputs/cloud_model_fast.pt --sparsity 0.5 --cache_dir splits/ccsn_cache
+  LOCAL_MODEL_PATH=outputs/cloud_model_best_pruned50.pt uvicorn api:app
+"""
+import argparse
+import copy
+import csv
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import torch
+import torch.nn as nn
+
+PROJECT_DIR = Path(__file__).resolve().parent
+PRUNED_SUFFIX = "_pruned"
+
+
+def base_arch(arch: str) -> str:
+    """'resnet-18' / 'convnext_tiny_pruned' 등 → 'resnet18' / 'convnext_tiny'."""
+    arch = (arch or "").lower()
+    if arch.endswith(PRUNED_SUFFIX):
+        arch = arch[:-len(PRUNED_SUFFIX)]
+    if arch in ("resnet18", "resnet-18"):
+        return "resnet18"
+    if arch in ("convnext_tiny", "convnext-tiny", "convnexttiny"):
+        return "convnext_tiny"
+    raise RuntimeError(f"Pruning not supported for arch: {arch}")
+
+
+# -----------------------
+# Block surgery
+# -----------------------
+def prunable_blocks(model: nn.Module, arch: str) -> List[nn.Module]:
+    arch = base_arch(arch)
+    if arch == "resnet18":
+        return [blk for layer in (model.layer1, model.layer2, model.layer3, model.layer4) for blk in layer]
+    return [blk for stage in model.features for blk in stage if blk.__class__.__name__ == "CNBlock"]
+
+
+def block_width(block: nn.Module, arch: str) -> int:
+    if base_arch(arch) == "resnet18":
+        return block.conv1.out_channels
+    return block.block[3].out_features
+
+
+def block_importance(block: nn.Module, arch: str) -> torch.Tensor:
+    with torch.no_grad():
+        if base_arch(arch) == "resnet18":
+            return block.bn1.weight.abs() * block.conv2.weight.abs().sum(dim=(0, 2, 3))
+        lin1, lin2 = block.block[3], block.block[5]
+        return lin1.weight.abs().sum(dim=1) * lin2.weight.abs().sum(dim=0)
+
+
+def narrow_block(block: nn.Module, arch: str, width: int, keep: Optional[torch.Tensor] = None):
+    """블록 안쪽 채널을 width개로. keep(남길 채널 인덱스)이 있으면 그 가중치를 복사, 없으면 빈 레이어."""
+    if base_arch(arch) == "resnet18":
+        c1, bn, c2 = block.conv1, block.bn1, block.conv2
+        new_c1 = nn.Conv2d(c1.in_channels, width, c1.kernel_size, stride=c1.stride, padding=c1.padding, bias=False)
+        new_bn = nn.BatchNorm2d(width, eps=bn.eps, momentum=bn.momentum)
+        new_c2 = nn.Conv2d(width, c2.out_channels, c2.kernel_size, stride=c2.stride, padding=c2.padding, bias=False)
+        if keep is not None:
+            with torch.no_grad():
+                new_c1.weight.copy_(c1.weight[keep])
+                for name in ("weight", "bias", "running_mean", "running_var"):
+                    getattr(new_bn, name).copy_(getattr(bn, name)[keep])
+                new_bn.num_batches_tracked.copy_(bn.num_batches_tracked)
+                new_c2.weight.copy_(c2.weight[:, keep])
+        block.conv1, block.bn1, block.conv2 = new_c1, new_bn, new_c2
+        return
+
+    lin1, lin2 = block.block[3], block.block[5]
+    new_l1 = nn.Linear(lin1.in_features, width)
+    new_l2 = nn.Linear(width, lin2.out_features)
+    if keep is not None:
+        with torch.no_grad():
+            new_l1.weight.copy_(lin1.weight[keep])
+            new_l1.bias.copy_(lin1.bias[keep])
+            new_l2.weight.copy_(lin2.weight[:, keep])
+            new_l2.bias.copy_(lin2.bias)
+    block.block[3], block.block[5] = new_l1, new_l2
+
+
+def set_widths(model: nn.Module, arch: str, widths: List[int]) -> nn.Module:
+    """(로더용) 원래 구조를 체크포인트의 arch_cfg["widths"] 모양으로 좁힘. 가중치는 이후 load_state_dict로."""
+    blocks = prunable_blocks(model, arch)
+    if len(widths) != len(blocks):
+        raise RuntimeError(f"arch_cfg widths has {len(widths)} entries, {arch} has {len(blocks)} blocks")
+    for blk, w in zip(blocks, widths):
+        if w != block_width(blk, arch):
+            narrow_block(blk, arch, int(w))
+    return model
+
+
+def prune_model(model: nn.Module, arch: str, sparsity: float, round_to: int = 8) -> Tuple[nn.Module, List[int]]:
+    """블록마다 중요도가 낮은 채널 sparsity 비율을 잘라낸 복사본. 반환: (모델, 블록별 채널 수)."""
+    model = copy.deepcopy(model).cpu()
+    widths = []
+    for blk in prunable_blocks(model, arch):
+        w = block_width(blk, arch)
+        keep_n = int(round(w * (1.0 - sparsity) / round_to)) * round_to
+        keep_n = min(w, max(round_to, keep_n))
+        if keep_n < w:
+            # 원래 채널 순서 유지 (정렬된 인덱스)
+            keep = block_importance(blk, arch).topk(keep_n).indices.sort().values
+            narrow_block(blk, arch, keep_n, keep)
+        widths.append(keep_n)
+    return model, widths
+
+
+# -----------------------
+# Cost
+# -----------------------
+def count_params(model: nn.Module) -> int:
+    return sum(p.numel() for p in model.parameters())
+
+
+@torch.no_grad()
+def count_macs(model: nn.Module, img_size: int) -> int:
+    """Conv2d / Linear의 곱셈-누산 수 (입력 1장 기준, forward hook)."""
+    total = [0]
+
+    def conv_hook(m, inp, out):
+        kh, kw = m.kernel_size
+        total[0] += out.numel() * (m.in_channels // m.groups) * kh * kw
+
+    def linear_hook(m, inp, out):
+        total[0] += out.numel() * m.in_features
+
+    hooks = []
+    for m in model.modules():
+        if isinstance(m, nn.Conv2d):
+            hooks.append(m.register_forward_hook(conv_hook))
+        elif isinstance(m, nn.Linear):
+            hooks.append(m.register_forward_hook(linear_hook))
+    was_training = model.training
+    model.eval()
+    model(torch.zeros(1, 3, img_size, img_size, device=next(model.parameters()).device))
+    model.train(was_training)
+    for h in hooks:
+        h.remove()
+    return total[0]
+
+
+# -----------------------
+# Fine-tuning
+# -----------------------
+def train_loader(args, img_size: int, class_names: List[str]):
+    """train split (train_gpu.py light augmentation), 라벨은 체크포인트 class_names 순서로."""
+    from torch.utils.data import DataLoader
+    from torchvision import datasets
+
+    from preprocess import SkyCrop
+    from train_gpu import train_transform
+
+    tf = train_transform("light", img_size, SkyCrop(args.sky_crop))
+    if args.cache_dir:
+        from dataset_cache import open_split
+        ds = open_split(args.cache_dir, "train", transform=tf)
+    else:
+        ds = datasets.ImageFolder(Path(args.data_dir) / "train", transform=tf)
+    remap = torch.tensor([class_names.index(c) for c in ds.classes])
+    return DataLoader(ds, batch_size=args.batch, shuffle=True, drop_last=True,
+                      num_workers=args.num_workers, persistent_workers=args.num_workers > 0), remap
+
+
+def finetune(model: nn.Module, loader, remap: torch.Tensor, device: str, epochs: int, lr: float) -> nn.Module:
+    from tqdm import tqdm
+
+    from eval_metrics import MetricMeter
+
+    model.to(device).train()
+    crit = nn.CrossEntropyLoss(label_smoothing=0.1)
+    opt = torch.optim.AdamW(model.parameters(), lr=lr, weight_decay=0.05)
+    sched = torch.optim.lr_scheduler.CosineAnnealingLR(opt, T_max=max(1, epochs * len(loader)))
+    meter = MetricMeter(len(remap), device)
+    remap = remap.to(device)
+
+    for epoch in range(1, epochs + 1):
+        meter.reset()
+        for x, y in tqdm(loader, desc=f"  finetune {epoch}/{epochs}"):
+            x = x.to(device, non_blocking=True)
+            y = remap[y.to(device, non_blocking=True)]
+            logits = model(x)
+            loss = crit(logits, y)
+            opt.zero_grad(set_to_none=True)
+            loss.backward()
+            opt.step()
+            sched.step()
+            meter.update(logits, y, loss)
+        m = meter.compute()
+        print(f"  [{epoch}/{epochs}] train_loss={m['loss']:.4f} train_top1={m['top1']:.3f}", flush=True)
+    return model.eval()
+
+
+# -----------------------
+# Report: sparsity levels (test split)
+# -----------------------
+def main():
+    from bench_utils import collect_logits, measure_latency, model_size_mb, split_loader, topk_accuracy
+    from model_loader_HF import file_sha256, load_model_bundle
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ckpt", type=str, default=str(PROJECT_DIR / "outputs" / "cloud_model_best.pt"))
+    parser.add_argument("--sparsity", type=float, nargs="+", default=[0.25, 0.5, 0.7],
+                        help="fraction of inner-block channels removed")
+    parser.add_argument("--round_to", type=int, default=8)
+    parser.add_argument("--epochs", type=int, default=2, help="fine-tuning epochs per level (0 = none)")
+    parser.add_argument("--lr", type=float, default=1e-4)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--sky_crop", type=float, default=0.25, help="fine-tuning SkyCrop (train_gpu.py default)")
+    parser.add_argument("--data_dir", type=str, default=str(PROJECT_DIR / "splits" / "ccsn_split"))
+    parser.add_argument("--cache_dir", type=str, default="",
+                        help="decoded uint8 shard cache from dataset_cache.py (skips JPEG decode every epoch)")
+    parser.add_argument("--num_workers", type=int, default=2)
+    parser.add_argument("--device", type=str, default=None, help="fine-tuning device (latency is measured on CPU)")
+    parser.add_argument("--max_test", type=int, default=0, help="0 = whole test split")
+    parser.add_argument("--lat_batch", type=int, default=8, help="batch size for throughput latency")
+    parser.add_argument("--iters", type=int, default=20)
+    parser.add_argument("--no_save", action="store_true", help="report only, do not write pruned checkpoints")
+    args = parser.parse_args()
+
+    device = args.device or ("cuda" if torch.cuda.is_available() else "cpu")
+    b = load_model_bundle(args.ckpt, device="cpu", precision="fp32", channels_last=False)
+    arch = base_arch(b.arch)
+    test_loader = split_loader(b.img_size, b.class_names, split="test", max_images=args.max_test or None)
+    print(f"📦 test images: {len(test_loader.dataset)} | img_size={b.img_size} | arch={b.arch}")
+
+    if args.epochs > 0:
+        ft_loader, remap = train_loader(args, b.img_size, b.class_names)
+
+    ckpt_sha = file_sha256(args.ckpt)
+    x1 = torch.randn(1, 3, b.img_size, b.img_size)
+    xb = torch.randn(args.lat_batch, 3, b.img_size, b.img_size)
+
+    rows = []
+    ref_top1 = None
+    for sparsity in [0.0] + sorted(s for s in args.sparsity if s > 0):
+        if sparsity == 0:
+            model, widths, name = b.model, None, "dense"
+        else:
+            model, widths = prune_model(b.model, arch, sparsity, args.round_to)
+            name = f"pruned{int(round(sparsity * 100))}"
+            print(f"\n✂️ {name}: widths={widths}", flush=True)
+            if args.epochs > 0:
+                model = finetune(model, ft_loader, remap, device, args.epochs, args.lr)
+            model = model.cpu().eval()
+
+        logits, labels = collect_logits(model, test_loader)
+        top1 = topk_accuracy(logits, labels, 1)
+        ref_top1 = top1 if ref_top1 is None else ref_top1
+        lat1 = measure_latency(model, x1, iters=args.iters)
+        latb = measure_latency(model, xb, iters=max(3, args.iters // 4))
+        rows.append({
+            "variant": name,
+            "params_m": round(count_params(model) / 1e6, 2),
+            "gmacs": round(count_macs(model, b.img_size) / 1e9, 3),
+            "size_mb": round(model_size_mb(model), 2),
+            "lat_b1_p50_ms": round(lat1["p50_ms"], 2),
+            f"lat_b{args.lat_batch}_per_img_ms": round(latb["p50_ms"] / args.lat_batch, 2),
+            "top1": round(top1, 4),
+            "top3": round(topk_accuracy(logits, labels, 3), 4),
+            "drop": round(ref_top1 - top1, 4),
+        })
+
+        if widths is not None and not args.no_save:
+            out = Path(args.ckpt).with_name(f"{Path(args.ckpt).stem}_{name}.pt")
+            torch.save({
+                "model_state": model.state_dict(),
+                "classes": b.class_names,
+                "img_size": b.img_size,
+                "arch": arch + PRUNED_SUFFIX,
+                "arch_cfg": {"widths": widths},
+                "run_name": f"{Path(args.ckpt).stem}_{name}",
+                "pruned_from": {"ckpt": Path(args.ckpt).name, "ckpt_sha256": ckpt_sha, "sparsity": sparsity},
+            }, out)
+            print(f"✅ saved pruned model -> {out}", flush=True)
+
+    keys = list(rows[0].keys())
+    print("\n" + " | ".join(f"{k:>16}" for k in keys))
+    for r in rows:
+        print(" | ".join(f"{str(r[k]):>16}" for k in keys))
+
+    out_path = PROJECT_DIR / "outputs" / f"prune_report_{Path(args.ckpt).stem}.csv"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=keys)
+        w.writeheader()
+        w.writerows(rows)
+    print(f"\n📌 saved report -> {out_path}")
+
+
+if __name__ == "__main__":
+    main()
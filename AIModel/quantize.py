@@ -0,0 +1,170 @@
+# AIModel/quantize.py
+"""
+CPU 배포용 int8 추론 모드.
+
+- dynamic : nn.Linear 가중치를 int8로, 활성값은 실행 시 동적 양자화 (보정 데이터 불필요)
+            ConvNeXt는 블록 안의 MLP(Linear)가 연산 대부분이라 효과가 큼
+- static  : FX graph mode 사후 양자화 (Conv/Linear 모두 int8)
+            splits/ccsn_split/val 이미지로 activation 범위를 보정(calibration)
+            ResNet18처럼 Conv+BN+ReLU 위주 모델에 효과가 큼
+
+서버에서는 model_loader_HF.py의 HF_QUANTIZE 환경변수로 켠다:
+  HF_QUANTIZE=dynamic uvicorn api:app ...
+
+fp32와 비교 리포트(지연 시간/크기/top-1·top-3, test split):
+  python quantize.py --ckpt outputs/cloud_model_best.pt --modes dynamic static
+"""
+import argparse
+import copy
+import csv
+import os
+import warnings
+from pathlib import Path
+from typing import Optional, Tuple
+
+import torch
+import torch.nn as nn
+
+PROJECT_DIR = Path(__file__).resolve().parent
+QUANT_CALIB_DIR = os.getenv("HF_QUANT_CALIB_DIR", str(PROJECT_DIR / "splits" / "ccsn_split" / "val"))
+QUANT_CALIB_IMAGES = int(os.getenv("HF_QUANT_CALIB_IMAGES", "256"))
+
+QUANT_MODES = ("dynamic", "static")
+
+
+def _pick_engine() -> str:
+    engines = torch.backends.quantized.supported_engines
+    for e in ("x86", "fbgemm", "qnnpack"):
+        if e in engines:
+            return e
+    raise RuntimeError(f"No quantized engine available: {engines}")
+
+
+def quantize_dynamic_int8(model: nn.Module) -> nn.Module:
+    model = copy.deepcopy(model).cpu().eval()
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def calib_loader(img_size: int, calib_dir: str = QUANT_CALIB_DIR,
+                 max_images: int = QUANT_CALIB_IMAGES, batch_size: int = 16):
+    """보정용 DataLoader (라벨은 쓰지 않음)."""
+    from torch.utils.data import DataLoader, Subset
+    from torchvision import datasets
+
+    from preprocess import get_transform
+
+    ds = datasets.ImageFolder(calib_dir, transform=get_transform(img_size))
+    if max_images and max_images < len(ds):
+        step = len(ds) / max_images
+        ds = Subset(ds, [int(i * step) for i in range(max_images)])
+    return DataLoader(ds, batch_size=batch_size, shuffle=False)
+
+
+def quantize_static_int8(model: nn.Module, loader, img_size: int) -> nn.Module:
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    engine = _pick_engine()
+    torch.backends.quantized.engine = engine
+
+    model = copy.deepcopy(model).cpu().eval()
+    example = (torch.randn(1, 3, img_size, img_size),)
+
+    with warnings.catch_warnings():
+        # observer 생성 시 reduce_range deprecation 경고가 레이어마다 반복됨
+        warnings.simplefilter("ignore", UserWarning)
+        prepared = prepare_fx(model, get_default_qconfig_mapping(engine), example)
+
+        # observer 버퍼를 in-place로 갱신하므로 inference_mode가 아닌 no_grad 사용
+        with torch.no_grad():
+            for x, _ in loader:
+                prepared(x)
+
+        return convert_fx(prepared)
+
+
+def quantize_model(model: nn.Module, mode: str, img_size: int,
+                   calib_dir: Optional[str] = None) -> Tuple[nn.Module, str]:
+    """
+    반환: (양자화된 모델, 실제 적용된 모드)
+    static인데 보정 데이터가 없으면 dynamic으로 폴백한다 (서버 기동은 막지 않음).
+    """
+    mode = (mode or "").lower()
+    if mode not in QUANT_MODES:
+        raise ValueError(f"Unsupported quantize mode: {mode} (choose from {QUANT_MODES})")
+
+    if mode == "static":
+        calib_dir = calib_dir or QUANT_CALIB_DIR
+        if Path(calib_dir).is_dir():
+            return quantize_static_int8(model, calib_loader(img_size, calib_dir), img_size), "static"
+        print(f"[HaneulGyeol] calibration dir not found: {calib_dir} -> falling back to dynamic int8")
+
+    return quantize_dynamic_int8(model), "dynamic"
+
+
+# -----------------------
+# Report: fp32 vs int8 (test split)
+# -----------------------
+def main():
+    from bench_utils import collect_logits, measure_latency, model_size_mb, split_loader, topk_accuracy
+    from model_loader_HF import load_model_bundle
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ckpt", type=str, default=str(PROJECT_DIR / "outputs" / "cloud_model_best.pt"))
+    parser.add_argument("--modes", nargs="+", default=list(QUANT_MODES), choices=QUANT_MODES)
+    parser.add_argument("--calib_dir", type=str, default=QUANT_CALIB_DIR)
+    parser.add_argument("--max_test", type=int, default=0, help="0 = whole test split")
+    parser.add_argument("--batch", type=int, default=8, help="batch size for throughput latency")
+    parser.add_argument("--iters", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=0, help="torch threads (0 = default)")
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+
+    b = load_model_bundle(args.ckpt, device="cpu", precision="fp32", channels_last=False)
+    loader = split_loader(b.img_size, b.class_names, split="test", max_images=args.max_test or None)
+    print(f"📦 test images: {len(loader.dataset)} | img_size={b.img_size} | arch={b.arch}")
+
+    variants = [("fp32", b.model)]
+    for mode in args.modes:
+        q, applied = quantize_model(b.model, mode, b.img_size, calib_dir=args.calib_dir)
+        variants.append((f"int8-{applied}", q))
+
+    x1 = torch.randn(1, 3, b.img_size, b.img_size)
+    xb = torch.randn(args.batch, 3, b.img_size, b.img_size)
+
+    rows = []
+    ref_pred = None
+    for name, model in variants:
+        logits, labels = collect_logits(model, loader)
+        pred = logits.argmax(1)
+        ref_pred = pred if ref_pred is None else ref_pred
+        lat1 = measure_latency(model, x1, iters=args.iters)
+        latb = measure_latency(model, xb, iters=max(3, args.iters // 4))
+        rows.append({
+            "variant": name,
+            "size_mb": round(model_size_mb(model), 2),
+            "lat_b1_p50_ms": round(lat1["p50_ms"], 2),
+            f"lat_b{args.batch}_per_img_ms": round(latb["p50_ms"] / args.batch, 2),
+            "top1": round(topk_accuracy(logits, labels, 1), 4),
+            "top3": round(topk_accuracy(logits, labels, 3), 4),
+            "agree_fp32": round((pred == ref_pred).float().mean().item(), 4),
+        })
+
+    keys = list(rows[0].keys())
+    print("\n" + " | ".join(f"{k:>16}" for k in keys))
+    for r in rows:
+        print(" | ".join(f"{str(r[k]):>16}" for k in keys))
+
+    out_path = PROJECT_DIR / "outputs" / f"quant_report_{Path(args.ckpt).stem}.csv"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=keys)
+        w.writeheader()
+        w.writerows(rows)
+    print(f"\n📌 saved report -> {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+# AIModel/tests/conftest.py
+"""
+AIModel 스크립트들은 평평한 모듈(`from batcher import ...`)이라 테스트에서도 같은 방식으로 import.
+
+사용 (CPU만, 모델/데이터셋 다운로드 없음):
+  cd AIModel && python -m pytest -q tests
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
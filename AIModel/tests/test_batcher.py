@@ -0,0 +1,187 @@
+# AIModel/tests/test_batcher.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from batcher import MicroBatcher
+from worker_pool import PoolSaturated
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def recording_batcher(**kwargs):
+    """batch_fn 호출마다 받은 item 목록을 기록하고 item * 10을 돌려주는 배처."""
+    calls = []
+
+    def batch_fn(items):
+        calls.append(list(items))
+        return [i * 10 for i in items]
+
+    return MicroBatcher(batch_fn, **kwargs), calls
+
+
+def test_concurrent_submits_share_one_batch_in_order():
+    async def main():
+        b, calls = recording_batcher(max_batch_size=8, max_wait_ms=50)
+        b.start()
+        try:
+            out = await asyncio.gather(*(b.submit(i) for i in range(5)))
+        finally:
+            await b.stop()
+        return out, calls
+
+    out, calls = run(main())
+    assert out == [0, 10, 20, 30, 40]
+    assert calls == [[0, 1, 2, 3, 4]]
+
+
+def test_max_batch_size_splits_batches():
+    async def main():
+        b, calls = recording_batcher(max_batch_size=3, max_wait_ms=50)
+        b.start()
+        try:
+            out = await b.submit_many(list(range(7)))
+        finally:
+            await b.stop()
+        return out, calls, b.stats()
+
+    out, calls, stats = run(main())
+    assert out == [i * 10 for i in range(7)]
+    assert calls == [[0, 1, 2], [3, 4, 5], [6]]
+    assert stats["batches"] == 3 and stats["items"] == 7
+    assert stats["size_hist"] == {"1": 1, "3": 2}
+
+
+def test_single_request_runs_after_max_wait():
+    async def main():
+        b, calls = recording_batcher(max_batch_size=8, max_wait_ms=1)
+        b.start()
+        try:
+            return await asyncio.wait_for(b.submit(4), timeout=5), calls
+        finally:
+            await b.stop()
+
+    out, calls = run(main())
+    assert out == 40
+    assert calls == [[4]]
+
+
+def test_batch_fn_error_is_raised_to_every_caller():
+    def batch_fn(items):
+        raise ValueError("boom")
+
+    async def main():
+        b = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=20)
+        b.start()
+        try:
+            return await asyncio.gather(*(b.submit(i) for i in range(3)), return_exceptions=True)
+        finally:
+            await b.stop()
+
+    out = run(main())
+    assert len(out) == 3
+    assert all(isinstance(e, ValueError) and str(e) == "boom" for e in out)
+
+
+def test_wrong_result_count_is_an_error():
+    async def main():
+        b = MicroBatcher(lambda items: items[:-1], max_batch_size=4, max_wait_ms=20)
+        b.start()
+        try:
+            return await asyncio.gather(b.submit(1), b.submit(2), return_exceptions=True)
+        finally:
+            await b.stop()
+
+    out = run(main())
+    assert all(isinstance(e, RuntimeError) for e in out)
+
+
+def test_full_queue_rejects_without_waiting():
+    started, gate = threading.Event(), threading.Event()
+
+    def batch_fn(items):
+        started.set()
+        gate.wait(5)
+        return [i * 10 for i in items]
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            b = MicroBatcher(batch_fn, max_batch_size=1, max_wait_ms=0, executor=ex, max_queue=2)
+            b.start()
+            try:
+                first = asyncio.ensure_future(b.submit(0))
+                await loop.run_in_executor(None, started.wait, 5)  # forward 중 → 대기열을 비우는 쪽이 없음
+                queued = [asyncio.ensure_future(b.submit(i)) for i in (1, 2)]
+                await asyncio.sleep(0)
+                assert b.stats()["queued"] == 2
+
+                with pytest.raises(PoolSaturated):
+                    await b.submit(99)
+                with pytest.raises(PoolSaturated):
+                    await b.submit_many([7])
+                rejected = b.stats()["rejected"]
+
+                gate.set()
+                return await asyncio.gather(first, *queued), rejected
+            finally:
+                gate.set()
+                await b.stop()
+
+    out, rejected = run(main())
+    assert out == [0, 10, 20]
+    assert rejected == 2
+
+
+def test_submit_before_start_is_an_error():
+    b, _ = recording_batcher()
+    with pytest.raises(RuntimeError):
+        run(b.submit(1))
+
+
+# -----------------------
+# size_fn: 행 수 기준 배치 (TTA 요청은 view 수만큼 차지)
+# -----------------------
+def test_row_budget_carries_overflowing_request_to_next_batch():
+    calls = []
+
+    def batch_fn(items):
+        names = [name for name, _ in items]
+        calls.append(names)
+        return names
+
+    async def main():
+        # item = (이름, 행 수)
+        b = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=20, size_fn=lambda item: item[1])
+        b.start()
+        try:
+            out = await b.submit_many([("a", 1), ("b", 2), ("c", 3), ("d", 1), ("e", 1)])
+        finally:
+            await b.stop()
+        return out, calls, b.stats()
+
+    out, calls, stats = run(main())
+    assert out == ["a", "b", "c", "d", "e"]
+    # a+b = 3행, c(3)는 넘치므로 다음 배치 맨 앞으로 (순서 유지) → c+d = 4행, e
+    assert calls == [["a", "b"], ["c", "d"], ["e"]]
+    assert stats["items"] == 8  # 배치 통계는 forward 행 수
+    assert stats["size_hist"] == {"1": 1, "3": 1, "4": 1}
+    assert stats["queued"] == 0
+
+
+def test_request_larger_than_budget_runs_alone():
+    async def main():
+        b, calls = recording_batcher(max_batch_size=2, max_wait_ms=20, size_fn=lambda item: item)
+        b.start()
+        try:
+            return await b.submit_many([1, 5, 1]), calls
+        finally:
+            await b.stop()
+
+    out, calls = run(main())
+    assert out == [10, 50, 10]
+    assert calls == [[1], [5], [1]]
@@ -0,0 +1,109 @@
+# AIModel/tests/test_cascade.py
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from cascade import Cascade, confidence_score, predict_batch_cascade
+
+HEAVY_CLASSES = ["Ac", "Cu", "St"]
+FAST_CLASSES = ["St", "Ac", "Cu"]  # 같은 클래스, 다른 순서
+
+
+class TableModel:
+    """입력 x[:,0,0,0]을 행 번호로 써서 미리 정한 logits를 돌려주는 가짜 모델 (호출 배치 기록)."""
+
+    def __init__(self, logits):
+        self.logits = torch.tensor(logits, dtype=torch.float32)
+        self.calls = []
+
+    def __call__(self, x):
+        rows = x[:, 0, 0, 0].long()
+        self.calls.append(rows.tolist())
+        return self.logits[rows]
+
+
+def bundle(classes, logits, img_size, arch):
+    return SimpleNamespace(model=TableModel(logits), device="cpu", class_names=classes,
+                           img_size=img_size, arch=arch, model_id=f"{arch}-{img_size}")
+
+
+def inputs(n, size):
+    x = torch.zeros(n, 3, size, size)
+    x[:, 0, 0, 0] = torch.arange(n, dtype=torch.float32)
+    return x
+
+
+# 빠른 모델 (FAST_CLASSES 순서): 0번 = Cu 확신, 1번 = Ac지만 애매함, 2번 = St 확신
+FAST_LOGITS = [[0.0, 0.0, 6.0], [0.0, 0.1, 0.0], [6.0, 0.0, 0.0]]
+# 무거운 모델 (HEAVY_CLASSES 순서): 모두 Ac
+HEAVY_LOGITS = [[5.0, 0.0, 0.0]] * 3
+
+
+def make_cascade(threshold=0.6, score="p1"):
+    fast = bundle(FAST_CLASSES, FAST_LOGITS, 192, "resnet18")
+    heavy = bundle(HEAVY_CLASSES, HEAVY_LOGITS, 320, "convnext_tiny")
+    return Cascade(fast, heavy, threshold=threshold, score=score)
+
+
+def test_confidence_scores():
+    p = torch.tensor([[0.7, 0.2, 0.1], [0.4, 0.35, 0.25]])
+    assert torch.allclose(confidence_score(p, "p1"), torch.tensor([0.7, 0.4]))
+    assert torch.allclose(confidence_score(p, "margin"), torch.tensor([0.5, 0.05]))
+    with pytest.raises(ValueError):
+        confidence_score(p, "entropy")
+
+
+def test_fast_probs_are_remapped_to_heavy_class_order():
+    c = make_cascade(threshold=0.0)  # 아무것도 escalation하지 않음
+    probs, escalate = c.probs(inputs(3, 192), inputs(3, 320))
+
+    expected = torch.softmax(torch.tensor(FAST_LOGITS), dim=1)[:, [1, 2, 0]]  # St,Ac,Cu → Ac,Cu,St
+    assert torch.allclose(probs, expected)
+    assert [HEAVY_CLASSES[i] for i in probs.argmax(1).tolist()] == ["Cu", "Ac", "St"]
+    assert not escalate.any()
+
+
+def test_only_low_confidence_rows_go_to_heavy_model():
+    c = make_cascade(threshold=0.6)
+    probs, escalate = c.probs(inputs(3, 192), inputs(3, 320))
+
+    assert escalate.tolist() == [False, True, False]
+    assert c.heavy.model.calls == [[1]]  # 무거운 모델은 애매한 행만 한 번에
+    assert torch.allclose(probs[1], torch.softmax(torch.tensor(HEAVY_LOGITS[1]), dim=0))
+    assert probs.argmax(1).tolist() == [1, 0, 2]
+    assert c.stats()["answered"] == {"fast": 2, "heavy": 1}
+    assert c.stats()["escalation_rate"] == round(1 / 3, 4)
+
+
+def test_confident_batch_skips_heavy_model():
+    c = make_cascade(threshold=0.6)
+    c.probs(inputs(1, 192), inputs(1, 320))  # 0번 행만 = 확신 높음
+    assert c.heavy.model.calls == []
+
+
+def test_predict_batch_cascade_marks_stage_and_model_meta():
+    c = make_cascade(threshold=0.6)
+    items = [(x[None], y[None]) for x, y in zip(inputs(3, 192), inputs(3, 320))]
+    meta = {"device": "cpu", "classes": HEAVY_CLASSES, "img_size": 320, "arch": "convnext_tiny"}
+    timings = {}
+    out = predict_batch_cascade(c, meta, items, topk=2, timings=timings)
+
+    assert [r["meta"]["cascade_stage"] for r in out] == ["fast", "heavy", "fast"]
+    assert [r["meta"]["arch"] for r in out] == ["resnet18", "convnext_tiny", "resnet18"]
+    assert [r["meta"]["img_size"] for r in out] == [192, 320, 192]
+    assert [r["predictions"][0]["code"] for r in out] == ["Cu", "Ac", "St"]
+    assert timings["forward"] == timings["forward_fast"] + timings["forward_heavy"]
+
+
+def test_invalid_configuration_fails_at_startup():
+    heavy = bundle(HEAVY_CLASSES, HEAVY_LOGITS, 320, "convnext_tiny")
+    with pytest.raises(RuntimeError, match="St"):
+        Cascade(bundle(["Ac", "Cu"], [[0.0, 0.0]], 192, "resnet18"), heavy)
+    with pytest.raises(ValueError):
+        make_cascade(score="entropy")
+
+
+def test_model_id_tracks_threshold_and_score():
+    assert make_cascade(0.6).model_id != make_cascade(0.7).model_id
+    assert make_cascade(score="p1").model_id != make_cascade(score="margin").model_id
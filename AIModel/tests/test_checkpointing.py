@@ -0,0 +1,80 @@
+# AIModel/tests/test_checkpointing.py
+import random
+
+import numpy as np
+import pytest
+import torch
+
+import checkpointing
+from checkpointing import AsyncCheckpointer, atomic_save, rng_state, set_rng_state, snapshot
+
+
+def test_atomic_save_roundtrip_leaves_no_temp_file(tmp_path):
+    path = tmp_path / "ckpt.pt"
+    atomic_save({"w": torch.arange(4), "epoch": 3}, path)
+
+    loaded = torch.load(path)
+    assert torch.equal(loaded["w"], torch.arange(4)) and loaded["epoch"] == 3
+    assert [p.name for p in tmp_path.iterdir()] == ["ckpt.pt"]
+
+
+def test_failed_save_keeps_previous_file(tmp_path, monkeypatch):
+    path = tmp_path / "ckpt.pt"
+    atomic_save({"epoch": 1}, path)
+
+    def broken_save(obj, f):
+        with open(f, "wb") as fh:
+            fh.write(b"partial")  # 쓰다가 죽은 상황
+        raise OSError("disk full")
+
+    monkeypatch.setattr(checkpointing.torch, "save", broken_save)
+    with pytest.raises(OSError):
+        atomic_save({"epoch": 2}, path)
+    monkeypatch.undo()
+
+    assert torch.load(path) == {"epoch": 1}
+
+
+def test_async_save_writes_snapshot_not_later_updates(tmp_path):
+    w = torch.zeros(3)
+    state = {"model_state": {"w": w}, "epoch": 0}
+    ck = AsyncCheckpointer()
+    ck.save((state, tmp_path / "last.pt"), (state, tmp_path / "best.pt"))
+    w.add_(5)  # save() 뒤의 학습 스텝이 원본을 바꿔도 저장 내용은 고정
+    ck.wait()
+
+    for name in ("last.pt", "best.pt"):
+        assert torch.equal(torch.load(tmp_path / name)["model_state"]["w"], torch.zeros(3))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["best.pt", "last.pt"]
+
+
+def test_snapshot_shares_copies_between_files():
+    t = torch.ones(2)
+    memo = {}
+    a = snapshot({"w": t}, memo)
+    b = snapshot([t, (t, 1)], memo)
+    assert a["w"] is b[0] is b[1][0]
+    assert a["w"] is not t and b[1][1] == 1
+
+
+def test_async_error_is_raised_on_next_wait(tmp_path):
+    ck = AsyncCheckpointer()
+    ck.save(({"x": 1}, tmp_path / "missing_dir" / "ckpt.pt"))  # 백그라운드 스레드에서 실패
+    with pytest.raises(RuntimeError, match="does not exist"):
+        ck.wait()
+    ck.wait()  # 한 번만 던짐
+
+    ck.save(({"x": 2}, tmp_path / "ok.pt"))
+    ck.wait()
+    assert torch.load(tmp_path / "ok.pt") == {"x": 2}
+
+
+def test_rng_state_roundtrip():
+    random.seed(1)
+    np.random.seed(1)
+    torch.manual_seed(1)
+    state = rng_state()
+    first = (random.random(), np.random.rand(), torch.rand(1).item())
+
+    set_rng_state(state)
+    assert (random.random(), np.random.rand(), torch.rand(1).item()) == first
@@ -0,0 +1,60 @@
+# AIModel/tests/test_ddp_utils.py
+import torch
+
+from ddp_utils import DistributedWeightedSampler, shard_dataset
+
+WEIGHTS = [0.0, 1.0, 2.0, 3.0, 0.5, 4.0, 1.5]
+
+
+def rank_samplers(world_size: int, num_samples: int = 100, seed: int = 7, epoch: int = 0):
+    samplers = [DistributedWeightedSampler(WEIGHTS, num_samples, rank=r, world_size=world_size, seed=seed)
+                for r in range(world_size)]
+    for s in samplers:
+        s.set_epoch(epoch)
+    return samplers
+
+
+def test_ranks_split_one_global_draw():
+    world = 3
+    shards = [list(s) for s in rank_samplers(world)]
+    full = list(DistributedWeightedSampler(WEIGHTS, len(shards[0]) * world, seed=7))
+
+    # 모든 rank가 같은 길이, rank r은 전체 draw의 r::world 위치 → 위치 기준으로 겹치지 않고 합치면 전체
+    assert [len(s) for s in shards] == [34] * world
+    for r, shard in enumerate(shards):
+        assert shard == full[r::world]
+    assert [shards[i % world][i // world] for i in range(len(full))] == full
+
+
+def test_length_is_padded_up_to_equal_shards():
+    samplers = rank_samplers(4, num_samples=10)
+    assert [len(s) for s in samplers] == [3, 3, 3, 3]
+    assert all(len(list(s)) == 3 for s in samplers)
+
+
+def test_same_epoch_is_deterministic_across_instances():
+    # --resume: 새로 만든 sampler에 같은 epoch를 주면 중단 전과 같은 순서
+    before = [list(s) for s in rank_samplers(2, epoch=5)]
+    after = [list(s) for s in rank_samplers(2, epoch=5)]
+    assert before == after
+
+
+def test_epochs_and_seeds_change_the_order():
+    assert list(rank_samplers(2, epoch=0)[0]) != list(rank_samplers(2, epoch=1)[0])
+    assert list(rank_samplers(2, seed=1)[0]) != list(rank_samplers(2, seed=2)[0])
+
+
+def test_follows_weights():
+    s = DistributedWeightedSampler(WEIGHTS, 20_000, rank=0, world_size=1, seed=0)
+    counts = torch.bincount(torch.tensor(list(s)), minlength=len(WEIGHTS)).double()
+    assert counts[0] == 0  # 가중치 0은 절대 뽑히지 않음
+    expected = torch.tensor(WEIGHTS, dtype=torch.double) / sum(WEIGHTS)
+    assert torch.allclose(counts / counts.sum(), expected, atol=0.02)
+
+
+def test_shard_dataset_is_disjoint_and_complete():
+    ds = list(range(10))
+    shards = [list(shard_dataset(ds, r, 3)) for r in range(3)]
+    assert shards == [[0, 3, 6, 9], [1, 4, 7], [2, 5, 8]]
+    assert sorted(sum(shards, [])) == ds
+    assert shard_dataset(ds, 0, 1) is ds
@@ -0,0 +1,163 @@
+# AIModel/tests/test_prediction_cache.py
+import asyncio
+import json
+import threading
+
+import pytest
+
+import prediction_cache
+from prediction_cache import PredictionCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """prediction_cache 안의 time.time()을 직접 움직이는 시계."""
+    now = [1000.0]
+    monkeypatch.setattr(prediction_cache.time, "time", lambda: now[0])
+    return now
+
+
+def mem_cache(**kwargs) -> PredictionCache:
+    c = PredictionCache(**{"max_items": 3, "ttl": 0, "disk_dir": None, **kwargs})
+    c.bind("model-a")
+    return c
+
+
+def test_key_depends_on_bytes_and_options():
+    k = PredictionCache.key(b"img")
+    assert k == PredictionCache.key(b"img")
+    assert k != PredictionCache.key(b"img2")
+    assert k != PredictionCache.key(b"img", "tta", 4)
+    assert PredictionCache.key(b"img", "tta", 4) != PredictionCache.key(b"img", "tta", 2)
+
+
+def test_lru_evicts_least_recently_used():
+    c = mem_cache()
+    for k in "abc":
+        c.put(k, {"v": k})
+    assert c.get("a") == {"v": "a"}  # a를 최근으로
+    c.put("d", {"v": "d"})           # → 가장 오래된 b가 빠짐
+
+    assert c.get("b") is None
+    assert [c.get(k)["v"] for k in "acd"] == ["a", "c", "d"]
+    assert c.stats()["evictions"] == 1 and c.stats()["size"] == 3
+
+
+def test_ttl_expiry(clock):
+    c = mem_cache(ttl=10)
+    c.put("k", 1)
+    clock[0] += 9
+    assert c.get("k") == 1
+    clock[0] += 2
+    assert c.get("k") is None
+    assert c.stats()["size"] == 0
+
+
+def test_bind_new_model_clears_memory():
+    c = mem_cache()
+    c.put("k", 1)
+    c.bind("model-a")  # 같은 모델 → 그대로
+    assert c.get("k") == 1
+    c.bind("model-b")
+    assert c.get("k") is None
+    assert c.stats()["invalidations"] == 1
+
+
+def test_hit_miss_counters():
+    c = mem_cache()
+    c.put("k", 1)
+    c.get("k")
+    c.get("k")
+    c.get("nope")
+    s = c.stats()
+    assert (s["hits"], s["misses"]) == (2, 1)
+    assert s["hit_rate"] == round(2 / 3, 4)
+
+
+def test_disabled_cache_stores_nothing():
+    c = PredictionCache(max_items=0, disk_dir=None)
+    c.bind("m")
+    c.put("k", 1)
+    assert not c.enabled
+    assert c.get("k") is None
+
+
+def test_disk_tier_survives_restart_and_is_namespaced(tmp_path):
+    c = PredictionCache(max_items=2, disk_dir=str(tmp_path))
+    c.bind("model-a")
+    c.put("abcdef", {"top1": "Cu"})
+
+    path = tmp_path / "model-a" / "ab" / "abcdef.json"
+    assert json.loads(path.read_text(encoding="utf-8")) == {"top1": "Cu"}
+    assert not list(path.parent.glob("*.tmp"))
+
+    # 새 프로세스 (메모리 비어 있음) → 디스크에서 읽고 메모리에 올림
+    c2 = PredictionCache(max_items=2, disk_dir=str(tmp_path))
+    c2.bind("model-a")
+    assert c2.get("abcdef") == {"top1": "Cu"}
+    assert c2.stats()["disk_hits"] == 1 and c2.stats()["size"] == 1
+
+    # 다른 모델은 다른 폴더 → 섞이지 않음
+    c3 = PredictionCache(max_items=2, disk_dir=str(tmp_path))
+    c3.bind("model-b")
+    assert c3.get("abcdef") is None
+
+
+def test_disk_ttl_removes_expired_file(tmp_path, clock):
+    c = PredictionCache(max_items=0, ttl=10, disk_dir=str(tmp_path))
+    c.bind("m")
+    c.put("abcd", 1)
+    path = tmp_path / "m" / "ab" / "abcd.json"
+    assert path.exists()
+
+    clock[0] = path.stat().st_mtime + 11
+    assert c.get("abcd") is None
+    assert not path.exists()
+
+
+def test_async_get_put_match_sync_behaviour(tmp_path):
+    async def main():
+        c = PredictionCache(max_items=4, disk_dir=str(tmp_path))
+        c.bind("m")
+        await c.aput("abcd", {"x": 1})
+        mem = await c.aget("abcd")
+        c.clear()
+        disk = await c.aget("abcd")
+        missing = await c.aget("zzzz")
+        return mem, disk, missing, c.stats()
+
+    mem, disk, missing, stats = asyncio.run(main())
+    assert mem == disk == {"x": 1}
+    assert missing is None
+    assert (stats["hits"], stats["disk_hits"], stats["misses"]) == (2, 1, 1)
+
+
+def test_disk_hit_after_model_switch_is_not_kept(tmp_path):
+    c = PredictionCache(max_items=4, disk_dir=str(tmp_path))
+    c.bind("m")
+    c.put("abcd", 1)
+    c.clear()
+
+    async def main():
+        task = asyncio.ensure_future(c.aget("abcd"))
+        await asyncio.sleep(0)  # 디스크 읽기가 워커 스레드에서 도는 동안 모델 교체
+        c.bind("other")
+        return await task
+
+    assert asyncio.run(main()) == 1
+    assert c.stats()["size"] == 0
+
+
+def test_concurrent_writes_to_same_key(tmp_path):
+    c = PredictionCache(max_items=0, disk_dir=str(tmp_path))
+    c.bind("m")
+    path = c._disk_path("abcd")
+    values = [{"i": i, "pad": "x" * 50_000} for i in range(16)]
+    threads = [threading.Thread(target=c._write_disk, args=(path, v)) for v in values]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert json.loads(path.read_text(encoding="utf-8")) in values  # 반쯤 쓴 파일이 아님
+    assert sorted(p.name for p in path.parent.iterdir()) == ["abcd.json"]  # 임시 파일이 남지 않음
@@ -0,0 +1,68 @@
+# AIModel/tests/test_preprocess.py
+import io
+
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+
+from preprocess import NORMALIZATIONS, get_preprocessor, get_transform
+
+# preprocess.py가 전역으로 끄는 경고 (pytest는 테스트마다 경고 필터를 되돌림)
+pytestmark = pytest.mark.filterwarnings("ignore:The given NumPy array is not writable")
+
+# 두 경로는 리샘플링 반올림만 다름: uint8 기준 2단계 이내 (정규화 후에는 / (255 * std))
+MAX_LEVELS = 2
+ATOL = (MAX_LEVELS + 0.5) / (255.0 * min(NORMALIZATIONS["imagenet"][1]))
+
+
+def smooth_image(w: int, h: int, seed: int = 0, mode: str = "RGB") -> Image.Image:
+    """사진처럼 이웃 픽셀이 비슷한 테스트 이미지 (노이즈 이미지는 리샘플링 차이가 과장됨)."""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, size=(h // 16 + 1, w // 16 + 1, 3), dtype=np.uint8)
+    return Image.fromarray(small).resize((w, h), Image.BICUBIC).convert(mode)
+
+
+@pytest.mark.parametrize("size", [(640, 480), (480, 640), (1024, 768), (300, 300), (401, 257)])
+@pytest.mark.parametrize("sky_crop", [0.0, 0.25])
+@pytest.mark.parametrize("img_size", [192, 224, 320])
+def test_fused_matches_transform(size, sky_crop, img_size):
+    img = smooth_image(*size)
+    ref = get_transform(img_size, sky_crop)(img)
+    out = get_preprocessor(img_size, sky_crop)(img)
+
+    assert out.shape == ref.shape == (3, img_size, img_size)
+    assert out.dtype == torch.float32
+    diff = (out - ref).abs()
+    assert diff.max().item() <= ATOL
+    assert diff.mean().item() < 1e-3
+
+
+def test_fused_matches_transform_with_explicit_resize():
+    # predict_utils: Resize(256) → CenterCrop(224)
+    img = smooth_image(800, 600, seed=1)
+    ref = get_transform(224, resize=256)(img)
+    out = get_preprocessor(224, resize=256)(img)
+    assert (out - ref).abs().max().item() <= ATOL
+
+
+def test_non_rgb_input_is_converted():
+    img = smooth_image(320, 240, seed=2, mode="L")
+    out = get_preprocessor(192)(img)
+    ref = get_transform(192)(img.convert("RGB"))
+    assert out.shape == (3, 192, 192)
+    assert (out - ref).abs().max().item() <= ATOL
+
+
+def test_from_bytes_matches_pil_path_without_draft():
+    img = smooth_image(640, 480, seed=3)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")  # 무손실 → 디코딩 결과가 원본과 같음
+    pre = get_preprocessor(224)
+    assert torch.equal(pre.from_bytes(buf.getvalue()), pre(img))
+
+
+def test_preprocessors_are_cached_per_key():
+    assert get_preprocessor(224, 0.25) is get_preprocessor(224, 0.25)
+    assert get_preprocessor(224) is not get_preprocessor(320)
+    assert get_transform(224) is get_transform(224)
@@ -0,0 +1,98 @@
+# AIModel/tests/test_tta.py
+import io
+
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+
+import tta
+from predictor import predict_batch, preprocess_bytes_timed
+from preprocess import get_preprocessor
+from tta import VIEWS, average_logits, build_views, preprocess_bytes_tta_timed, tta_views
+
+# preprocess.py가 전역으로 끄는 경고 (pytest는 테스트마다 경고 필터를 되돌림)
+pytestmark = pytest.mark.filterwarnings("ignore:The given NumPy array is not writable")
+
+CLASSES = ["Ac", "Cu", "St"]
+
+
+def gradient_image(w: int = 400, h: int = 300) -> Image.Image:
+    """위치마다 값이 다른 이미지 → crop 위치/반전이 바뀌면 텐서도 바뀜."""
+    x = np.linspace(0, 255, w, dtype=np.float32)[None, :]
+    y = np.linspace(0, 255, h, dtype=np.float32)[:, None]
+    arr = np.stack([np.broadcast_to(x, (h, w)), np.broadcast_to(y, (h, w)), (x + y) / 2], axis=-1)
+    return Image.fromarray(arr.astype(np.uint8))
+
+
+def test_average_logits_per_item():
+    logits = torch.arange(14, dtype=torch.float32).view(7, 2)
+    out = average_logits(logits, [1, 4, 2])
+    expected = torch.stack([logits[0], logits[1:5].mean(0), logits[5:7].mean(0)])
+    assert torch.allclose(out, expected)
+
+
+def test_average_logits_single_views_is_identity():
+    logits = torch.randn(3, 5)
+    assert average_logits(logits, [1, 1, 1]) is logits
+
+
+def test_tta_views_clamps(monkeypatch):
+    monkeypatch.setattr(tta, "TTA_VIEWS", 2)
+    monkeypatch.setattr(tta, "TTA_MAX_VIEWS", 4)
+    assert tta_views(None) == 2
+    assert [tta_views(n) for n in (0, 1, 3, 4, 99)] == [1, 1, 3, 4, 4]
+
+
+def test_views_are_in_fixed_order():
+    img = gradient_image()
+    x = build_views(img, 64, len(VIEWS))
+    assert x.shape == (len(VIEWS), 3, 64, 64)
+
+    assert torch.equal(x[0], get_preprocessor(64)(img))          # center = 기본 추론 전처리
+    assert torch.equal(x[1], x[0].flip(-1))                      # flip
+    assert torch.equal(x[2], get_preprocessor(64, 0.25)(img))    # sky crop 25%
+    assert torch.equal(x[3], x[2].flip(-1))
+    # 모서리 crop은 서로, 그리고 center와 모두 다름
+    picks = [0, 4, 5, 6, 7]
+    assert not any(torch.equal(x[i], x[j]) for i in picks for j in picks if i < j)
+    # n개를 고르면 항상 앞에서부터 같은 view
+    assert torch.equal(build_views(img, 64, 3), x[:3])
+
+
+def test_corner_crops_take_the_corners():
+    img = gradient_image()
+    x = build_views(img, 64, len(VIEWS))
+    red, green = x[:, 0].mean(dim=(1, 2)), x[:, 1].mean(dim=(1, 2))  # 빨강 = 가로 위치, 초록 = 세로 위치
+    tl, tr, bl, br = 4, 5, 6, 7
+    assert red[tl] < red[0] < red[tr] and red[bl] < red[0] < red[br]
+    assert green[tl] < green[0] < green[bl] and green[tr] < green[0] < green[br]
+
+
+def test_tta_bytes_path_matches_plain_path_for_first_view():
+    buf = io.BytesIO()
+    gradient_image().save(buf, format="PNG")
+    x, decode_s, transform_s = preprocess_bytes_tta_timed(buf.getvalue(), 64, 4)
+    plain, _, _ = preprocess_bytes_timed(buf.getvalue(), 64)
+    assert x.shape == (4, 3, 64, 64)
+    assert torch.equal(x[:1], plain)
+    assert decode_s >= 0 and transform_s >= 0
+
+
+def test_predict_batch_averages_views_before_softmax():
+    # 이미지 2장: 첫 장은 view 1개, 둘째 장은 view 3개
+    logits = torch.tensor([[3.0, 0.0, 0.0],
+                           [0.0, 4.0, 0.0], [0.0, 0.0, 1.0], [0.0, 0.0, 1.0]])
+    model = lambda x: logits[x[:, 0, 0, 0].long()]  # noqa: E731
+    x = torch.zeros(4, 3, 2, 2)
+    x[:, 0, 0, 0] = torch.arange(4, dtype=torch.float32)
+    meta = {"device": "cpu", "classes": CLASSES, "img_size": 2}
+
+    out = predict_batch(model, meta, x, topk=3, views=[1, 3])
+
+    assert len(out) == 2
+    assert [r["meta"]["tta_views"] for r in out] == [1, 3]
+    avg = torch.softmax(torch.tensor([0.0, 4 / 3, 2 / 3]), dim=0)
+    got = {p["code"]: p["confidence"] for p in out[1]["predictions"]}
+    assert got == {c: round(float(p), 4) for c, p in zip(CLASSES, avg)}
+    assert out[0]["predictions"][0]["code"] == "Ac"
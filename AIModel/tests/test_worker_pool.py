@@ -0,0 +1,104 @@
+# AIModel/tests/test_worker_pool.py
+import asyncio
+import threading
+
+import pytest
+
+from worker_pool import PoolSaturated, WorkerPool
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def square(x):
+    return x * x
+
+
+def fail_on_three(x):
+    if x == 3:
+        raise ValueError("bad item")
+    return x
+
+
+def test_run_returns_result_and_counts():
+    async def main():
+        pool = WorkerPool(kind="thread", workers=2, queue_size=0)
+        try:
+            return await pool.run(square, 7), pool.stats()
+        finally:
+            pool.shutdown()
+
+    out, stats = run(main())
+    assert out == 49
+    assert stats["inflight"] == 0 and stats["completed"] == 1 and stats["rejected"] == 0
+
+
+def test_map_keeps_order_and_returns_item_errors():
+    async def main():
+        pool = WorkerPool(kind="thread", workers=2, queue_size=4)
+        try:
+            return await pool.map(fail_on_three, [1, 2, 3, 4])
+        finally:
+            pool.shutdown()
+
+    out = run(main())
+    assert out[:2] == [1, 2] and out[3] == 4
+    assert isinstance(out[2], ValueError)
+
+
+def test_saturated_pool_rejects_immediately():
+    gate = threading.Event()
+
+    async def main():
+        # capacity = workers 1 + queue 1 = 2
+        pool = WorkerPool(kind="thread", workers=1, queue_size=1)
+        try:
+            busy = [asyncio.ensure_future(pool.run(gate.wait, 5)) for _ in range(2)]
+            await asyncio.sleep(0)
+            assert pool.stats()["inflight"] == 2
+
+            with pytest.raises(PoolSaturated):
+                await pool.run(square, 2)
+            with pytest.raises(PoolSaturated):
+                await pool.map(square, [1, 2])
+            stats = pool.stats()
+
+            gate.set()
+            await asyncio.gather(*busy)
+            after = await pool.run(square, 3)  # 자리가 나면 다시 받음
+            return stats, after, pool.stats()
+        finally:
+            gate.set()
+            pool.shutdown()
+
+    stats, after, final = run(main())
+    assert stats["rejected"] == 2
+    assert after == 9
+    assert final["inflight"] == 0 and final["completed"] == 3
+
+
+def test_map_takes_slots_for_the_whole_request():
+    gate = threading.Event()
+
+    async def main():
+        pool = WorkerPool(kind="thread", workers=2, queue_size=0)
+        try:
+            busy = asyncio.ensure_future(pool.run(gate.wait, 5))
+            await asyncio.sleep(0)
+            # 남은 자리 1개, map은 min(3, workers=2)개가 필요 → 하나도 실행하지 않고 거절
+            with pytest.raises(PoolSaturated):
+                await pool.map(square, [1, 2, 3])
+            gate.set()
+            await busy
+            return await pool.map(square, [1, 2, 3])
+        finally:
+            gate.set()
+            pool.shutdown()
+
+    assert run(main()) == [1, 4, 9]
+
+
+def test_unknown_executor_kind():
+    with pytest.raises(ValueError):
+        WorkerPool(kind="fiber")
@@ -1,4 +1,5 @@
 # train.py (CPU FAST VERSION)
+import argparse
 import csv
 import time
 from pathlib import Path
@@ -10,23 +11,17 @@ from torch.utils.data import DataLoader
 import numpy as np
 from tqdm import tqdm
 
-# ======================
-# Utils
-# ======================
-def topk_acc(logits, y, k=1):
-    topk = logits.topk(k, dim=1).indices
-    return (topk == y.view(-1, 1)).any(dim=1).float().mean().item()
-
-def confusion_matrix(preds, labels, num_classes):
-    cm = torch.zeros((num_classes, num_classes), dtype=torch.int64)
-    for p, t in zip(preds, labels):
-        cm[t, p] += 1
-    return cm
+from eval_metrics import MetricMeter, format_report
 
 # ======================
 # Main
 # ======================
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cache_dir", type=str, default="",
+                        help="decoded uint8 shard cache from dataset_cache.py (skips JPEG decode every epoch)")
+    args = parser.parse_args()
+
     PROJECT_DIR = Path(__file__).resolve().parent
     DATA_DIR = PROJECT_DIR / "splits" / "ccsn_split"
     OUT_DIR = PROJECT_DIR / "outputs"
@@ -72,9 +67,16 @@ def main():
     # ======================
     # Dataset
     # ======================
-    train_ds = datasets.ImageFolder(DATA_DIR / "train", transform=train_tf)
-    val_ds   = datasets.ImageFolder(DATA_DIR / "val", transform=val_tf)
-    test_ds  = datasets.ImageFolder(DATA_DIR / "test", transform=val_tf)
+    if args.cache_dir:
+        # 미리 디코딩해 둔 샤드(memmap)에서 읽음 → 에폭마다 JPEG 디코딩 없음
+        from dataset_cache import open_split
+        train_ds = open_split(args.cache_dir, "train", transform=train_tf)
+        val_ds   = open_split(args.cache_dir, "val", transform=val_tf)
+        test_ds  = open_split(args.cache_dir, "test", transform=val_tf)
+    else:
+        train_ds = datasets.ImageFolder(DATA_DIR / "train", transform=train_tf)
+        val_ds   = datasets.ImageFolder(DATA_DIR / "val", transform=val_tf)
+        test_ds  = datasets.ImageFolder(DATA_DIR / "test", transform=val_tf)
 
     num_classes = len(train_ds.classes)
     print(f"🧠 Classes({num_classes}): {train_ds.classes}", flush=True)
@@ -141,6 +143,10 @@ def main():
     best_val = 0.0
     best_path = OUT_DIR / "cloud_model_fast.pt"
 
+    # 지표는 디바이스에 누적, 에폭 끝에 한 번만 동기화
+    train_meter = MetricMeter(num_classes, device)
+    val_meter = MetricMeter(num_classes, device)
+
     # ======================
     # Train loop
     # ======================
@@ -148,7 +154,7 @@ def main():
         t0 = time.time()
 
         model.train()
-        tr_loss_sum = 0.0
+        train_meter.reset()
 
         for x, y in tqdm(
             train_loader, desc=f"Epoch {epoch}/{epochs} [train]"
@@ -159,15 +165,13 @@ def main():
             loss = crit(logits, y)
             loss.backward()
             opt.step()
-            tr_loss_sum += loss.item() * x.size(0)
+            train_meter.update(logits, y, loss)
 
-        tr_loss = tr_loss_sum / len(train_ds)
+        tr_loss = train_meter.compute()["loss"]
 
         # ---- validation ----
         model.eval()
-        val_loss_sum = 0.0
-        acc1_sum = 0.0
-        acc3_sum = 0.0
+        val_meter.reset()
 
         with torch.no_grad():
             for x, y in tqdm(
@@ -176,14 +180,10 @@ def main():
                 x, y = x.to(device), y.to(device)
                 logits = model(x)
                 loss = crit(logits, y)
+                val_meter.update(logits, y, loss)
 
-                val_loss_sum += loss.item() * x.size(0)
-                acc1_sum += topk_acc(logits, y, k=1) * x.size(0)
-                acc3_sum += topk_acc(logits, y, k=3) * x.size(0)
-
-        val_loss = val_loss_sum / len(val_ds)
-        acc1 = acc1_sum / len(val_ds)
-        acc3 = acc3_sum / len(val_ds)
+        val = val_meter.compute()
+        val_loss, acc1, acc3 = val["loss"], val["top1"], val["top3"]
 
         elapsed = time.time() - t0
         print(
@@ -216,29 +216,20 @@ def main():
     model.load_state_dict(ckpt["model"])
     model.eval()
 
-    all_preds, all_labels = [], []
-    acc1_sum, acc3_sum = 0.0, 0.0
+    test_meter = MetricMeter(num_classes, device)
 
     with torch.no_grad():
         for x, y in tqdm(test_loader, desc="Test"):
             x, y = x.to(device), y.to(device)
             logits = model(x)
-            acc1_sum += topk_acc(logits, y, k=1) * x.size(0)
-            acc3_sum += topk_acc(logits, y, k=3) * x.size(0)
-            all_preds.append(logits.argmax(1).cpu())
-            all_labels.append(y.cpu())
-
-    acc1 = acc1_sum / len(test_ds)
-    acc3 = acc3_sum / len(test_ds)
-    print(f"TEST top1={acc1:.3f} top3={acc3:.3f}", flush=True)
-
-    cm = confusion_matrix(
-        torch.cat(all_preds),
-        torch.cat(all_labels),
-        num_classes
-    )
+            test_meter.update(logits, y)
+
+    test = test_meter.compute()
+    print(f"TEST top1={test['top1']:.3f} top3={test['top3']:.3f} macro_f1={test['macro_f1']:.3f}", flush=True)
+    print(format_report(test, train_ds.classes))
+
     print("\nConfusion Matrix:")
-    print(cm.numpy())
+    print(test["confusion"])
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,343 @@
+# AIModel/train_distill.py
+"""
+지식 증류(knowledge distillation): ConvNeXt-Tiny 교사(cloud_model_best.pt) → 작은 학생 모델.
+
+- 학생: mobilenet_v3_large / mobilenet_v3_small / efficientnet_b0 / resnet18 (ImageNet 가중치로 시작)
+- 교사 logits는 train split 전체에 대해 한 번만 계산해서 디스크에 캐시 (--logits_dir)
+  → 증류 에폭마다 교사 forward를 다시 돌리지 않음 (학생 forward/backward만)
+  캐시 키: 교사 체크포인트 해시 + 교사 img_size + sky_crop + 샘플 수/클래스 (하나라도 다르면 다시 계산)
+- 교사 logits를 고정하려면 학생 입력도 고정돼야 하므로 augmentation은 좌우 반전만:
+  원본/반전 두 view의 교사 logits를 같이 캐시하고, 학생이 뽑은 view에 맞는 쪽을 사용
+- 입력은 서버와 같은 fused 전처리 (SkyCrop → Resize → CenterCrop), 교사/학생 각자의 img_size로
+- loss = alpha * T^2 * KL(student/T || teacher/T) + (1 - alpha) * CE(label)
+- 저장 형식은 train_gpu.py와 같음 ({"model_state", "classes", "img_size", "arch", ...})
+  → get_model_bundle / load_model_bundle / evaluate.py / export_*.py에서 그대로 로드
+
+사용:
+  python train_distill.py --teacher outputs/cloud_model_best.pt --arch mobilenet_v3_large --img 224
+  python train_distill.py --arch efficientnet_b0 --cache_dir splits/ccsn_cache --epochs 30
+  LOCAL_MODEL_PATH=outputs/cloud_model_distill_mobilenet_v3_large_img224_T4.0_a0.7.pt uvicorn api:app
+"""
+import argparse
+import csv
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.amp import GradScaler, autocast
+from torch.utils.data import DataLoader, Dataset, WeightedRandomSampler
+from tqdm import tqdm
+
+from checkpointing import AsyncCheckpointer, atomic_save
+from eval_metrics import MetricMeter, format_report, write_confusion_csv
+from model_loader_HF import build_model, file_sha256, load_model_bundle
+from preprocess import get_preprocessor
+
+PROJECT_DIR = Path(__file__).resolve().parent
+STUDENTS = ("mobilenet_v3_large", "mobilenet_v3_small", "efficientnet_b0", "resnet18")
+VIEWS = 2  # 0 = 원본, 1 = 좌우 반전
+
+
+# -----------------------
+# Data
+# -----------------------
+def open_dataset(args, split: str, transform):
+    if args.cache_dir:
+        from dataset_cache import open_split
+        return open_split(args.cache_dir, split, transform=transform)
+    from torchvision import datasets
+    return datasets.ImageFolder(Path(args.data_dir) / split, transform=transform)
+
+
+class DistillDataset(Dataset):
+    """(x, y, 교사 logits). 반전 여부를 여기서 정하고 같은 view의 캐시된 교사 logits를 돌려줌."""
+
+    def __init__(self, base, teacher_logits: torch.Tensor, flip: bool = True):
+        self.base = base
+        self.teacher_logits = teacher_logits  # (N, VIEWS, C)
+        self.flip = flip
+
+    def __len__(self):
+        return len(self.base)
+
+    def __getitem__(self, i: int):
+        x, y = self.base[i]
+        view = int(self.flip and torch.rand(()) < 0.5)
+        if view:
+            x = x.flip(-1)
+        return x, y, self.teacher_logits[i, view]
+
+
+# -----------------------
+# Teacher logits cache
+# -----------------------
+def teacher_cache_key(teacher, teacher_sha: str, args, ds) -> dict:
+    return {
+        "teacher_sha256": teacher_sha,
+        "teacher_img_size": teacher.img_size,
+        "sky_crop": args.sky_crop,
+        "classes": list(ds.classes),
+        "num_samples": len(ds),
+        "views": VIEWS,
+    }
+
+
+@torch.no_grad()
+def compute_teacher_logits(teacher, args, ds_classes) -> torch.Tensor:
+    """train split 전체의 교사 logits (N, VIEWS, C), 클래스 순서는 데이터셋(폴더) 순서로 맞춤."""
+    missing = [c for c in ds_classes if c not in teacher.class_names]
+    if missing:
+        raise RuntimeError(f"classes not in teacher checkpoint: {missing}")
+    remap = torch.tensor([teacher.class_names.index(c) for c in ds_classes])
+
+    ds = open_dataset(args, "train", get_preprocessor(teacher.img_size, args.sky_crop))
+    loader = DataLoader(ds, batch_size=args.teacher_batch, shuffle=False, num_workers=args.num_workers,
+                        pin_memory=str(teacher.device).startswith("cuda"))
+    outs = []
+    for x, _ in tqdm(loader, desc="Teacher logits"):
+        x = x.to(teacher.device, non_blocking=True)
+        # 원본 + 반전을 한 번의 forward로
+        logits = teacher.model(torch.cat([x, x.flip(-1)])).float().cpu()
+        outs.append(torch.stack(logits.chunk(VIEWS), dim=1))
+    return torch.cat(outs)[:, :, remap].contiguous()
+
+
+def load_teacher_logits(args, train_ds) -> tuple:
+    """캐시가 맞으면 디스크에서, 아니면 교사를 한 번 돌려서 저장. 반환: (logits, 교사 정보)."""
+    teacher_sha = file_sha256(args.teacher)
+    logits_dir = Path(args.logits_dir)
+    cache_path = logits_dir / f"teacher_{Path(args.teacher).stem}_{teacher_sha[:16]}_crop{args.sky_crop}.pt"
+
+    if cache_path.exists():
+        cached = torch.load(cache_path, map_location="cpu")
+        key = cached["key"]
+        if (key["teacher_sha256"] == teacher_sha and key["sky_crop"] == args.sky_crop
+                and key["classes"] == list(train_ds.classes) and key["num_samples"] == len(train_ds)):
+            print(f"📌 teacher logits cache hit -> {cache_path}", flush=True)
+            return cached["logits"], cached["teacher"]
+        print(f"⚠️ teacher logits cache is stale -> recompute ({cache_path})", flush=True)
+
+    teacher = load_model_bundle(args.teacher, device=args.device)
+    t0 = time.time()
+    logits = compute_teacher_logits(teacher, args, train_ds.classes)
+    info = {"ckpt": Path(args.teacher).name, "ckpt_sha256": teacher_sha,
+            "arch": teacher.arch, "img_size": teacher.img_size}
+
+    logits_dir.mkdir(parents=True, exist_ok=True)
+    atomic_save({"key": teacher_cache_key(teacher, teacher_sha, args, train_ds),
+                 "teacher": info, "logits": logits}, cache_path)
+    print(f"✅ cached teacher logits {tuple(logits.shape)} in {time.time() - t0:.1f}s -> {cache_path}", flush=True)
+
+    del teacher
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    return logits, info
+
+
+# -----------------------
+# Loss
+# -----------------------
+def distill_loss(student_logits, teacher_logits, y, ce, temperature: float, alpha: float):
+    """Hinton KD: soft target KL (T^2로 gradient 크기 보정) + hard label CE."""
+    t = temperature
+    kd = F.kl_div(F.log_softmax(student_logits / t, dim=1), F.log_softmax(teacher_logits / t, dim=1),
+                  reduction="batchmean", log_target=True) * (t * t)
+    return alpha * kd + (1.0 - alpha) * ce(student_logits, y)
+
+
+# -----------------------
+# Main
+# -----------------------
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teacher", type=str, default=str(PROJECT_DIR / "outputs" / "cloud_model_best.pt"))
+    parser.add_argument("--arch", type=str, default="mobilenet_v3_large", choices=STUDENTS)
+    parser.add_argument("--img", type=int, default=224, help="student input size")
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--temperature", type=float, default=4.0)
+    parser.add_argument("--alpha", type=float, default=0.7, help="weight of the soft-target loss")
+    parser.add_argument("--no_pretrained", action="store_true", help="student starts from random weights")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--device", type=str, default=None)
+
+    parser.add_argument("--data_dir", type=str, default=str(PROJECT_DIR / "splits" / "ccsn_split"))
+    parser.add_argument("--cache_dir", type=str, default="",
+                        help="decoded uint8 shard cache from dataset_cache.py (skips JPEG decode every epoch)")
+    parser.add_argument("--logits_dir", type=str, default=str(PROJECT_DIR / "splits" / "teacher_logits"))
+    parser.add_argument("--sky_crop", type=float, default=0.25, help="crop bottom ratio (same for teacher/student)")
+    parser.add_argument("--teacher_batch", type=int, default=64)
+    parser.add_argument("--num_workers", type=int, default=2)
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    np.random.seed(args.seed)
+
+    OUT_DIR = PROJECT_DIR / "outputs"
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    device = args.device or ("cuda" if torch.cuda.is_available() else "cpu")
+    use_amp = device.startswith("cuda")
+    pin_memory = use_amp
+
+    print("✅ train_distill.py started", flush=True)
+    print(f"🖥️ device: {device}", flush=True)
+    print(f"⚙️ cfg: teacher={args.teacher} student={args.arch} img={args.img} epochs={args.epochs} "
+          f"batch={args.batch} lr={args.lr} T={args.temperature} alpha={args.alpha} sky_crop={args.sky_crop}",
+          flush=True)
+
+    # -----------------------
+    # Datasets + teacher logits (한 번만)
+    # -----------------------
+    tf = get_preprocessor(args.img, args.sky_crop)
+    train_base = open_dataset(args, "train", tf)
+    val_ds = open_dataset(args, "val", tf)
+    test_ds = open_dataset(args, "test", tf)
+    classes = train_base.classes
+    num_classes = len(classes)
+    print(f"📦 Samples: train={len(train_base)}, val={len(val_ds)}, test={len(test_ds)}", flush=True)
+
+    teacher_logits, teacher_info = load_teacher_logits(args, train_base)
+    train_ds = DistillDataset(train_base, teacher_logits)
+
+    # 교사가 train에서 얼마나 맞히는지 (soft target 품질 참고용)
+    targets = torch.tensor([y for _, y in train_base.samples])
+    teacher_top1 = (teacher_logits[:, 0].argmax(1) == targets).float().mean().item()
+    print(f"🧑‍🏫 teacher: {teacher_info['arch']} img={teacher_info['img_size']} train_top1={teacher_top1:.3f}",
+          flush=True)
+
+    # 클래스 불균형: train_gpu.py와 같은 WeightedRandomSampler
+    class_counts = np.bincount(targets.numpy(), minlength=num_classes)
+    sample_weights = 1.0 / class_counts[targets.numpy()]
+    sampler_gen = torch.Generator()
+    sampler_gen.manual_seed(args.seed)
+    sampler = WeightedRandomSampler(sample_weights.tolist(), num_samples=len(sample_weights), replacement=True,
+                                    generator=sampler_gen)
+
+    common_loader_kwargs = dict(num_workers=args.num_workers, pin_memory=pin_memory,
+                                persistent_workers=(args.num_workers > 0))
+    train_loader = DataLoader(train_ds, batch_size=args.batch, sampler=sampler, drop_last=True, **common_loader_kwargs)
+    val_loader = DataLoader(val_ds, batch_size=args.batch, shuffle=False, **common_loader_kwargs)
+    test_loader = DataLoader(test_ds, batch_size=args.batch, shuffle=False, **common_loader_kwargs)
+
+    # -----------------------
+    # Student
+    # -----------------------
+    model = build_model(args.arch, num_classes, pretrained=not args.no_pretrained).to(device)
+    n_params = sum(p.numel() for p in model.parameters())
+    print(f"🧠 student: {args.arch} ({n_params / 1e6:.2f}M params)", flush=True)
+
+    ce = nn.CrossEntropyLoss(label_smoothing=0.1)
+    opt = torch.optim.AdamW(model.parameters(), lr=args.lr, weight_decay=0.05)
+    scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(opt, T_max=args.epochs)
+    scaler = GradScaler(enabled=use_amp)
+
+    run_name = f"distill_{args.arch}_img{args.img}_T{args.temperature}_a{args.alpha}"
+    log_path = OUT_DIR / f"train_log_{run_name}.csv"
+    best_path = OUT_DIR / f"cloud_model_{run_name}.pt"
+    last_path = OUT_DIR / f"cloud_model_{run_name}_last.pt"
+    cm_path = OUT_DIR / f"confusion_matrix_{run_name}.csv"
+
+    with open(log_path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerow(["epoch", "lr", "train_loss", "val_loss", "val_top1", "val_top3", "sec"])
+    print(f"\n📝 logging to: {log_path}", flush=True)
+
+    ckpt_writer = AsyncCheckpointer()
+    train_meter = MetricMeter(num_classes, device)
+    val_meter = MetricMeter(num_classes, device)
+    best_val = 0.0
+
+    # -----------------------
+    # Train loop (Ctrl+C safe)
+    # -----------------------
+    try:
+        for epoch in range(1, args.epochs + 1):
+            t0 = time.time()
+            model.train()
+            train_meter.reset()
+
+            train_bar = tqdm(train_loader, desc=f"Epoch {epoch}/{args.epochs} [distill]")
+            for step, (x, y, t_logits) in enumerate(train_bar, 1):
+                x = x.to(device, non_blocking=True)
+                y = y.to(device, non_blocking=True)
+                t_logits = t_logits.to(device, non_blocking=True)
+
+                opt.zero_grad(set_to_none=True)
+                with autocast(device_type="cuda", enabled=use_amp):
+                    logits = model(x)
+                loss = distill_loss(logits.float(), t_logits, y, ce, args.temperature, args.alpha)
+
+                scaler.scale(loss).backward()
+                scaler.step(opt)
+                scaler.update()
+
+                train_meter.update(logits, y, loss)
+                if step % 20 == 0:  # loss.item()은 동기화 → 가끔만
+                    train_bar.set_postfix(loss=f"{loss.item():.4f}", lr=f"{opt.param_groups[0]['lr']:.2e}")
+
+            train = train_meter.compute()
+
+            model.eval()
+            val_meter.reset()
+            with torch.no_grad():
+                for x, y in tqdm(val_loader, desc=f"Epoch {epoch}/{args.epochs} [val]"):
+                    x = x.to(device, non_blocking=True)
+                    y = y.to(device, non_blocking=True)
+                    with autocast(device_type="cuda", enabled=use_amp):
+                        logits = model(x)
+                    val_meter.update(logits, y, ce(logits.float(), y))
+
+            val = val_meter.compute()
+            scheduler.step()
+            elapsed = time.time() - t0
+
+            print(
+                f"[{epoch:02d}/{args.epochs}] lr={opt.param_groups[0]['lr']:.2e} "
+                f"train_loss={train['loss']:.4f} train_top1={train['top1']:.3f} val_loss={val['loss']:.4f} "
+                f"top1={val['top1']:.3f} top3={val['top3']:.3f} ({elapsed:.1f}s)",
+                flush=True
+            )
+            with open(log_path, "a", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow([epoch, opt.param_groups[0]["lr"], train["loss"], val["loss"],
+                                        val["top1"], val["top3"], elapsed])
+
+            # train_gpu.py와 같은 형식 + 증류 정보 (load_checkpoint_to_model은 추가 키를 meta로만 취급)
+            model_ckpt = {"model_state": model.state_dict(), "classes": classes, "img_size": args.img,
+                          "arch": args.arch, "run_name": run_name, "teacher": teacher_info,
+                          "distill": {"temperature": args.temperature, "alpha": args.alpha}}
+            saves = [(model_ckpt, last_path)]
+            if val["top1"] > best_val:
+                best_val = val["top1"]
+                saves.append((model_ckpt, best_path))
+                print(f"✅ saved best model -> {best_path} (best_val={best_val:.3f})", flush=True)
+            ckpt_writer.save(*saves)
+
+    except KeyboardInterrupt:
+        print("\n🛑 Training interrupted by user (Ctrl+C). Last checkpoint is saved.", flush=True)
+    finally:
+        ckpt_writer.wait()
+
+    # -----------------------
+    # Test best student (서버와 같은 로더로 → 저장 형식 확인 겸)
+    # -----------------------
+    if best_path.exists():
+        print("\n=== TESTING BEST STUDENT ===", flush=True)
+        b = load_model_bundle(str(best_path), device=device, precision="fp32", channels_last=False)
+        test_meter = MetricMeter(num_classes, device)
+        with torch.no_grad():
+            for x, y in tqdm(test_loader, desc="Test"):
+                test_meter.update(b.model(x.to(device)), y.to(device))
+
+        test = test_meter.compute()
+        print(f"TEST top1={test['top1']:.3f} top3={test['top3']:.3f} macro_f1={test['macro_f1']:.3f}", flush=True)
+        print(format_report(test, classes), flush=True)
+        write_confusion_csv(cm_path, test["confusion"], classes)
+        print(f"📌 saved confusion matrix -> {cm_path}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
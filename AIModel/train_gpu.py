@@ -14,6 +14,12 @@ from tqdm import tqdm
 # torch 2.x AMP (new API)
 from torch.amp import autocast, GradScaler
 
+from checkpointing import AsyncCheckpointer, rng_state, set_rng_state
+from ddp_utils import (DistributedWeightedSampler, all_gather_object, barrier, broadcast_state,
+                       cleanup_distributed, scaled_lr, setup_distributed, shard_dataset, silence_non_main)
+from eval_metrics import MetricMeter, format_report, write_confusion_csv
+from preprocess import SkyCrop  # Optional: crop bottom to reduce ground objects
+
 
 # -----------------------
 # Utils
@@ -26,18 +32,6 @@ def set_seed(seed: int = 42):
     torch.cuda.manual_seed_all(seed)
 
 
-def topk_acc(logits, y, k=1):
-    topk = logits.topk(k, dim=1).indices
-    return (topk == y.view(-1, 1)).any(dim=1).float().mean().item()
-
-
-def confusion_matrix(preds, labels, num_classes):
-    cm = torch.zeros((num_classes, num_classes), dtype=torch.int64)
-    for p, t in zip(preds, labels):
-        cm[t, p] += 1
-    return cm
-
-
 def mixup_data(x, y, alpha=0.2):
     if alpha <= 0:
         return x, y, y, 1.0
@@ -54,19 +48,30 @@ def mixup_criterion(criterion, pred, y_a, y_b, lam):
 
 
 # -----------------------
-# Optional: crop bottom to reduce ground objects (lamp posts, buildings, etc.)
+# Transforms (Speed-optimized)
 # -----------------------
-class SkyCrop:
-    def __init__(self, crop_ratio: float):
-        self.crop_ratio = float(crop_ratio)
-
-    def __call__(self, img):
-        if self.crop_ratio <= 0:
-            return img
-        w, h = img.size
-        cut = int(h * self.crop_ratio)
-        # remove bottom cut pixels
-        return img.crop((0, 0, w, max(1, h - cut)))
+def train_transform(aug: str, img: int, sky):
+    # 핵심: RandomResizedCrop/ColorJitter/Autocontrast는 CPU 부하가 커서 속도를 크게 잡아먹음.
+    # light는 "빠르면서도" 성능 괜찮은 쪽.
+    if aug == "light":
+        return transforms.Compose([
+            sky,
+            transforms.Resize(img),
+            transforms.RandomHorizontalFlip(),
+            transforms.ToTensor(),
+            transforms.Normalize(mean=[0.485, 0.456, 0.406],
+                                 std=[0.229, 0.224, 0.225]),
+        ])
+    # medium (조금 더 강하지만 느려짐)
+    return transforms.Compose([
+        sky,
+        transforms.RandomResizedCrop(img, scale=(0.7, 1.0), ratio=(0.8, 1.25)),
+        transforms.RandomHorizontalFlip(),
+        transforms.ColorJitter(brightness=0.15, contrast=0.15, saturation=0.10, hue=0.02),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406],
+                             std=[0.229, 0.224, 0.225]),
+    ])
 
 
 # -----------------------
@@ -87,14 +92,31 @@ def main():
     parser.add_argument("--num_workers", type=int, default=4)
     parser.add_argument("--prefetch", type=int, default=2)
     parser.add_argument("--sky_crop", type=float, default=0.25, help="crop bottom ratio, e.g. 0.25")
+    parser.add_argument("--cache_dir", type=str, default="",
+                        help="decoded uint8 shard cache from dataset_cache.py (skips JPEG decode every epoch)")
 
     # Augmentation mode: "light" is fastest and usually good enough
     parser.add_argument("--aug", type=str, default="light", choices=["light", "medium"],
                         help="light: fast / medium: a bit stronger but slower")
+    parser.add_argument("--gpu_aug", action="store_true",
+                        help="run train augmentation as batched ops on the GPU (workers only decode/resize to uint8)")
+
+    # DDP (torchrun으로 실행하면 자동): --batch는 rank당 배치, 전역 배치 = batch * world_size
+    parser.add_argument("--lr_scale", type=str, default="sqrt", choices=["linear", "sqrt", "none"],
+                        help="DDP: scale lr by world_size (linear) or sqrt(world_size)")
+
+    # 이어서 학습: 에폭마다 *_resume.pt에 전체 학습 상태(optimizer/scheduler/scaler/RNG/epoch/best_val) 저장
+    parser.add_argument("--resume", type=str, default="",
+                        help="'auto' (this run's *_resume.pt) or a path to a *_resume.pt file")
 
     args = parser.parse_args()
 
-    set_seed(args.seed)
+    rank, world_size, local_rank = setup_distributed()
+    is_main = rank == 0
+    silence_non_main(is_main)
+
+    # rank마다 다른 augmentation/mixup 난수 (가중치 초기값은 DDP가 rank 0 것으로 맞춤)
+    set_seed(args.seed + rank)
 
     PROJECT_DIR = Path(__file__).resolve().parent
     DATA_DIR = PROJECT_DIR / "splits" / "ccsn_split"
@@ -102,6 +124,9 @@ def main():
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
     device = "cuda" if torch.cuda.is_available() else "cpu"
+    if world_size > 1 and device == "cuda":
+        device = f"cuda:{local_rank}"
+    lr = scaled_lr(args.lr, world_size, args.lr_scale)
     pin_memory = torch.cuda.is_available()
     use_amp = torch.cuda.is_available()
 
@@ -117,33 +142,24 @@ def main():
         f"mixup={args.mixup} aug={args.aug} workers={args.num_workers} prefetch={args.prefetch} sky_crop={args.sky_crop}",
         flush=True
     )
+    if world_size > 1:
+        print(f"🌐 DDP: world_size={world_size} global_batch={args.batch * world_size} "
+              f"lr={args.lr} -> {lr:.2e} ({args.lr_scale})", flush=True)
 
     sky = SkyCrop(args.sky_crop)
 
-    # -----------------------
-    # Transforms (Speed-optimized)
-    # -----------------------
-    # 핵심: RandomResizedCrop/ColorJitter/Autocontrast는 CPU 부하가 커서 속도를 크게 잡아먹음.
-    # light는 "빠르면서도" 성능 괜찮은 쪽.
-    if args.aug == "light":
-        train_tf = transforms.Compose([
-            sky,
-            transforms.Resize(args.img),
-            transforms.RandomHorizontalFlip(),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                                 std=[0.229, 0.224, 0.225]),
-        ])
-    else:  # medium (조금 더 강하지만 느려짐)
-        train_tf = transforms.Compose([
-            sky,
-            transforms.RandomResizedCrop(args.img, scale=(0.7, 1.0), ratio=(0.8, 1.25)),
-            transforms.RandomHorizontalFlip(),
-            transforms.ColorJitter(brightness=0.15, contrast=0.15, saturation=0.10, hue=0.02),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                                 std=[0.229, 0.224, 0.225]),
-        ])
+    train_tf = train_transform(args.aug, args.img, sky)
+
+    # --gpu_aug: 워커는 SkyCrop + 고정 크기 Resize + uint8 텐서화만, 나머지는 배치 단위로 GPU에서
+    gpu_aug = None
+    if args.gpu_aug:
+        if torch.cuda.is_available():
+            from gpu_aug import GpuAugment, base_transform
+            train_tf = base_transform(args.img, args.sky_crop)
+            gpu_aug = GpuAugment(args.aug, args.img)
+            print(f"🚀 GPU augmentation: {args.aug} (uint8 batches -> device)", flush=True)
+        else:
+            print("⚠️ --gpu_aug: CUDA not available -> CPU augmentation", flush=True)
 
     val_tf = transforms.Compose([
         sky,
@@ -157,9 +173,17 @@ def main():
     # -----------------------
     # Datasets
     # -----------------------
-    train_ds = datasets.ImageFolder(DATA_DIR / "train", transform=train_tf)
-    val_ds = datasets.ImageFolder(DATA_DIR / "val", transform=val_tf)
-    test_ds = datasets.ImageFolder(DATA_DIR / "test", transform=val_tf)
+    if args.cache_dir:
+        # 미리 디코딩해 둔 샤드(memmap)에서 읽음 → 에폭마다 JPEG 디코딩 없음
+        from dataset_cache import open_split
+        print(f"📌 CACHE_DIR: {args.cache_dir}", flush=True)
+        train_ds = open_split(args.cache_dir, "train", transform=train_tf)
+        val_ds = open_split(args.cache_dir, "val", transform=val_tf)
+        test_ds = open_split(args.cache_dir, "test", transform=val_tf)
+    else:
+        train_ds = datasets.ImageFolder(DATA_DIR / "train", transform=train_tf)
+        val_ds = datasets.ImageFolder(DATA_DIR / "val", transform=val_tf)
+        test_ds = datasets.ImageFolder(DATA_DIR / "test", transform=val_tf)
 
     classes = train_ds.classes
     num_classes = len(classes)
@@ -179,7 +203,16 @@ def main():
         print(f"{c:>3}: {class_counts[i]}", flush=True)
 
     sample_weights = np.array([1.0 / class_counts[y] for _, y in train_ds.samples], dtype=np.float64)
-    sampler = WeightedRandomSampler(sample_weights, num_samples=len(sample_weights), replacement=True)
+    if world_size > 1:
+        # 전체를 한 번 뽑고 rank별로 나눔 → 단일 GPU와 같은 분포, 에폭당 rank별 샘플 수는 1/world_size
+        sampler = DistributedWeightedSampler(sample_weights, num_samples=len(sample_weights),
+                                             rank=rank, world_size=world_size, seed=args.seed)
+    else:
+        # 전용 generator → --resume 때 샘플링 순서까지 그대로 이어짐
+        sampler_gen = torch.Generator()
+        sampler_gen.manual_seed(args.seed)
+        sampler = WeightedRandomSampler(sample_weights, num_samples=len(sample_weights), replacement=True,
+                                        generator=sampler_gen)
 
     # -----------------------
     # DataLoaders (Throughput tuning)
@@ -201,14 +234,15 @@ def main():
         drop_last=True,
         **common_loader_kwargs
     )
+    # val/test는 rank별로 겹치지 않게 나눠서 평가 → MetricMeter.compute()가 all_reduce로 합산
     val_loader = DataLoader(
-        val_ds,
+        shard_dataset(val_ds, rank, world_size),
         batch_size=args.batch,
         shuffle=False,
         **common_loader_kwargs
     )
     test_loader = DataLoader(
-        test_ds,
+        shard_dataset(test_ds, rank, world_size),
         batch_size=args.batch,
         shuffle=False,
         **common_loader_kwargs
@@ -221,9 +255,14 @@ def main():
     model.classifier[2] = nn.Linear(model.classifier[2].in_features, num_classes)
     model.to(device)
 
+    raw_model = model  # 저장/로드는 DDP 래퍼가 아닌 원본 모듈로 (state_dict 키에 module. 없음)
+    if world_size > 1:
+        from torch.nn.parallel import DistributedDataParallel as DDP
+        model = DDP(model, device_ids=[local_rank] if device.startswith("cuda") else None)
+
     # Loss/Optim/Scheduler
     crit = nn.CrossEntropyLoss(label_smoothing=0.1)
-    opt = torch.optim.AdamW(model.parameters(), lr=args.lr, weight_decay=0.05)
+    opt = torch.optim.AdamW(model.parameters(), lr=lr, weight_decay=0.05)
     scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(opt, T_max=args.epochs)
 
     scaler = GradScaler(enabled=use_amp)
@@ -232,32 +271,68 @@ def main():
     # Logging / Output paths
     # -----------------------
     run_name = f"convnext_img{args.img}_e{args.epochs}_b{args.batch}_mix{args.mixup}_crop{args.sky_crop}_aug{args.aug}"
+    if world_size > 1:
+        run_name += f"_ws{world_size}"
     log_path = OUT_DIR / f"train_log_{run_name}.csv"
     best_path = OUT_DIR / f"cloud_model_{run_name}.pt"
     last_path = OUT_DIR / f"cloud_model_{run_name}_last.pt"
     cm_path = OUT_DIR / f"confusion_matrix_{run_name}.csv"
+    resume_path = OUT_DIR / f"cloud_model_{run_name}_resume.pt"
 
-    with open(log_path, "w", newline="", encoding="utf-8") as f:
-        csv.writer(f).writerow(["epoch", "lr", "train_loss", "val_loss", "val_top1", "val_top3", "sec"])
+    best_val = 0.0
+    start_epoch = 1
+
+    # -----------------------
+    # Resume (전체 학습 상태 복원)
+    # -----------------------
+    if args.resume:
+        src = resume_path if args.resume == "auto" else Path(args.resume)
+        # 직접 저장한 파일 (numpy/python RNG 상태 포함) → weights_only=False
+        state = torch.load(src, map_location="cpu", weights_only=False)
+        if state.get("world_size", 1) != world_size:
+            raise RuntimeError(f"resume: saved with world_size={state.get('world_size', 1)}, now {world_size}")
+        raw_model.load_state_dict(state["model_state"])
+        opt.load_state_dict(state["optimizer"])
+        scheduler.load_state_dict(state["scheduler"])
+        scaler.load_state_dict(state["scaler"])
+        if world_size == 1:
+            sampler_gen.set_state(state["sampler_rng"])
+        set_rng_state(state["rng"][rank])
+        start_epoch = state["epoch"] + 1
+        best_val = state["best_val"]
+        print(f"🔁 resumed from {src} (epoch {state['epoch']} done, best_val={best_val:.3f})", flush=True)
+
+    if is_main and start_epoch == 1:
+        with open(log_path, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(["epoch", "lr", "train_loss", "val_loss", "val_top1", "val_top3", "sec"])
 
     print(f"\n📝 logging to: {log_path}", flush=True)
 
-    best_val = 0.0
+    # 저장은 텐서 복사만 학습 스레드에서, 디스크 쓰기는 백그라운드 (임시 파일 → os.replace)
+    ckpt_writer = AsyncCheckpointer()
+
+    # 지표는 디바이스에 누적하고 에폭 끝에 한 번만 동기화
+    train_meter = MetricMeter(num_classes, device)
+    val_meter = MetricMeter(num_classes, device)
 
     # -----------------------
     # Train loop (Ctrl+C safe)
     # -----------------------
     try:
-        for epoch in range(1, args.epochs + 1):
+        for epoch in range(start_epoch, args.epochs + 1):
             t0 = time.time()
 
             model.train()
-            tr_loss_sum = 0.0
+            train_meter.reset()
+            if hasattr(sampler, "set_epoch"):
+                sampler.set_epoch(epoch)
 
-            train_bar = tqdm(train_loader, desc=f"Epoch {epoch}/{args.epochs} [train]")
-            for x, y in train_bar:
+            train_bar = tqdm(train_loader, desc=f"Epoch {epoch}/{args.epochs} [train]", disable=not is_main)
+            for step, (x, y) in enumerate(train_bar, 1):
                 x = x.to(device, non_blocking=True)
                 y = y.to(device, non_blocking=True)
+                if gpu_aug is not None:
+                    x = gpu_aug(x)
 
                 if args.mixup > 0:
                     x, y_a, y_b, lam = mixup_data(x, y, alpha=args.mixup)
@@ -274,33 +349,29 @@ def main():
                 scaler.step(opt)
                 scaler.update()
 
-                tr_loss_sum += loss.item() * x.size(0)
-                train_bar.set_postfix(loss=f"{loss.item():.4f}", lr=f"{opt.param_groups[0]['lr']:.2e}")
+                train_meter.update_loss(loss, x.size(0))
+                if step % 20 == 0:  # loss.item()은 동기화 → 가끔만
+                    train_bar.set_postfix(loss=f"{loss.item():.4f}", lr=f"{opt.param_groups[0]['lr']:.2e}")
 
-            train_loss = tr_loss_sum / max(1, len(train_ds))
+            train_loss = train_meter.compute()["loss"]
 
             # Validation
             model.eval()
-            val_loss_sum = 0.0
-            acc1_sum = 0.0
-            acc3_sum = 0.0
+            val_meter.reset()
 
             with torch.no_grad():
-                val_bar = tqdm(val_loader, desc=f"Epoch {epoch}/{args.epochs} [val]")
+                val_bar = tqdm(val_loader, desc=f"Epoch {epoch}/{args.epochs} [val]", disable=not is_main)
                 for x, y in val_bar:
                     x = x.to(device, non_blocking=True)
                     y = y.to(device, non_blocking=True)
                     with autocast(device_type="cuda", enabled=use_amp):
-                        logits = model(x)
+                        # 평가는 DDP 래퍼 없이 (rank별 배치 수가 달라도 통신 없음)
+                        logits = raw_model(x)
                         loss = crit(logits, y)
+                    val_meter.update(logits, y, loss)
 
-                    val_loss_sum += loss.item() * x.size(0)
-                    acc1_sum += topk_acc(logits, y, k=1) * x.size(0)
-                    acc3_sum += topk_acc(logits, y, k=3) * x.size(0)
-
-            val_loss = val_loss_sum / max(1, len(val_ds))
-            val_top1 = acc1_sum / max(1, len(val_ds))
-            val_top3 = acc3_sum / max(1, len(val_ds))
+            val = val_meter.compute()
+            val_loss, val_top1, val_top3 = val["loss"], val["top1"], val["top3"]
 
             scheduler.step()
             elapsed = time.time() - t0
@@ -312,66 +383,80 @@ def main():
                 flush=True
             )
 
-            with open(log_path, "a", newline="", encoding="utf-8") as f:
-                csv.writer(f).writerow([epoch, opt.param_groups[0]["lr"], train_loss, val_loss, val_top1, val_top3, elapsed])
+            # 파일 쓰기는 rank 0만 (val 지표는 all_reduce 결과라 모든 rank에서 같음)
+            if is_main:
+                with open(log_path, "a", newline="", encoding="utf-8") as f:
+                    csv.writer(f).writerow([epoch, opt.param_groups[0]["lr"], train_loss, val_loss, val_top1, val_top3, elapsed])
 
+            model_ckpt = {"model_state": raw_model.state_dict(), "classes": classes, "img_size": args.img, "arch": "convnext_tiny", "run_name": run_name}
             # save "last" checkpoint each epoch (so Ctrl+C won't waste progress)
-            torch.save(
-                {"model_state": model.state_dict(), "classes": classes, "img_size": args.img, "arch": "convnext_tiny", "run_name": run_name},
-                last_path
-            )
+            saves = [(model_ckpt, last_path)]
 
             # save best
             if val_top1 > best_val:
                 best_val = val_top1
-                torch.save(
-                    {"model_state": model.state_dict(), "classes": classes, "img_size": args.img, "arch": "convnext_tiny", "run_name": run_name},
-                    best_path
-                )
+                saves.append((model_ckpt, best_path))
                 print(f"✅ saved best model -> {best_path} (best_val={best_val:.3f})", flush=True)
 
+            # 전체 학습 상태 (RNG는 rank마다 다르므로 모두 모아서 저장)
+            rngs = all_gather_object(rng_state())
+            saves.append(({
+                **model_ckpt,
+                "optimizer": opt.state_dict(),
+                "scheduler": scheduler.state_dict(),
+                "scaler": scaler.state_dict(),
+                "sampler_rng": sampler_gen.get_state() if world_size == 1 else None,
+                "rng": rngs,
+                "epoch": epoch,
+                "best_val": best_val,
+                "world_size": world_size,
+            }, resume_path))
+            if is_main:
+                ckpt_writer.save(*saves)
+
     except KeyboardInterrupt:
         print("\n🛑 Training interrupted by user (Ctrl+C). Last checkpoint is saved.", flush=True)
+        print(f"   resume with: --resume auto (or --resume {resume_path})", flush=True)
+    finally:
+        ckpt_writer.wait()
 
     # -----------------------
     # Test best model + confusion matrix
     # -----------------------
-    if best_path.exists():
+    # DDP: 체크포인트는 rank 0 노드에만 있을 수 있으므로 rank 0이 읽고 가중치를 broadcast
+    barrier()
+    has_best = best_path.exists() if world_size == 1 else best_val > 0
+    if has_best:
         print("\n=== TESTING BEST MODEL ===", flush=True)
-        ckpt = torch.load(best_path, map_location=device)
-        model.load_state_dict(ckpt["model_state"])
-        model.eval()
+        if is_main:
+            ckpt = torch.load(best_path, map_location=device)
+            raw_model.load_state_dict(ckpt["model_state"])
+        broadcast_state(raw_model)
+        raw_model.eval()
 
-        all_preds, all_labels = [], []
-        test_acc1_sum, test_acc3_sum = 0.0, 0.0
+        test_meter = MetricMeter(num_classes, device)
 
         with torch.no_grad():
-            test_bar = tqdm(test_loader, desc="Test")
+            test_bar = tqdm(test_loader, desc="Test", disable=not is_main)
             for x, y in test_bar:
                 x = x.to(device, non_blocking=True)
                 y = y.to(device, non_blocking=True)
                 with autocast(device_type="cuda", enabled=use_amp):
-                    logits = model(x)
-
-                test_acc1_sum += topk_acc(logits, y, k=1) * x.size(0)
-                test_acc3_sum += topk_acc(logits, y, k=3) * x.size(0)
+                    logits = raw_model(x)
 
-                all_preds.append(logits.argmax(1).cpu())
-                all_labels.append(y.cpu())
+                test_meter.update(logits, y)
 
-        test_top1 = test_acc1_sum / max(1, len(test_ds))
-        test_top3 = test_acc3_sum / max(1, len(test_ds))
-        print(f"TEST top1={test_top1:.3f} top3={test_top3:.3f}", flush=True)
+        test = test_meter.compute()
+        print(f"TEST top1={test['top1']:.3f} top3={test['top3']:.3f} macro_f1={test['macro_f1']:.3f}", flush=True)
+        print(format_report(test, classes), flush=True)
 
-        cm = confusion_matrix(torch.cat(all_preds), torch.cat(all_labels), num_classes=num_classes).numpy()
-        with open(cm_path, "w", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            w.writerow(["true\\pred"] + classes)
-            for i, row in enumerate(cm):
-                w.writerow([classes[i]] + row.tolist())
+        if is_main:
+            write_confusion_csv(cm_path, test["confusion"], classes)
 
         print(f"📌 saved confusion matrix -> {cm_path}", flush=True)
 
+    cleanup_distributed()
+
 
 if __name__ == "__main__":
     main()
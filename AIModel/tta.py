@@ -0,0 +1,103 @@
+# AIModel/tta.py
+"""
+Test-time augmentation (TTA): 한 이미지를 N개 view로 만들어 한 번의 배치 forward → logits 평균.
+
+추론 전처리는 SkyCrop / CenterCrop이 고정이라, 지면이 많이 걸리거나 구름이 섞인 장면
+(predict_utils의 possible_mixed_cloud)에서 한 번의 crop에 결과가 크게 좌우된다.
+view는 아래 순서로 앞에서부터 n개 사용 (n이 같으면 항상 같은 view → 지연 시간 예측 가능):
+  center, flip, sky25, sky25_flip, tl, tr, bl, br
+  - sky25 : 아래 25%를 잘라낸 뒤 center crop (학습 때 SkyCrop 기본값)
+  - tl/tr/bl/br : Resize 후 center crop 대신 네 모서리 crop (five-crop)
+디코딩은 한 번, 리사이즈는 (sky, crop 위치)별로 한 번 (반전 view는 텐서 flip).
+
+- TTA_VIEWS     : 요청에 tta 값이 없을 때 기본 view 수 (기본 1 = TTA 끔)
+- TTA_MAX_VIEWS : 요청당 최대 view 수 (기본 8)
+
+API: POST /predict?tta=4, POST /predict_batch?tta=2
+(cascade 모드에서는 TTA 미적용: tta>1 요청은 400, TTA_VIEWS 기본값은 무시)
+"""
+import os
+import time
+from typing import List, Tuple
+
+import numpy as np
+import torch
+from PIL import Image
+
+from preprocess import FusedPreprocess, get_preprocessor
+
+TTA_VIEWS = int(os.getenv("TTA_VIEWS", "1"))
+TTA_MAX_VIEWS = int(os.getenv("TTA_MAX_VIEWS", "8"))
+
+# (이름, sky_crop, crop 위치, 좌우 반전)
+VIEWS = (
+    ("center", 0.0, "center", False),
+    ("flip", 0.0, "center", True),
+    ("sky25", 0.25, "center", False),
+    ("sky25_flip", 0.25, "center", True),
+    ("tl", 0.0, "tl", False),
+    ("tr", 0.0, "tr", False),
+    ("bl", 0.0, "bl", False),
+    ("br", 0.0, "br", False),
+)
+
+
+def tta_views(n) -> int:
+    """요청 값 → 실제 view 수 (None이면 TTA_VIEWS, 1..min(TTA_MAX_VIEWS, len(VIEWS))로 제한)."""
+    n = TTA_VIEWS if n is None else int(n)
+    return max(1, min(n, TTA_MAX_VIEWS, len(VIEWS)))
+
+
+def _crop_box(pre: FusedPreprocess, w: int, h: int, where: str) -> Tuple[float, float, float, float]:
+    """center crop 영역을 같은 크기로 모서리까지 옮긴 영역 (SkyCrop 후 남은 영역 안에서)."""
+    box = pre.crop_box(w, h)
+    if where == "center":
+        return box
+    if pre.sky_crop > 0:
+        h = max(1, h - int(h * pre.sky_crop))
+    bw, bh = box[2] - box[0], box[3] - box[1]
+    left = 0.0 if where[1] == "l" else w - bw
+    top = 0.0 if where[0] == "t" else h - bh
+    return left, top, left + bw, top + bh
+
+
+def build_views(img: Image.Image, img_size: int, n: int, resize=None) -> torch.Tensor:
+    """PIL 이미지 → (n,3,S,S) 정규화된 view 텐서."""
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    w, h = img.size
+    base = {}
+    out = []
+    for _, sky, where, flip in VIEWS[:n]:
+        if (sky, where) not in base:
+            pre = get_preprocessor(int(img_size), sky, resize=resize)
+            crop = img.resize((pre.img_size, pre.img_size), Image.BILINEAR, box=_crop_box(pre, w, h, where))
+            base[(sky, where)] = pre.normalize(np.asarray(crop))
+        x = base[(sky, where)]
+        out.append(x.flip(-1) if flip else x)
+    return torch.stack(out)
+
+
+def preprocess_bytes_tta_timed(data: bytes, img_size: int, n: int) -> Tuple[torch.Tensor, float, float]:
+    """
+    predictor.preprocess_bytes_timed의 TTA 버전: (x (n,3,H,W), decode_s, transform_s).
+    워커 스레드/프로세스에서 호출되므로 모듈 최상위 함수.
+    """
+    # draft는 가장 큰 영역이 필요한 view 기준 (sky crop view는 세로로 더 필요)
+    pre = get_preprocessor(int(img_size), max(sky for _, sky, _, _ in VIEWS[:n]))
+    t0 = time.perf_counter()
+    img = pre.decode(data)
+    img.load()
+    t1 = time.perf_counter()
+    x = build_views(img, img_size, n)
+    return x, t1 - t0, time.perf_counter() - t1
+
+
+def average_logits(logits: torch.Tensor, views: List[int]) -> torch.Tensor:
+    """이미지별 view 수 views로 이어 붙인 (sum(views), C) logits → 이미지별 평균 (len(views), C)."""
+    if all(v == 1 for v in views):
+        return logits
+    counts = torch.tensor(views, device=logits.device)
+    seg = torch.repeat_interleave(torch.arange(len(views), device=logits.device), counts)
+    out = torch.zeros(len(views), logits.size(1), dtype=logits.dtype, device=logits.device)
+    return out.index_add_(0, seg, logits) / counts.unsqueeze(1).to(logits.dtype)
@@ -0,0 +1,151 @@
+# AIModel/tune_cascade.py
+"""
+cascade.py 임계값 고르기 (오프라인, val split).
+
+두 모델의 val 확률을 한 번씩만 계산한 뒤, 점수(p1 / margin)와 임계값 조합마다
+- cascade top-1 (점수 < 임계값이면 무거운 모델 답, 아니면 빠른 모델 답)
+- escalation 비율 r (무거운 모델까지 가는 이미지 비율)
+- 기대 연산량 = 빠른 모델 + r * 무거운 모델 (MACs, b1 지연 시간 둘 다) → 무거운 모델 단독 대비 절감률
+을 계산하고, 목표 정확도(--target_acc, 없으면 무거운 모델 val top-1 - --max_drop)를 만족하면서
+escalation이 가장 적은 설정을 고른다. 고른 설정은 --check_split(기본 test)에서 한 번 더 확인.
+
+사용:
+  python tune_cascade.py --fast outputs/cloud_model_fast.pt --heavy outputs/cloud_model_best.pt
+  python tune_cascade.py --fast outputs/cloud_model_fast.pt --heavy outputs/cloud_model_best.pt --target_acc 0.85 --cache_dir splits/ccsn_cache
+"""
+import argparse
+import csv
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from cascade import SCORES, Cascade, confidence_score
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+
+def split_probs(args, split: str, cascade: Cascade, batch_size: int):
+    """(빠른 모델 확률, 무거운 모델 확률, 라벨) — 모두 무거운 모델 클래스 순서."""
+    from evaluate import SharedInputs, load_split_images
+
+    args.split = split
+    classes, labels, images = load_split_images(args, max(cascade.img_sizes))
+    inputs = SharedInputs(images, args.sky_crop)
+    heavy = cascade.heavy
+    y = torch.tensor([heavy.class_names.index(c) for c in classes])[torch.tensor(labels)]
+
+    def run(b, x_all):
+        outs = []
+        with torch.inference_mode():
+            for i in range(0, len(x_all), batch_size):
+                outs.append(torch.softmax(b.model(x_all[i:i + batch_size].to(b.device)).float(), dim=1).cpu())
+        return torch.cat(outs)
+
+    pf = run(cascade.fast, inputs.get(cascade.fast.img_size))[:, cascade.remap]
+    ph = run(heavy, inputs.get(heavy.img_size))
+    return pf, ph, y
+
+
+def sweep(pf, ph, y, thresholds):
+    """점수/임계값별 (score, threshold, top1, escalation)."""
+    pred_f, pred_h = pf.argmax(1), ph.argmax(1)
+    rows = []
+    for score in SCORES:
+        s = confidence_score(pf, score)
+        for t in thresholds:
+            esc = s < t
+            pred = torch.where(esc, pred_h, pred_f)
+            rows.append((score, float(t), (pred == y).float().mean().item(), esc.float().mean().item()))
+    return rows
+
+
+def model_costs(b, iters: int):
+    """(입력 1장 MACs, b1 p50 지연 ms)"""
+    from bench_utils import measure_latency
+    from prune import count_macs
+
+    x = torch.randn(1, 3, b.img_size, b.img_size).to(b.device)
+    return count_macs(b.model, b.img_size), measure_latency(b.model, x, iters=iters)["p50_ms"]
+
+
+def main():
+    from model_loader_HF import load_model_bundle
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fast", type=str, default=str(PROJECT_DIR / "outputs" / "cloud_model_fast.pt"))
+    parser.add_argument("--heavy", type=str, default=str(PROJECT_DIR / "outputs" / "cloud_model_best.pt"))
+    parser.add_argument("--data_dir", type=str, default=str(PROJECT_DIR / "splits" / "ccsn_split"))
+    parser.add_argument("--cache_dir", type=str, default="", help="use dataset_cache.py shards instead of JPEGs")
+    parser.add_argument("--sky_crop", type=float, default=0.0, help="0 = same as the API")
+    parser.add_argument("--target_acc", type=float, default=None, help="required cascade top-1 on val")
+    parser.add_argument("--max_drop", type=float, default=0.005,
+                        help="if --target_acc is not given: allowed drop vs heavy-only val top-1")
+    parser.add_argument("--check_split", type=str, default="test", help="re-check the chosen setting ('' = skip)")
+    parser.add_argument("--batch_size", type=int, default=32)
+    parser.add_argument("--device", type=str, default=None)
+    parser.add_argument("--iters", type=int, default=20, help="latency iterations")
+    args = parser.parse_args()
+
+    heavy = load_model_bundle(args.heavy, device=args.device)
+    fast = load_model_bundle(args.fast, device=heavy.device)
+    cascade = Cascade(fast, heavy, score="p1")
+
+    pf, ph, y = split_probs(args, "val", cascade, args.batch_size)
+    fast_acc = (pf.argmax(1) == y).float().mean().item()
+    heavy_acc = (ph.argmax(1) == y).float().mean().item()
+    target = args.target_acc if args.target_acc is not None else heavy_acc - args.max_drop
+    print(f"📦 val: {len(y)} images | fast {fast.arch}@{fast.img_size} top1={fast_acc:.4f} | "
+          f"heavy {heavy.arch}@{heavy.img_size} top1={heavy_acc:.4f} | target={target:.4f}")
+
+    macs_f, ms_f = model_costs(fast, args.iters)
+    macs_h, ms_h = model_costs(heavy, args.iters)
+    print(f"⏱️ cost per image: fast {macs_f / 1e9:.3f} GMACs / {ms_f:.1f} ms | "
+          f"heavy {macs_h / 1e9:.3f} GMACs / {ms_h:.1f} ms")
+    if macs_f >= macs_h:
+        print("⚠️ fast model is not cheaper than the heavy model -> the cascade cannot save compute")
+
+    def saved(rate: float, fast_cost: float, heavy_cost: float) -> float:
+        # 빠른 모델은 항상 + 무거운 모델은 escalation된 비율만큼
+        return 1.0 - (fast_cost + rate * heavy_cost) / heavy_cost
+
+    thresholds = np.round(np.linspace(0.0, 1.0, 101), 2)
+    rows = [{
+        "score": score, "threshold": t, "top1": round(acc, 4), "escalation": round(rate, 4),
+        "macs_saved": round(saved(rate, macs_f, macs_h), 4), "latency_saved": round(saved(rate, ms_f, ms_h), 4),
+    } for score, t, acc, rate in sweep(pf, ph, y, thresholds)]
+
+    keys = list(rows[0].keys())
+    print("\n" + " | ".join(f"{k:>13}" for k in keys))
+    for r in rows:
+        if round(r["threshold"] * 100) % 10 == 0:
+            print(" | ".join(f"{str(r[k]):>13}" for k in keys))
+
+    ok = [r for r in rows if r["top1"] >= target]
+    if not ok:
+        best = max(rows, key=lambda r: (r["top1"], -r["escalation"]))
+        print(f"\n⚠️ no setting reaches top1 >= {target:.4f} on val (best {best['top1']:.4f})")
+    else:
+        best = min(ok, key=lambda r: (r["escalation"], -r["top1"]))
+    print(f"\n✅ CASCADE_SCORE={best['score']} CASCADE_THRESHOLD={best['threshold']:g} | "
+          f"val top1={best['top1']:.4f} (heavy {heavy_acc:.4f}) escalation={best['escalation']:.1%} | "
+          f"expected compute saved: {best['macs_saved']:.1%} MACs, {best['latency_saved']:.1%} latency (b1)")
+
+    if args.check_split:
+        pf, ph, y = split_probs(args, args.check_split, cascade, args.batch_size)
+        _, _, acc, rate = next(r for r in sweep(pf, ph, y, [best["threshold"]]) if r[0] == best["score"])
+        heavy_chk = (ph.argmax(1) == y).float().mean().item()
+        print(f"📌 {args.check_split}: cascade top1={acc:.4f} (heavy {heavy_chk:.4f}) escalation={rate:.1%} "
+              f"-> {saved(rate, macs_f, macs_h):.1%} MACs / {saved(rate, ms_f, ms_h):.1%} latency saved")
+
+    out_path = PROJECT_DIR / "outputs" / f"cascade_sweep_{Path(args.fast).stem}_{Path(args.heavy).stem}.csv"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=keys)
+        w.writeheader()
+        w.writerows(rows)
+    print(f"\n📌 saved sweep -> {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# AIModel/warmup.py
+"""
+서버 기동 직후 워밍업.
+
+배포 직후 첫 /predict가 allocator 확장, oneDNN/cuDNN 커널 선택, 첫 메모리 접근 비용을
+떠안지 않도록, 실제 요청과 같은 경로(preprocess_bytes → predict_batch)로 합성 입력을 미리 돌린다.
+
+- WARMUP            : 0이면 끔 (기본 1)
+- WARMUP_BATCH_SIZES: 쉼표 구분 배치 크기 (기본: 1..BATCH_MAX_SIZE 전부 — 배처가 만들 수 있는 모든 크기)
+- WARMUP_IMG_SIZES  : 쉼표 구분 입력 크기 (기본: 체크포인트 img_size)
+- WARMUP_ITERS      : 크기 조합마다 반복 횟수 (기본 2 — 첫 회 = 콜드, 마지막 회 = 워밍업 후)
+
+api.py는 infer 스레드에서 백그라운드로 실행하고, 끝나기 전까지 /ready는 503을 돌려준다.
+워밍업이 실패해도(state="failed") ready로 본다: 워밍업은 첫 요청 지연을 줄이는 최적화일 뿐이고
+모델은 이미 로드되어 /predict는 정상 동작하므로, 영구 503으로 트래픽을 막지 않는다.
+실패는 /ready·/health의 warmup state/error와 기동 로그로 확인.
+"""
+import io
+import os
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from PIL import Image
+
+from batcher import BATCH_MAX_SIZE
+from predictor import predict_batch, preprocess_bytes
+
+WARMUP_ENABLED = os.getenv("WARMUP", "1") != "0"
+WARMUP_ITERS = int(os.getenv("WARMUP_ITERS", "2"))
+
+
+def _int_list(value: Optional[str]) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()] if value else []
+
+
+WARMUP_BATCH_SIZES = _int_list(os.getenv("WARMUP_BATCH_SIZES"))
+WARMUP_IMG_SIZES = _int_list(os.getenv("WARMUP_IMG_SIZES"))
+
+
+def synthetic_jpeg(width: int = 1024, height: int = 768, seed: int = 0) -> bytes:
+    """디코딩 경로(draft 포함)까지 데우기 위한 랜덤 JPEG."""
+    rng = np.random.default_rng(seed)
+    arr = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(arr).save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+class Warmup:
+    """워밍업 상태(/ready)와 단계별 시간(/health, 기동 로그)."""
+
+    def __init__(self, enabled: bool = WARMUP_ENABLED,
+                 batch_sizes: Optional[List[int]] = None,
+                 img_sizes: Optional[List[int]] = None,
+                 iters: int = WARMUP_ITERS):
+        self.enabled = enabled
+        self.batch_sizes = batch_sizes or WARMUP_BATCH_SIZES or list(range(1, BATCH_MAX_SIZE + 1))
+        self.img_sizes = img_sizes or WARMUP_IMG_SIZES
+        self.iters = max(1, int(iters))
+        self.state = "pending" if enabled else "disabled"
+        self.error: Optional[str] = None
+        self.total_s = 0.0
+        self.timings: List[dict] = []
+
+    @property
+    def ready(self) -> bool:
+        # "failed"도 ready: 요청은 처리 가능 (첫 요청만 콜드 경로)
+        return self.state in ("done", "disabled", "failed")
+
+    def run(self, model: Callable, meta: dict, extra: Sequence[Tuple[Callable, dict]] = ()) -> dict:
+        """
+        동기 실행 (api.py에서는 infer 스레드에서 호출 — 실제 forward와 같은 스레드).
+        실패해도 예외를 던지지 않고 state="failed" + error로 남김 (ready로 간주, /health에 노출).
+        extra: 같이 데울 (model, meta) 쌍 (예: cascade.py의 빠른 모델)
+        """
+        if not self.enabled:
+            return self.stats()
+
+        self.state = "running"
+        t_start = time.perf_counter()
+        try:
+            data = synthetic_jpeg()
+            for model_i, meta_i in [(model, meta), *extra]:
+                for img_size in self.img_sizes or [int(meta_i["img_size"])]:
+                    t0 = time.perf_counter()
+                    x1 = preprocess_bytes(data, img_size)
+                    pre_ms = (time.perf_counter() - t0) * 1000.0
+
+                    for bs in self.batch_sizes:
+                        x = x1.expand(bs, -1, -1, -1).contiguous()
+                        times = []
+                        for _ in range(self.iters):
+                            t0 = time.perf_counter()
+                            predict_batch(model_i, meta_i, x, topk=min(3, len(meta_i["classes"])))
+                            if torch.cuda.is_available():
+                                torch.cuda.synchronize()
+                            times.append((time.perf_counter() - t0) * 1000.0)
+                        self.timings.append({
+                            "img_size": img_size,
+                            "batch_size": bs,
+                            "first_ms": round(times[0], 2),
+                            "last_ms": round(times[-1], 2),
+                            "preprocess_ms": round(pre_ms, 2),
+                        })
+            self.state = "done"
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+        self.total_s = time.perf_counter() - t_start
+
+        self.log()
+        return self.stats()
+
+    def log(self):
+        if self.state == "failed":
+            print(f"[HaneulGyeol] Warmup failed after {self.total_s:.2f}s | {self.error} "
+                  f"-> serving without warmup (first requests may be slow)")
+            return
+        parts = [f"img{t['img_size']}/b{t['batch_size']}={t['first_ms']:.0f}->{t['last_ms']:.0f}ms"
+                 for t in self.timings]
+        print(f"[HaneulGyeol] Warmup done | total={self.total_s:.2f}s | " + ", ".join(parts))
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "total_s": round(self.total_s, 3),
+            "batch_sizes": self.batch_sizes,
+            "iters": self.iters,
+            "error": self.error,
+            "timings": self.timings,
+        }
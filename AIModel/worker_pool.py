@@ -0,0 +1,116 @@
+# AIModel/worker_pool.py
+"""
+이벤트 루프 밖에서 무거운 작업(이미지 디코딩/전처리, 모델 forward)을 돌리기 위한 실행기.
+
+- INFER_EXECUTOR : "thread"(기본) 또는 "process" — 디코딩/전처리에 쓸 실행기 종류
+- INFER_WORKERS  : 디코딩 워커 수
+- INFER_QUEUE_SIZE : 워커가 모두 바쁠 때 대기시킬 수 있는 최대 작업 수
+  → 이를 넘으면 즉시 PoolSaturated를 던지고, API는 503으로 응답한다.
+
+모델 forward는 프로세스 간에 모델을 복제하지 않도록 항상 전용 스레드 1개에서 실행한다.
+(torch 연산은 GIL을 놓고 내부적으로 intra-op 스레드를 쓰므로 이걸로 충분)
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+INFER_EXECUTOR = os.getenv("INFER_EXECUTOR", "thread").lower()
+INFER_WORKERS = int(os.getenv("INFER_WORKERS", str(min(4, os.cpu_count() or 1))))
+INFER_QUEUE_SIZE = int(os.getenv("INFER_QUEUE_SIZE", "32"))
+
+
+class PoolSaturated(RuntimeError):
+    """대기열이 가득 차서 작업을 받을 수 없음 (API에서는 503)."""
+
+
+class WorkerPool:
+    """
+    동시에 진행 중인 작업 수를 workers + queue_size로 제한하는 비동기 실행기 래퍼.
+    카운터는 이벤트 루프 스레드에서만 바뀌므로 락이 필요 없다.
+    """
+
+    def __init__(self, kind: str = INFER_EXECUTOR, workers: int = INFER_WORKERS,
+                 queue_size: int = INFER_QUEUE_SIZE, name: str = "decode"):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unsupported executor kind: {kind}")
+        self.kind = kind
+        self.name = name
+        self.workers = max(1, int(workers))
+        self.capacity = self.workers + max(0, int(queue_size))
+        self._executor: Executor | None = None
+        self._inflight = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def start(self):
+        if self._executor is not None:
+            return
+        if self.kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix=f"hg-{self.name}"
+            )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self.start()
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        if self._inflight >= self.capacity:
+            self._rejected += 1
+            raise PoolSaturated(f"{self.name} pool is saturated ({self._inflight}/{self.capacity})")
+
+        self._inflight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            self._inflight -= 1
+            self._completed += 1
+
+    async def map(self, fn: Callable[..., Any], items: list, *args) -> list:
+        """
+        fn(item, *args)를 여러 item에 병렬로 적용 (최대 workers개 동시 실행).
+        전체를 하나의 작업 묶음으로 받아들이거나(슬롯 min(n, workers)개 점유) 통째로 거절한다.
+        반환: 입력 순서대로 결과 또는 예외 객체 (이미지별 오류 보고용)
+        """
+        if not items:
+            return []
+        slots = min(len(items), self.workers)
+        if self._inflight + slots > self.capacity:
+            self._rejected += 1
+            raise PoolSaturated(f"{self.name} pool is saturated ({self._inflight}/{self.capacity})")
+
+        self._inflight += slots
+        try:
+            loop = asyncio.get_running_loop()
+            sem = asyncio.Semaphore(slots)
+
+            async def _one(item):
+                async with sem:
+                    return await loop.run_in_executor(self.executor, functools.partial(fn, item, *args))
+
+            return await asyncio.gather(*(_one(it) for it in items), return_exceptions=True)
+        finally:
+            self._inflight -= slots
+            self._completed += len(items)
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "inflight": self._inflight,
+            "completed": self._completed,
+            "rejected": self._rejected,
+        }